@@ -0,0 +1,82 @@
+"""
+Times the line-oriented block scanner against the previous
+split("\n\n")-then-classify approach on long Markdown documents.
+
+Run with: python3 -m benchmarks.bench_blocks
+"""
+
+import timeit
+
+from src.markdown_blocks import iter_blocks
+
+
+SIZES = [1_000, 10_000, 50_000]
+
+
+def legacy_block_types(markdown):
+    blocks = []
+    for block in markdown.split("\n\n"):
+        stripped_lines = [line.strip() for line in block.split("\n") if line.strip()]
+        if stripped_lines:
+            blocks.append("\n".join(stripped_lines))
+    types = []
+    for block in blocks:
+        lines = block.split("\n")
+        if lines[0].startswith("```") and lines[-1].endswith("```"):
+            types.append("code")
+        elif any(lines[0].startswith(f"{'#' * i} ") for i in range(1, 7)):
+            types.append("heading")
+        elif all(line.startswith(">") for line in lines):
+            types.append("quote")
+        elif all(line.startswith("- ") for line in lines):
+            types.append("ulist")
+        elif all(
+            line.split(". ")[0].isdigit() and line.split(". ")[1:] for line in lines
+        ) and [int(line.split(". ")[0]) for line in lines] == list(
+            range(1, len(lines) + 1)
+        ):
+            types.append("olist")
+        else:
+            types.append("paragraph")
+    return list(zip(types, (block.split("\n") for block in blocks)))
+
+
+def scanner_block_types(markdown):
+    return list(iter_blocks(markdown.split("\n")))
+
+
+def make_document(blocks):
+    parts = []
+    for i in range(blocks):
+        kind = i % 5
+        if kind == 0:
+            parts.append(f"## Section {i}")
+        elif kind == 1:
+            parts.append(f"Paragraph {i} line one\nline two with **bold**\nline three")
+        elif kind == 2:
+            parts.append("\n".join(f"{n}. item {n}" for n in range(1, 8)))
+        elif kind == 3:
+            parts.append("\n".join(f"- item {n}" for n in range(6)))
+        else:
+            parts.append("> quoted\n> text")
+    return "\n\n".join(parts)
+
+
+def main():
+    print(f"{'blocks':>8} {'scanner':>10} {'legacy':>10} {'speedup':>8}")
+    for blocks in SIZES:
+        markdown = make_document(blocks)
+        scanner = min(
+            timeit.repeat(lambda: scanner_block_types(markdown), number=1, repeat=3)
+        )
+        legacy = min(
+            timeit.repeat(lambda: legacy_block_types(markdown), number=1, repeat=3)
+        )
+        print(
+            f"{blocks:>8} {scanner * 1000:>8.1f}ms {legacy * 1000:>8.1f}ms "
+            f"{legacy / scanner:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Times text_to_textnodes on paragraphs with a growing number of links and
+emphasis spans, next to the previous five-stage split_nodes pipeline.
+
+Run with: python3 -m benchmarks.bench_inline
+"""
+
+import timeit
+
+from src.textnode import TextNode, TextType
+from src.utils import (
+    split_nodes_delimiter,
+    split_nodes_image,
+    split_nodes_link,
+    text_to_textnodes,
+)
+
+
+SIZES = [100, 1000, 5000]
+
+
+def staged_text_to_textnodes(text):
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    nodes = split_nodes_image(nodes)
+    nodes = split_nodes_link(nodes)
+    return nodes
+
+
+def make_paragraph(spans):
+    parts = []
+    for i in range(spans):
+        kind = i % 4
+        if kind == 0:
+            parts.append(f"see [link {i}](https://example.com/{i})")
+        elif kind == 1:
+            parts.append(f"a **bold {i}** word")
+        elif kind == 2:
+            parts.append(f"an _italic {i}_ word")
+        else:
+            parts.append(f"an ![image {i}](/images/{i}.png)")
+    return " and ".join(parts)
+
+
+def time_call(func, text, repeat=3):
+    return min(timeit.repeat(lambda: func(text), number=1, repeat=repeat))
+
+
+def main():
+    print(
+        f"{'spans':>8} {'single-pass':>12} {'per span':>10} "
+        f"{'staged':>10} {'speedup':>8}"
+    )
+    for spans in SIZES:
+        text = make_paragraph(spans)
+        single = time_call(text_to_textnodes, text)
+        staged = time_call(staged_text_to_textnodes, text)
+        print(
+            f"{spans:>8} {single * 1000:>10.2f}ms {single / spans * 1e6:>8.2f}us "
+            f"{staged * 1000:>8.2f}ms {staged / single:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Measures the block memo on synthetic sites sharing a growing fraction of
+their blocks, comparing full builds with and without it, best of --repeat.
+
+Run with: python3 -m benchmarks.bench_memo [--pages N] [-j JOBS] [--repeat N]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.corpus import CorpusShape, generate_corpus
+import src.build
+from src.build import BuildConfig, build_pages
+
+
+def timed_build(config, repeat):
+    timings = []
+    for _ in range(repeat):
+        # Serial builds keep the memo of the last one, start afresh.
+        src.build._worker_memo = None
+        start = time.perf_counter()
+        result = build_pages(config)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("-j", "--jobs", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'shared':>7} {'no memo':>9} {'memo':>9} {'hits':>8} {'misses':>8}")
+    for shared in (0.0, 0.25, 0.5, 0.75):
+        with tempfile.TemporaryDirectory() as root:
+            content_dir, _, template_path = generate_corpus(
+                root, CorpusShape(pages=args.pages, shared_blocks=shared)
+            )
+            timings = {}
+            for memo_size in (0, BuildConfig.block_memo_size):
+                config = BuildConfig(
+                    content_dir=content_dir,
+                    dest_dir=os.path.join(root, f"docs-{memo_size}"),
+                    template_path=template_path,
+                    jobs=args.jobs,
+                    block_memo_size=memo_size,
+                    force=True,
+                )
+                timings[memo_size], result = timed_build(config, args.repeat)
+        print(
+            f"{shared:>7.0%} {timings[0]:>8.2f}s {timings[memo_size]:>8.2f}s "
+            f"{result.block_hits:>8} {result.block_misses:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
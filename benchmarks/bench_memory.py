@@ -0,0 +1,66 @@
+"""
+Reports the bytes used per TextNode, LeafNode and ParentNode and the peak
+RSS of building a synthetic site.
+
+Run with: python3 -m benchmarks.bench_memory [--pages N]
+"""
+
+import argparse
+import contextlib
+import os
+import resource
+import tempfile
+import tracemalloc
+
+from benchmarks.corpus import CorpusShape, generate_corpus
+from src.build import BuildConfig, build_pages
+from src.htmlnode import LeafNode, ParentNode
+from src.textnode import TextNode, TextType
+
+
+NODE_COUNT = 100_000
+
+
+def bytes_per_node(factory, count=NODE_COUNT):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    nodes = [factory(i) for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del nodes
+    return (after - before) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=2000)
+    args = parser.parse_args()
+
+    # The values are shared by all nodes, so only the node objects are counted.
+    text = "text"
+    children = []
+    factories = {
+        "TextNode": lambda i: TextNode(text, TextType.BOLD),
+        "LeafNode": lambda i: LeafNode("b", text),
+        "ParentNode": lambda i: ParentNode("p", children),
+    }
+    for name, factory in factories.items():
+        print(f"{name:>10}: {bytes_per_node(factory):6.1f} bytes/node")
+
+    with tempfile.TemporaryDirectory() as root:
+        content_dir, _, template_path = generate_corpus(
+            root, CorpusShape(pages=args.pages)
+        )
+        config = BuildConfig(
+            content_dir=content_dir,
+            dest_dir=os.path.join(root, "docs"),
+            template_path=template_path,
+        )
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            result = build_pages(config)
+    peak_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"built {len(result.rendered)} pages, peak RSS {peak_kib / 1024:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
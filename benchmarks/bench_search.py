@@ -0,0 +1,78 @@
+"""
+Measures the size of the search index and the time it adds to full and
+incremental builds of a synthetic site.
+
+Run with: python3 -m benchmarks.bench_search [--pages N] [--changed N]
+"""
+
+import argparse
+import contextlib
+import os
+import tempfile
+import time
+
+from benchmarks.corpus import CorpusShape, generate_corpus
+from src.build import BuildConfig, build_pages, collect_pages
+from src.search import SEARCH_DIR
+from src.static_sync import list_files
+
+
+def timed_build(config):
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        result = build_pages(config)
+        return time.perf_counter() - start, result
+
+
+def index_size(dest_dir):
+    search_dir = os.path.join(dest_dir, SEARCH_DIR)
+    sizes = [
+        os.path.getsize(os.path.join(search_dir, rel_path))
+        for rel_path in list_files(search_dir)
+    ]
+    return len(sizes), sum(sizes), max(sizes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=10_000)
+    parser.add_argument("--changed", type=int, default=10)
+    parser.add_argument("-j", "--jobs", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        content_dir, _, template_path = generate_corpus(
+            root, CorpusShape(pages=args.pages)
+        )
+        timings = {}
+        for search in (False, True):
+            config = BuildConfig(
+                content_dir=content_dir,
+                dest_dir=os.path.join(root, f"docs-{search}"),
+                template_path=template_path,
+                jobs=args.jobs,
+                search=search,
+            )
+            timings[search], _ = timed_build(config)
+
+        pages = collect_pages(content_dir, config.dest_dir)
+        for from_path, _ in pages[: args.changed]:
+            with open(from_path, "a") as f:
+                f.write("\nAn edited paragraph mentioning incremental indexing.\n")
+        incremental, result = timed_build(config)
+        files, total, largest = index_size(config.dest_dir)
+
+    print(f"full build without search: {timings[False]:8.2f}s")
+    print(f"full build with search:    {timings[True]:8.2f}s")
+    print(
+        f"incremental build, {len(result.rendered)} pages changed: "
+        f"{incremental * 1000:.0f}ms, {result.search_shards} shards rewritten"
+    )
+    print(
+        f"index: {files} files, {total / 1024 / 1024:.1f} MiB, "
+        f"{total / args.pages:.0f} bytes/page, largest file {largest / 1024:.0f} KiB"
+    )
+
+
+if __name__ == "__main__":
+    main()
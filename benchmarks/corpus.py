@@ -0,0 +1,148 @@
+"""
+Generates synthetic content trees for the benchmarks.
+"""
+
+import os
+import random
+from dataclasses import asdict, dataclass, field
+
+
+TEMPLATE = """<!doctype html>
+<html>
+  <head>
+    <title>{{ Title }}</title>
+    <link href="/index.css" rel="stylesheet" />
+  </head>
+  <body>
+    <article>{{ Content }}</article>
+  </body>
+</html>
+"""
+
+
+@dataclass
+class CorpusShape:
+    pages: int = 1000
+    depth: int = 2
+    fanout: int = 10
+    blocks_per_page: int = 30
+    # Relative weights of the block types in a page.
+    block_mix: dict = field(
+        default_factory=lambda: {
+            "paragraph": 6,
+            "heading": 2,
+            "ulist": 1,
+            "olist": 1,
+            "quote": 1,
+            "code": 1,
+        }
+    )
+    links_per_paragraph: int = 3
+    code_lines: int = 10
+    # Fraction of the blocks drawn from a pool of SHARED_POOL_SIZE blocks
+    # repeated across pages, such as disclaimers or author bios.
+    shared_blocks: float = 0.0
+    seed: int = 0
+
+    def to_dict(self):
+        return asdict(self)
+
+
+SHARED_POOL_SIZE = 50
+
+WORDS = (
+    "the quick brown fox jumps over lazy dog elf ring shire river mountain "
+    "forest song light shadow road king tower stone sword"
+).split()
+
+
+def page_dir(index, shape: CorpusShape):
+    parts = []
+    n = index
+    for _ in range(shape.depth):
+        parts.append(f"section{n % shape.fanout}")
+        n //= shape.fanout
+    return os.path.join(*parts, f"page{index}") if parts else f"page{index}"
+
+
+def make_sentence(rng, words=12):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def make_paragraph(rng, shape: CorpusShape, pages):
+    parts = [make_sentence(rng)]
+    for i in range(shape.links_per_paragraph):
+        target = rng.randrange(pages)
+        parts.append(f"see [page {target}](/{page_dir(target, shape)}/)")
+        parts.append(rng.choice(["a **bold** word", "an _italic_ word", "some `code`"]))
+        parts.append(make_sentence(rng, 6))
+    return "\n".join(" ".join(parts[i : i + 3]) for i in range(0, len(parts), 3))
+
+
+def make_block(kind, rng, shape: CorpusShape, pages):
+    if kind == "paragraph":
+        return make_paragraph(rng, shape, pages)
+    if kind == "heading":
+        return f"{'#' * rng.randint(2, 4)} {make_sentence(rng, 4)}"
+    if kind == "ulist":
+        return "\n".join(f"- {make_sentence(rng, 5)}" for _ in range(5))
+    if kind == "olist":
+        return "\n".join(f"{n}. {make_sentence(rng, 5)}" for n in range(1, 6))
+    if kind == "quote":
+        return "\n".join(f"> {make_sentence(rng, 8)}" for _ in range(3))
+    if kind == "code":
+        lines = [
+            f"line_{n} = {make_sentence(rng, 3)!r}" for n in range(shape.code_lines)
+        ]
+        return "```\n" + "\n".join(lines) + "\n```"
+    raise ValueError(f"invalid block kind: {kind}")
+
+
+def make_page(index, shape: CorpusShape, rng, shared=()):
+    kinds = list(shape.block_mix)
+    weights = [shape.block_mix[kind] for kind in kinds]
+    blocks = [f"# Page {index}"]
+    for kind in rng.choices(kinds, weights, k=shape.blocks_per_page):
+        if shared and rng.random() < shape.shared_blocks:
+            blocks.append(rng.choice(shared))
+        else:
+            blocks.append(make_block(kind, rng, shape, shape.pages))
+    return "\n\n".join(blocks) + "\n"
+
+
+def make_shared_blocks(shape: CorpusShape):
+    rng = random.Random(shape.seed + 1)
+    kinds = list(shape.block_mix)
+    weights = [shape.block_mix[kind] for kind in kinds]
+    return [
+        make_block(kind, rng, shape, shape.pages)
+        for kind in rng.choices(kinds, weights, k=SHARED_POOL_SIZE)
+    ]
+
+
+def generate_corpus(root, shape: CorpusShape):
+    """
+    Writes a content tree of the given shape under root/content, along with
+    root/template.html and root/static, and returns their three paths.
+    """
+    rng = random.Random(shape.seed)
+    shared = make_shared_blocks(shape) if shape.shared_blocks else ()
+    content_dir = os.path.join(root, "content")
+    for index in range(shape.pages):
+        dir_path = os.path.join(content_dir, page_dir(index, shape))
+        os.makedirs(dir_path, exist_ok=True)
+        with open(os.path.join(dir_path, "index.md"), "w") as f:
+            f.write(make_page(index, shape, rng, shared))
+
+    static_dir = os.path.join(root, "static")
+    os.makedirs(os.path.join(static_dir, "images"), exist_ok=True)
+    with open(os.path.join(static_dir, "index.css"), "w") as f:
+        f.write("body { margin: 0 auto; max-width: 40em; }\n")
+    for n in range(10):
+        with open(os.path.join(static_dir, "images", f"image{n}.png"), "wb") as f:
+            f.write(rng.randbytes(4096))
+
+    template_path = os.path.join(root, "template.html")
+    with open(template_path, "w") as f:
+        f.write(TEMPLATE)
+    return content_dir, static_dir, template_path
@@ -0,0 +1,243 @@
+"""
+Generates a synthetic site and times each stage of the build separately,
+along with the startup of the generator, writing the results as JSON so
+that runs can be compared between commits.
+
+Run with: python3 -m benchmarks.run [--pages N] [--output FILE] [--compare FILE]
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.corpus import CorpusShape, generate_corpus
+from src.build import BuildConfig, build, collect_pages
+from src.markdown_blocks import (
+    BlockType,
+    block_to_block_type,
+    extract_title,
+    iter_blocks,
+    markdown_to_blocks,
+    markdown_to_html_node,
+)
+from src.template import load_template
+from src.utils import text_to_textnodes
+
+
+def git_commit():
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.stdout.strip()
+
+
+def inline_texts(markdown):
+    """
+    Returns the inline text runs of a document, as the block renderers
+    pass them to text_to_textnodes.
+    """
+    texts = []
+    for block_type, lines in iter_blocks(markdown.split("\n")):
+        if block_type == BlockType.PARAGRAPH:
+            texts.append(" ".join(lines))
+        elif block_type == BlockType.HEADING:
+            texts.append(lines[0].lstrip("#").strip())
+        elif block_type in (BlockType.ULIST, BlockType.OLIST):
+            texts.extend(line.partition(" ")[2] for line in lines)
+        elif block_type == BlockType.QUOTE:
+            texts.append(" ".join(line.lstrip(">").strip() for line in lines))
+    return texts
+
+
+class Timer:
+    def __init__(self):
+        self.stages = {}
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        yield
+        self.stages[name] = time.perf_counter() - start
+
+
+def time_stages(content_dir, static_dir, template_path, dest_dir):
+    timer = Timer()
+    pages = collect_pages(content_dir, dest_dir)
+
+    with timer.stage("read"):
+        markdowns = []
+        for from_path, _ in pages:
+            with open(from_path) as f:
+                markdowns.append(f.read())
+
+    with timer.stage("markdown_to_blocks"):
+        documents = [markdown_to_blocks(markdown) for markdown in markdowns]
+
+    blocks = [block for document in documents for block in document]
+    with timer.stage("block_to_block_type"):
+        for block in blocks:
+            block_to_block_type(block)
+
+    texts = [text for markdown in markdowns for text in inline_texts(markdown)]
+    with timer.stage("text_to_textnodes"):
+        for text in texts:
+            text_to_textnodes(text)
+
+    with timer.stage("markdown_to_html_node"):
+        nodes = [markdown_to_html_node(markdown) for markdown in markdowns]
+
+    with timer.stage("to_html"):
+        bodies = [node.to_html() for node in nodes]
+
+    template = load_template(template_path)
+    with timer.stage("template"):
+        html_pages = [
+            template.render({"Title": extract_title(markdown), "Content": body})
+            for markdown, body in zip(markdowns, bodies)
+        ]
+
+    with timer.stage("write"):
+        for (_, dest_path), html in zip(pages, html_pages):
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            with open(dest_path, "w") as f:
+                f.write(html)
+
+    config = BuildConfig(
+        content_dir=content_dir,
+        static_dir=static_dir,
+        dest_dir=os.path.join(os.path.dirname(dest_dir), "site"),
+        template_path=template_path,
+    )
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        with timer.stage("build_cold"):
+            build(config)
+        with timer.stage("build_noop"):
+            build(config)
+
+    counts = {"pages": len(pages), "blocks": len(blocks), "inline_texts": len(texts)}
+    return timer.stages, counts
+
+
+STARTUP_COMMANDS = {
+    "startup_python": ["-c", "pass"],
+    "startup_import": ["-c", "from src import BuildConfig, build_site"],
+    "startup_cli": ["-m", "src.main", "--help"],
+}
+
+
+def time_startup(repeat=10):
+    """
+    Times a fresh interpreter running each of STARTUP_COMMANDS, keeping the
+    best of repeat runs, so that the cost of importing the generator can be
+    read against that of starting Python at all.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    stages = {}
+    for name, args in STARTUP_COMMANDS.items():
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run(
+                [sys.executable, *args], cwd=root, stdout=subprocess.DEVNULL, check=True
+            )
+            timings.append(time.perf_counter() - start)
+        stages[name] = min(timings)
+    return stages
+
+
+def compare(results, baseline):
+    print(f"{'stage':>22} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for name, stage in results["stages"].items():
+        old = baseline.get("stages", {}).get(name)
+        if old is None:
+            continue
+        ratio = stage["seconds"] / old["seconds"] if old["seconds"] else float("inf")
+        print(
+            f"{name:>22} {old['seconds'] * 1000:>8.1f}ms "
+            f"{stage['seconds'] * 1000:>8.1f}ms {ratio:>6.2f}x"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    shape = CorpusShape()
+    parser.add_argument("--pages", type=int, default=shape.pages)
+    parser.add_argument("--depth", type=int, default=shape.depth)
+    parser.add_argument("--blocks-per-page", type=int, default=shape.blocks_per_page)
+    parser.add_argument(
+        "--links-per-paragraph", type=int, default=shape.links_per_paragraph
+    )
+    parser.add_argument("--code-lines", type=int, default=shape.code_lines)
+    parser.add_argument(
+        "--block-mix",
+        help="comma separated type=weight pairs, e.g. paragraph=6,code=1",
+    )
+    parser.add_argument("--seed", type=int, default=shape.seed)
+    parser.add_argument("--output", help="write the JSON results to this file")
+    parser.add_argument("--compare", help="JSON results of a previous run")
+    args = parser.parse_args(argv)
+
+    shape.pages = args.pages
+    shape.depth = args.depth
+    shape.blocks_per_page = args.blocks_per_page
+    shape.links_per_paragraph = args.links_per_paragraph
+    shape.code_lines = args.code_lines
+    shape.seed = args.seed
+    if args.block_mix:
+        shape.block_mix = {
+            kind: int(weight)
+            for kind, _, weight in (
+                item.partition("=") for item in args.block_mix.split(",")
+            )
+        }
+
+    with tempfile.TemporaryDirectory() as root:
+        content_dir, static_dir, template_path = generate_corpus(root, shape)
+        stages, counts = time_stages(
+            content_dir, static_dir, template_path, os.path.join(root, "docs")
+        )
+    stages.update(time_startup())
+
+    results = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "shape": shape.to_dict(),
+        "counts": counts,
+        "stages": {
+            name: {
+                "seconds": seconds,
+                "us_per_page": seconds / counts["pages"] * 1e6,
+            }
+            for name, seconds in stages.items()
+        },
+    }
+
+    for name, stage in results["stages"].items():
+        print(
+            f"{name:>22} {stage['seconds'] * 1000:>9.1f}ms "
+            f"{stage['us_per_page']:>9.1f}us/page"
+        )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+    return results
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
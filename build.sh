@@ -1 +1 @@
-python3 -m src.main "/py-static-web-generator/"
+python3 -m src.main "/py-static-web-generator/" --site-url "https://dancikmad.github.io"
@@ -0,0 +1,20 @@
+"""
+A static site generator turning a directory of markdown pages into HTML.
+
+    from src import BuildConfig, build_site
+
+    result = build_site(BuildConfig(content_dir="./content", dest_dir="./docs"))
+
+The names below are imported from src.build on first use, so that
+importing the package costs nothing until a build is configured.
+"""
+
+__all__ = ["BuildConfig", "BuildResult", "build_site"]
+
+
+def __getattr__(name):
+    if name in __all__:
+        from src import build
+
+        return getattr(build, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
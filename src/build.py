@@ -0,0 +1,803 @@
+import contextlib
+import os
+import time
+from dataclasses import dataclass, field, replace
+from typing import TYPE_CHECKING, Callable, Optional
+from pathlib import Path
+
+from src.manifest import (
+    MANIFEST_NAME,
+    GENERATOR_VERSION,
+    PAGE_METADATA,
+    BuildManifest,
+    hash_file,
+)
+from src.profiler import NULL_PROFILER, Profiler
+from src.static_sync import (
+    SyncResult,
+    copy_file,
+    is_up_to_date,
+    prune_empty_dirs,
+    sync_static,
+)
+from src.template import load_template
+from src.writer import OutputWriter
+
+if TYPE_CHECKING:
+    from src.compress import CompressResult
+
+# The modules of optional features (compression, fingerprinting, indexes,
+# search, caches, shards) are imported where they are used, so importing
+# BuildConfig stays cheap. The defaults below mirror their DEFAULT_*
+# constants.
+
+
+@dataclass
+class BuildConfig:
+    content_dir: str = "./content"
+    static_dir: str = "./static"
+    dest_dir: str = "./docs"
+    template_path: str = "./template.html"
+    basepath: str = "/"
+    force: bool = False
+    jobs: int = 1
+    variables: dict = field(default_factory=dict)
+    # Hardlink the static files into dest_dir instead of copying them,
+    # except with fingerprint, see fingerprint_static.
+    link_static: bool = False
+    hash_static: bool = False
+    profiler: Optional[Profiler] = None
+    cache_dir: Optional[str] = None
+    cache_size: int = 256 * 1024 * 1024
+    # Characters of rendered blocks every worker remembers, 0 to disable.
+    block_memo_size: int = 16 * 1024 * 1024
+    write_threads: int = 4
+    stream_threshold: int = 8 * 1024 * 1024
+    gzip: bool = False
+    gzip_level: int = 9
+    gzip_min_size: int = 256
+    site_url: Optional[str] = None
+    fingerprint: bool = False
+    # Paths relative to content_dir, files or directories, to which the
+    # scan for changed pages is restricted, see build_pages, None to scan
+    # every page.
+    only: Optional[tuple] = None
+    # Paths relative to static_dir to which the static sync of build is
+    # restricted, None to sync every static file.
+    only_static: Optional[tuple] = None
+    search: bool = False
+    # Called with a line of progress for every page rendered or removed,
+    # e.g. print. Builds are silent without it.
+    log: Optional[Callable[[str], None]] = None
+    # (I, N) to only render the pages of the I-th of N shards, counting from
+    # 1, partitioned by shard_by, see partition. merge_shards combines the
+    # outputs of the shards.
+    shard: Optional[tuple] = None
+    shard_by: str = "hash"
+    # Keep the manifest in memory for the next build of this process rather
+    # than writing it, until flush_manifests is called, see
+    # BuildManifest.save.
+    defer_save: bool = False
+
+
+def _compress_result():
+    from src.compress import CompressResult
+
+    return CompressResult()
+
+
+@dataclass
+class BuildResult:
+    rendered: list = field(default_factory=list)
+    skipped: int = 0
+    removed: list = field(default_factory=list)
+    errors: list = field(default_factory=list)
+    static: SyncResult = field(default_factory=SyncResult)
+    cache_hits: int = 0
+    compressed: "CompressResult" = field(default_factory=_compress_result)
+    indexes: list = field(default_factory=list)
+    search_shards: int = 0
+    # Blocks whose rendering was reused from, or added to, the block memo.
+    block_hits: int = 0
+    block_misses: int = 0
+    # Seconds spent in every stage of the build.
+    timings: dict = field(default_factory=dict)
+
+
+def collect_pages(dir_path_content, dest_dir_path):
+    """
+    Walks the content directory and returns a sorted list of
+    (from_path, dest_path) pairs, one for every page to generate.
+    """
+    pages = []
+    for filename in sorted(os.listdir(dir_path_content)):
+        from_path = os.path.join(dir_path_content, filename)
+        dest_path = os.path.join(dest_dir_path, filename)
+        if os.path.isfile(from_path):
+            pages.append((from_path, str(Path(dest_path).with_suffix(".html"))))
+        else:
+            pages.extend(collect_pages(from_path, dest_path))
+    return pages
+
+
+def build(config: BuildConfig) -> BuildResult:
+    """
+    Syncs the static files into the output directory, renders the pages
+    that changed since the last build and, with config.gzip, precompresses
+    the changed outputs.
+
+    With config.fingerprint the static files are copied under fingerprinted
+    names instead, and the pages and template referencing them point to the
+    fingerprinted URLs.
+
+    With config.only_static, only the given static files are synced, or
+    removed if they no longer exist. Fingerprinting always looks at every
+    static file, as files with the same content share their copy.
+    """
+    result = BuildResult()
+    manifest = BuildManifest.load(os.path.join(config.dest_dir, MANIFEST_NAME))
+    previous_assets = manifest.asset_map
+    # A shard only needs the static files for the fingerprinted URLs, the
+    # merge copies them into the final output.
+    if config.shard is None or config.fingerprint:
+        _sync_static(config, manifest, result)
+    _build_pages(config, manifest, result, previous_assets)
+    if config.shard is None:
+        _compress(config, manifest, result)
+    with _stage(config, result, "save"):
+        manifest.save(defer=config.defer_save)
+    return result
+
+
+def _sync_static(config, manifest, result):
+    with _stage(config, result, "static"):
+        if config.fingerprint:
+            from src.fingerprint import fingerprint_static
+
+            (
+                result.static,
+                manifest.assets,
+                manifest.asset_map,
+                manifest.asset_hashes,
+            ) = fingerprint_static(
+                config.static_dir,
+                config.dest_dir,
+                manifest.assets,
+                manifest.asset_hashes,
+            )
+        else:
+            result.static, manifest.assets = sync_static(
+                config.static_dir,
+                config.dest_dir,
+                manifest.assets,
+                link=config.link_static,
+                use_hash=config.hash_static,
+                only=config.only_static,
+            )
+            manifest.asset_map = {}
+            manifest.asset_hashes = {}
+
+
+def _compress(config, manifest, result, only=None):
+    from src.compress import compress_outputs, remove_compressed
+
+    if config.gzip:
+        with _stage(config, result, "compress"):
+            result.compressed, manifest.compressed = compress_outputs(
+                config.dest_dir,
+                manifest.compressed,
+                level=config.gzip_level,
+                min_size=config.gzip_min_size,
+                jobs=config.jobs or os.cpu_count() or 1,
+                exclude=manifest.assets,
+                only=only,
+            )
+    elif manifest.compressed:
+        result.compressed.removed = remove_compressed(
+            config.dest_dir, manifest.compressed
+        )
+        manifest.compressed = {}
+
+
+def build_pages(config: BuildConfig) -> BuildResult:
+    """
+    Renders the pages whose inputs changed since the last build, as recorded
+    in the build manifest, and deletes the outputs of removed sources.
+
+    A change of template, basepath or generator version re-renders every page.
+
+    With config.only, only the pages under the given paths are looked at,
+    none if it is empty, which spares walking the whole content directory
+    when the caller knows what changed, unless a change requires every page
+    to be rendered again.
+
+    The .gz siblings of the outputs written or removed are brought up to
+    date as build does.
+    """
+    result = BuildResult()
+    manifest = BuildManifest.load(os.path.join(config.dest_dir, MANIFEST_NAME))
+    indexes = manifest.indexes
+    _build_pages(config, manifest, result, manifest.asset_map)
+    if config.shard is None:
+        from src.search import SEARCH_DIR
+
+        changed = result.rendered + result.removed + result.indexes
+        only = [os.path.relpath(path, config.dest_dir) for path in changed]
+        only += sorted(set(indexes).difference(manifest.indexes))
+        only.append(SEARCH_DIR)
+        _compress(config, manifest, result, only)
+    with _stage(config, result, "save"):
+        manifest.save(defer=config.defer_save)
+    return result
+
+
+def build_site(config: BuildConfig) -> BuildResult:
+    """
+    Builds the site described by config and returns what was done: the
+    pages rendered, skipped and removed, the static files copied, the
+    errors, which do not stop the build, and the seconds spent in every
+    stage, with the whole build under "total".
+
+    This is build, for use as a library: nothing is printed unless
+    config.log is set, and importing it loads no more than a build needs.
+    """
+    start = time.perf_counter()
+    result = build(config)
+    result.timings["total"] = time.perf_counter() - start
+    return result
+
+
+def merge_shards(config: BuildConfig, shard_dirs) -> BuildResult:
+    """
+    Combines the outputs of the shard builds in shard_dirs, built with
+    config.shard set to every (I, N) of the same N, into config.dest_dir,
+    then generates what spans every page: the static files, the section
+    pages, sitemap and feed, the search index and the .gz files.
+
+    Page outputs are only copied when they differ from those already in
+    config.dest_dir, and the outputs of pages no shard has are removed.
+
+    Raises ValueError, before touching config.dest_dir, if a shard is
+    missing or given twice, if the shards were built with different
+    settings, or if a page of the content directory is missing from the
+    shards or in more than one, and after syncing the static files if the
+    shards were fingerprinted with other static files.
+    """
+    shards = _load_shards(config, shard_dirs)
+    result = BuildResult()
+    manifest = BuildManifest.load(os.path.join(config.dest_dir, MANIFEST_NAME))
+    _sync_static(config, manifest, result)
+    if manifest.asset_map != shards[0][1].asset_map:
+        manifest.save()
+        raise ValueError("static files changed since the shards were built")
+    template_hash = hash_file(config.template_path)
+    full_rebuild = not manifest.is_compatible(
+        template_hash, config.basepath, config.variables
+    )
+
+    start = time.perf_counter()
+    pages = {}
+    changed = {}
+    for dir_path, shard in shards:
+        for rel_path in shard.shard["pages"]:
+            entry = shard.pages[rel_path]
+            from_path = os.path.join(dir_path, entry["dest"])
+            dest_path = os.path.join(config.dest_dir, entry["dest"])
+            pages[rel_path] = entry
+            previous = manifest.pages.get(rel_path, {})
+            if (
+                not full_rebuild
+                and _without_search(previous) == _without_search(entry)
+                and is_up_to_date(from_path, dest_path)
+            ):
+                result.skipped += 1
+                continue
+            if config.log is not None:
+                config.log(f" * {from_path} -> {dest_path}")
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            copy_file(from_path, dest_path)
+            result.rendered.append(dest_path)
+            changed[entry["dest"]] = previous.get("mtime_ns")
+    for rel_path in sorted(set(manifest.pages) - set(pages)):
+        entry = manifest.pages[rel_path]
+        dest_path = os.path.join(config.dest_dir, entry["dest"])
+        if config.log is not None:
+            config.log(f" - {dest_path}")
+        remove_output(dest_path, config.dest_dir)
+        result.removed.append(dest_path)
+        changed[entry["dest"]] = entry["mtime_ns"]
+    manifest.pages = pages
+    result.timings["pages"] = time.perf_counter() - start
+
+    from src.indexes import update_indexes
+    from src.search import merge_search_indexes, remove_search_index
+
+    with _stage(config, result, "indexes"):
+        template = load_template(
+            config.template_path, config.basepath, manifest.asset_map
+        )
+        result.indexes = update_indexes(
+            config, manifest, template, changed, full_rebuild
+        )
+    if config.search:
+        with _stage(config, result, "search"):
+            result.search_shards = merge_search_indexes(config, manifest, shards)
+    elif manifest.search is not None:
+        remove_search_index(config, manifest)
+    manifest.version = GENERATOR_VERSION
+    manifest.template_hash = template_hash
+    manifest.basepath = config.basepath
+    manifest.variables = config.variables
+    manifest.shard = None
+    _compress(config, manifest, result)
+    with _stage(config, result, "save"):
+        manifest.save()
+    return result
+
+
+def _load_shards(config, shard_dirs):
+    """
+    Returns the (dir_path, manifest) pairs of the shard builds in
+    shard_dirs, by shard index, after checking that they can be merged.
+    """
+    shards = []
+    for dir_path in shard_dirs:
+        manifest = BuildManifest.load(os.path.join(dir_path, MANIFEST_NAME))
+        if manifest.shard is None:
+            raise ValueError(f"{dir_path} holds no shard build")
+        shards.append((dir_path, manifest))
+    if not shards:
+        raise ValueError("no shards to merge")
+    shards.sort(key=lambda shard: shard[1].shard["index"])
+
+    counts = {manifest.shard["count"] for _, manifest in shards}
+    strategies = {manifest.shard["by"] for _, manifest in shards}
+    if len(counts) > 1 or len(strategies) > 1:
+        raise ValueError("shards of different partitions cannot be merged")
+    indices = [manifest.shard["index"] for _, manifest in shards]
+    missing = sorted(set(range(1, counts.pop() + 1)) - set(indices))
+    duplicated = sorted({index for index in indices if indices.count(index) > 1})
+    if missing or duplicated:
+        raise ValueError(
+            _listing(("missing shards", missing), ("duplicated shards", duplicated))
+        )
+
+    template_hash = hash_file(config.template_path)
+    for dir_path, manifest in shards:
+        if not manifest.is_compatible(
+            template_hash, config.basepath, config.variables
+        ):
+            raise ValueError(
+                f"{dir_path} was built with another template, basepath, "
+                "variables or generator version"
+            )
+        if config.search and manifest.search is None:
+            raise ValueError(f"{dir_path} was built without a search index")
+    if any(manifest.asset_map != shards[0][1].asset_map for _, manifest in shards):
+        raise ValueError("shards were built with different static files")
+
+    sources = {
+        os.path.relpath(from_path, config.content_dir)
+        for from_path, _ in collect_pages(config.content_dir, config.dest_dir)
+    }
+    assigned = {}
+    for _, manifest in shards:
+        for rel_path in manifest.shard["pages"]:
+            if rel_path in manifest.pages:
+                assigned[rel_path] = assigned.get(rel_path, 0) + 1
+    missing = sorted(sources - set(assigned))
+    duplicated = sorted(rel_path for rel_path, count in assigned.items() if count > 1)
+    unknown = sorted(set(assigned) - sources)
+    if missing or duplicated or unknown:
+        raise ValueError(
+            _listing(
+                ("missing pages", missing),
+                ("pages in several shards", duplicated),
+                ("pages not in the content directory", unknown),
+            )
+        )
+    return shards
+
+
+def _listing(*lists):
+    return "; ".join(
+        f"{label}: {', '.join(map(str, items))}" for label, items in lists if items
+    )
+
+
+def _without_search(entry):
+    return {key: value for key, value in entry.items() if key != "search"}
+
+
+@contextlib.contextmanager
+def _stage(config, result, name):
+    """
+    Times a stage of the build into result.timings and config.profiler.
+    """
+    profiler = config.profiler or NULL_PROFILER
+    start = time.perf_counter()
+    try:
+        with profiler.stage(name):
+            yield
+    finally:
+        result.timings[name] = time.perf_counter() - start
+
+
+def _build_pages(
+    config: BuildConfig,
+    manifest: BuildManifest,
+    result: BuildResult,
+    previous_assets: dict,
+):
+    """
+    Renders the changed pages. Pages are also re-rendered when the URL an
+    asset they reference maps to in manifest.asset_map differs from
+    previous_assets, the map of the last build, and every page is when such
+    an asset is referenced by the template.
+    """
+    if config.only is not None:
+        only = tuple(content_rel_path(config.content_dir, path) for path in config.only)
+        config = replace(config, only=only)
+    template_hash = hash_file(config.template_path)
+    full_rebuild = not manifest.is_compatible(
+        template_hash, config.basepath, config.variables
+    )
+    if config.search:
+        from src.search import is_index_complete
+
+        if not is_index_complete(config, manifest):
+            full_rebuild = True
+    assets = manifest.asset_map
+    changed_urls = ()
+    if previous_assets or assets:
+        from src.fingerprint import changed_asset_urls
+
+        changed_urls = changed_asset_urls(previous_assets, assets)
+    stale = set()
+    if changed_urls:
+        from src.depgraph import DependencyGraph
+
+        with open(config.template_path) as f:
+            template_source = f.read()
+        if any(f'="{url}"' in template_source for url in changed_urls):
+            full_rebuild = True
+        graph = DependencyGraph(
+            config.content_dir, config.static_dir, config.template_path, manifest.pages
+        )
+        stale = graph.referencing(changed_urls)
+    # Forcing renders every page looked at, only those under config.only if
+    # nothing else requires rendering them all.
+    scoped = (
+        config.only is not None
+        and config.shard is None
+        and not full_rebuild
+        and all(_is_in(rel_path, config.only) for rel_path in stale)
+    )
+    full_rebuild = full_rebuild or config.force
+
+    with _stage(config, result, "scan"):
+        pending, seen = _changed_pages(
+            config, manifest, full_rebuild, result, stale, scoped
+        )
+
+    changed = {}
+    search_changes = []
+    tasks = [(from_path, dest_path) for from_path, dest_path, *_ in pending]
+    profiler = config.profiler or NULL_PROFILER
+    # Not a profiler stage, which would count the page stages twice.
+    start = time.perf_counter()
+    # Pages written from other threads while the next renders would leave
+    # the profiler unable to count the allocations of either.
+    threads = 0 if profiler.enabled else config.write_threads
+    writer = OutputWriter(threads, profiler=profiler)
+    try:
+        outcomes = render_pages(tasks, config, writer, assets)
+    finally:
+        writer.close()
+    result.timings["pages"] = time.perf_counter() - start
+    for page, (error, info) in zip(pending, outcomes):
+        from_path, dest_path, rel_path, stat_result, source_hash = page
+        if config.log is not None:
+            config.log(f" * {from_path} {config.template_path} -> {dest_path}")
+        error = error or writer.errors.get(dest_path)
+        dest_rel_path = os.path.relpath(dest_path, config.dest_dir)
+        changed[dest_rel_path] = manifest.pages.get(rel_path, {}).get("mtime_ns")
+        previous = manifest.pages.get(rel_path, {}).get("search")
+        if error is not None:
+            result.errors.append((from_path, error))
+            entry = manifest.pages.get(rel_path)
+            if entry is not None:
+                # The output of the last build stays, and stays recorded so
+                # it is removed along with its source. No hash matches, so
+                # the next build renders the page again.
+                entry["hash"] = ""
+            continue
+        metadata = {key: info[key] for key in PAGE_METADATA if key in info}
+        manifest.record_page(
+            rel_path, stat_result, source_hash, dest_rel_path, metadata
+        )
+        search_changes.append((rel_path, previous, info["terms"]))
+        result.rendered.append(dest_path)
+        if info["cached"]:
+            result.cache_hits += 1
+        result.block_hits += info.get("block_hits", 0)
+        result.block_misses += info.get("block_misses", 0)
+
+    for rel_path in sorted(set(manifest.pages) - seen):
+        entry = manifest.pages.pop(rel_path)
+        dest_path = os.path.join(config.dest_dir, entry["dest"])
+        if config.log is not None:
+            config.log(f" - {dest_path}")
+        remove_output(dest_path, config.dest_dir)
+        result.removed.append(dest_path)
+        changed[entry["dest"]] = entry["mtime_ns"]
+        search_changes.append((rel_path, entry.get("search"), None))
+
+    os.makedirs(config.dest_dir, exist_ok=True)
+    # The indexes list the pages of every shard, they are generated when
+    # the shards are merged.
+    if config.shard is None:
+        from src.indexes import update_indexes
+
+        with _stage(config, result, "indexes"):
+            template = load_template(config.template_path, config.basepath, assets)
+            result.indexes = update_indexes(
+                config, manifest, template, changed, full_rebuild
+            )
+    if config.search:
+        from src.search import update_search_index
+
+        with _stage(config, result, "search"):
+            result.search_shards = update_search_index(config, manifest, search_changes)
+    elif manifest.search is not None:
+        from src.search import remove_search_index
+
+        remove_search_index(config, manifest)
+    manifest.version = GENERATOR_VERSION
+    manifest.template_hash = template_hash
+    manifest.basepath = config.basepath
+    manifest.variables = config.variables
+
+
+def _changed_pages(config, manifest, full_rebuild, result, stale=(), scoped=False):
+    """
+    Returns the pages that must be rendered, with their source stat and
+    hash, and the set of all source paths relative to the content directory.
+    The pages in stale are rendered even if their source is unchanged. With
+    scoped, only the pages under config.only are looked at.
+    """
+    seen = set()
+    pending = []
+    if scoped:
+        pages = []
+        prefixes = []
+        for rel_path in config.only:
+            from_path = os.path.join(config.content_dir, rel_path)
+            dest_path = os.path.join(config.dest_dir, rel_path)
+            if os.path.isdir(from_path):
+                pages.extend(collect_pages(from_path, dest_path))
+            elif os.path.isfile(from_path):
+                pages.append((from_path, str(Path(dest_path).with_suffix(".html"))))
+            prefixes.append(rel_path)
+        # Pages outside of the scanned paths are kept as they are.
+        if "." not in prefixes:
+            under = tuple(prefix + os.sep for prefix in prefixes)
+            seen.update(
+                rel_path
+                for rel_path in manifest.pages
+                if not rel_path.startswith(under) and rel_path not in prefixes
+            )
+    else:
+        pages = collect_pages(config.content_dir, config.dest_dir)
+        if config.shard is not None:
+            pages = _shard_pages(config, manifest, pages)
+    for from_path, dest_path in pages:
+        rel_path = os.path.relpath(from_path, config.content_dir)
+        dest_rel_path = os.path.relpath(dest_path, config.dest_dir)
+        seen.add(rel_path)
+
+        stat_result = os.stat(from_path)
+        source_hash = manifest.source_hash(rel_path, stat_result)
+        if source_hash is None:
+            source_hash = hash_file(from_path)
+
+        entry = manifest.pages.get(rel_path)
+        if (
+            not full_rebuild
+            and rel_path not in stale
+            and entry is not None
+            and entry["hash"] == source_hash
+            and entry["dest"] == dest_rel_path
+            and os.path.exists(dest_path)
+        ):
+            manifest.record_page(rel_path, stat_result, source_hash, dest_rel_path)
+            result.skipped += 1
+            continue
+        pending.append((from_path, dest_path, rel_path, stat_result, source_hash))
+    return pending, seen
+
+
+def _is_in(rel_path, prefixes):
+    return any(
+        prefix == "." or rel_path == prefix or rel_path.startswith(prefix + os.sep)
+        for prefix in prefixes
+    )
+
+
+def content_rel_path(content_dir, path):
+    """
+    Returns path, relative to content_dir or absolute, as a normalized path
+    relative to content_dir. Raises ValueError if it does not resolve, once
+    ".." and symbolic links are followed, to a path under content_dir.
+    """
+    root = os.path.realpath(content_dir)
+    resolved = os.path.realpath(os.path.join(content_dir, path))
+    if os.path.commonpath([root, resolved]) != root:
+        raise ValueError(f"{path!r} is outside of the content directory")
+    return os.path.relpath(
+        os.path.abspath(os.path.join(content_dir, path)), os.path.abspath(content_dir)
+    )
+
+
+def render_pages(tasks, config: BuildConfig, writer: OutputWriter, assets=None):
+    """
+    Renders a list of (from_path, dest_path) pages, hands their HTML to
+    writer, and returns, in the same order, an (error, info) pair for every
+    page: the error message and None for a page that failed to render, None
+    and the dict returned by render_page_html for a page that rendered.
+    Write errors are reported by the writer once it is closed.
+
+    With config.jobs > 1 the pages are spread over a process pool whose
+    workers load the compiled template once when they start. The profiler
+    events of every page are recorded in config.profiler, in page order.
+
+    Sources of config.stream_threshold bytes or more are streamed to their
+    output block by block instead, bypassing the parse cache and the writer.
+
+    assets is the map of fingerprinted asset URLs to rewrite references with.
+    """
+    profiler = config.profiler or NULL_PROFILER
+    init_args = (replace(config, profiler=None, log=None), profiler.enabled, assets)
+    jobs = config.jobs or os.cpu_count() or 1
+    if jobs == 1 or len(tasks) < 2:
+        _init_worker(*init_args)
+        outcomes = map(_render_task, tasks)
+        return _collect_outcomes(tasks, outcomes, profiler, writer)
+
+    # Imported here, it is the costliest import of a build that needs no pool.
+    from concurrent.futures import ProcessPoolExecutor
+
+    chunksize = max(1, len(tasks) // (jobs * 4))
+    with ProcessPoolExecutor(
+        max_workers=min(jobs, len(tasks)),
+        initializer=_init_worker,
+        initargs=init_args,
+    ) as executor:
+        outcomes = executor.map(_render_task, tasks, chunksize=chunksize)
+        return _collect_outcomes(tasks, outcomes, profiler, writer)
+
+
+def _collect_outcomes(tasks, outcomes, profiler, writer):
+    results = []
+    for (from_path, dest_path), (error, info, page, events) in zip(tasks, outcomes):
+        profiler.extend(events)
+        if page is not None:
+            writer.submit(dest_path, page, from_path)
+        results.append((error, info))
+    return results
+
+
+_worker_config = None
+_worker_template = None
+_worker_profile = False
+_worker_cache = None
+_worker_assets = None
+_worker_memo = None
+
+
+def _init_worker(config: BuildConfig, profile, assets=None):
+    global _worker_config, _worker_template, _worker_profile, _worker_cache
+    global _worker_assets, _worker_memo
+    _worker_config = config
+    _worker_template = load_template(config.template_path, config.basepath, assets)
+    _worker_profile = profile
+    _worker_assets = assets
+    if config.block_memo_size <= 0:
+        _worker_memo = None
+    elif _worker_memo is None or (
+        _worker_memo.max_size,
+        _worker_memo.basepath,
+        _worker_memo.assets,
+    ) != (config.block_memo_size, config.basepath, assets):
+        from src.memo import BlockMemo
+
+        _worker_memo = BlockMemo(config.block_memo_size, config.basepath, assets)
+    if config.cache_dir is None:
+        _worker_cache = None
+        return
+    from src.cache import ParseCache
+
+    # A long-running process keeps the cache, and the entries it holds in
+    # memory, from one build to the next.
+    if _worker_cache is None or (
+        _worker_cache.cache_dir,
+        _worker_cache.max_bytes,
+    ) != (config.cache_dir, config.cache_size):
+        _worker_cache = ParseCache(config.cache_dir, config.cache_size)
+
+
+def _render_task(task):
+    from src.script import render_page_html, stream_page
+
+    from_path, dest_path = task
+    profiler = Profiler() if _worker_profile else NULL_PROFILER
+    config = _worker_config
+    memo = _worker_memo
+    hits, misses = (memo.hits, memo.misses) if memo is not None else (None, None)
+    error = info = page = None
+    try:
+        if os.path.getsize(from_path) >= config.stream_threshold:
+            info = stream_page(
+                from_path,
+                _worker_template,
+                dest_path,
+                config.basepath,
+                config.variables,
+                profiler,
+                config.search,
+                _worker_assets,
+                memo,
+            )
+        else:
+            page, info = render_page_html(
+                from_path,
+                _worker_template,
+                config.basepath,
+                config.variables,
+                profiler,
+                _worker_cache,
+                config.search,
+                _worker_assets,
+                memo,
+            )
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    if info is not None and memo is not None:
+        info["block_hits"] = memo.hits - hits
+        info["block_misses"] = memo.misses - misses
+    return error, info, page, profiler.events
+
+
+def _shard_pages(config, manifest, pages):
+    """
+    Returns the pages of config.shard, and records the shard and its pages
+    in manifest.
+    """
+    from src.shard import partition
+
+    index, count = config.shard
+    sizes = []
+    for from_path, _ in pages:
+        rel_path = os.path.relpath(from_path, config.content_dir)
+        size = os.path.getsize(from_path) if config.shard_by == "size" else 0
+        sizes.append((rel_path, size))
+    shards = partition(sizes, count, config.shard_by)
+    pages = [
+        page for page, (rel_path, _) in zip(pages, sizes) if shards[rel_path] == index
+    ]
+    manifest.shard = {
+        "index": index,
+        "count": count,
+        "by": config.shard_by,
+        "pages": sorted(rel_path for rel_path, _ in sizes if shards[rel_path] == index),
+    }
+    return pages
+
+
+def remove_output(dest_path, dest_dir_path):
+    """
+    Deletes a generated file and any directories left empty by its removal.
+    """
+    if os.path.exists(dest_path):
+        os.remove(dest_path)
+    prune_empty_dirs(os.path.dirname(dest_path), dest_dir_path)
@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+from src.manifest import GENERATOR_VERSION
+
+
+DEFAULT_CACHE_DIR = "./.cache/parse"
+DEFAULT_CACHE_SIZE = 256 * 1024 * 1024
+DEFAULT_MEMORY_ENTRIES = 1024
+
+
+class ParseCache:
+    """
+    On-disk cache of rendered page bodies, keyed by the hash of the markdown
+    source, the basepath and the generator version. The asset map is not
+    part of the key: an entry records the fingerprinted URLs it was
+    rendered with, see render_page_html, so that a changed asset only
+    invalidates the pages referencing it.
+
+    Entries are small JSON files spread over 256 subdirectories. A hit
+    refreshes the entry's mtime, and when the cache grows past max_bytes the
+    least recently used entries are evicted. Entries are written through a
+    temporary file, so several worker processes can share one cache.
+
+    The memory_entries most recently used entries are also kept in memory,
+    which spares a long-running process, such as the watcher or the build
+    daemon, reading them back from disk.
+    """
+
+    def __init__(
+        self,
+        cache_dir=DEFAULT_CACHE_DIR,
+        max_bytes=DEFAULT_CACHE_SIZE,
+        memory_entries=DEFAULT_MEMORY_ENTRIES,
+    ):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        self._size = None
+
+    def key(self, markdown: str, basepath: str) -> str:
+        digest = hashlib.sha256()
+        digest.update(f"{GENERATOR_VERSION}\0{basepath}\0".encode())
+        digest.update(markdown.encode())
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key[2:])
+
+    def get(self, key):
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            return entry
+        path = self._path(key)
+        try:
+            with open(path, "r") as f:
+                entry = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        self._remember(key, entry)
+        return entry
+
+    def _remember(self, key, entry):
+        if self.memory_entries <= 0:
+            return
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def put(self, key, entry):
+        self._remember(key, entry)
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entry, f)
+        size = os.path.getsize(tmp_path)
+        try:
+            # The entry replaced, if the key was already cached.
+            size -= os.path.getsize(path)
+        except FileNotFoundError:
+            pass
+        os.replace(tmp_path, path)
+
+        if self._size is None:
+            self._size = self.disk_usage()
+        else:
+            self._size += size
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def _entries(self):
+        entries = []
+        if not os.path.isdir(self.cache_dir):
+            return entries
+        for shard in os.scandir(self.cache_dir):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(".tmp"):
+                    continue
+                try:
+                    stat_result = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append(
+                    (stat_result.st_mtime_ns, stat_result.st_size, entry.path)
+                )
+        return entries
+
+    def disk_usage(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        """
+        Removes the least recently used entries until the cache is below
+        90% of max_bytes.
+        """
+        entries = sorted(self._entries())
+        size = sum(entry_size for _, entry_size, _ in entries)
+        target = self.max_bytes * 0.9
+        for _, entry_size, path in entries:
+            if size <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            shard_path, name = os.path.split(path)
+            self._memory.pop(os.path.basename(shard_path) + name, None)
+            size -= entry_size
+        self._size = size
@@ -0,0 +1,190 @@
+import hashlib
+import os
+from dataclasses import dataclass
+
+from src.manifest import MANIFEST_NAME, hash_file
+from src.static_sync import list_files, prune_empty_dirs
+from src.writer import atomic_open
+
+
+COMPRESSIBLE_EXTENSIONS = {
+    ".css",
+    ".htm",
+    ".html",
+    ".ico",
+    ".js",
+    ".json",
+    ".map",
+    ".mjs",
+    ".svg",
+    ".txt",
+    ".xml",
+}
+DEFAULT_GZIP_LEVEL = 9
+DEFAULT_GZIP_MIN_SIZE = 256
+CHUNK_SIZE = 1 << 16
+
+
+@dataclass
+class CompressResult:
+    compressed: int = 0
+    skipped: int = 0
+    removed: int = 0
+
+
+def compress_outputs(
+    dest_dir_path,
+    previous=None,
+    level=DEFAULT_GZIP_LEVEL,
+    min_size=DEFAULT_GZIP_MIN_SIZE,
+    jobs=1,
+    exclude=(),
+    only=None,
+):
+    """
+    Writes a .gz sibling next to every compressible file of at least
+    min_size bytes in dest_dir_path, for servers that serve precompressed
+    files such as nginx with gzip_static.
+
+    previous maps the relative paths compressed by the last run to the hash,
+    size, mtime and level they were compressed with: files whose size and
+    mtime are unchanged are skipped without being read, and files that were
+    rewritten with the same content are read but not compressed again. The
+    .gz siblings of files that no longer qualify are removed. Files whose
+    .gz sibling is listed in exclude, such as static files shipped with
+    their own .gz, are left alone.
+
+    With only, a list of paths relative to dest_dir_path, only the files
+    at or under those paths are looked at, and the entries of previous
+    outside them are kept as they are.
+
+    Compression runs on a pool of jobs threads, zlib releasing the GIL while
+    it compresses. Returns the CompressResult and the entries to be passed
+    back as previous on the next run.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    previous = previous or {}
+    exclude = set(exclude)
+    result = CompressResult()
+    if only is None:
+        rel_paths = list_files(dest_dir_path)
+        entries = {}
+    else:
+        only = [os.path.normpath(rel_path) for rel_path in only]
+        rel_paths = set()
+        for rel_path in only:
+            path = os.path.join(dest_dir_path, rel_path)
+            if os.path.isdir(path):
+                rel_paths.update(
+                    os.path.join(rel_path, name) for name in list_files(path)
+                )
+            elif os.path.isfile(path):
+                rel_paths.add(rel_path)
+        rel_paths = sorted(rel_paths)
+        entries = {
+            rel_path: entry
+            for rel_path, entry in previous.items()
+            if not _is_in(rel_path, only)
+        }
+    tasks = []
+    for rel_path in rel_paths:
+        if not is_compressible(rel_path) or rel_path + ".gz" in exclude:
+            continue
+        path = os.path.join(dest_dir_path, rel_path)
+        stat_result = os.stat(path)
+        if stat_result.st_size < min_size:
+            continue
+        entry = previous.get(rel_path)
+        if entry is not None and (
+            entry["level"] != level or not os.path.exists(path + ".gz")
+        ):
+            entry = None
+        if (
+            entry is not None
+            and entry["size"] == stat_result.st_size
+            and entry["mtime_ns"] == stat_result.st_mtime_ns
+        ):
+            entries[rel_path] = entry
+            result.skipped += 1
+            continue
+        tasks.append((rel_path, path, stat_result, entry and entry["hash"]))
+
+    def run(task):
+        _, path, _, previous_hash = task
+        return compress_file(path, level, previous_hash)
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        for (rel_path, _, stat_result, _), (content_hash, compressed) in zip(
+            tasks, executor.map(run, tasks)
+        ):
+            entries[rel_path] = {
+                "hash": content_hash,
+                "size": stat_result.st_size,
+                "mtime_ns": stat_result.st_mtime_ns,
+                "level": level,
+            }
+            if compressed:
+                result.compressed += 1
+            else:
+                result.skipped += 1
+
+    result.removed = remove_compressed(dest_dir_path, set(previous) - set(entries))
+    return result, entries
+
+
+def _is_in(rel_path, prefixes):
+    return any(
+        prefix == "." or rel_path == prefix or rel_path.startswith(prefix + os.sep)
+        for prefix in prefixes
+    )
+
+
+def is_compressible(rel_path):
+    if os.path.basename(rel_path) == MANIFEST_NAME:
+        return False
+    return os.path.splitext(rel_path)[1].lower() in COMPRESSIBLE_EXTENSIONS
+
+
+def compress_file(path, level, previous_hash=None):
+    """
+    Writes path.gz unless the content of path hashes to previous_hash.
+    Returns the content hash and whether the file was compressed.
+
+    The file is read, hashed and compressed CHUNK_SIZE bytes at a time, so
+    large outputs are never held in memory. A file that may be unchanged,
+    with a previous_hash, is hashed before being compressed.
+    """
+    content_hash = None
+    if previous_hash is not None:
+        content_hash = hash_file(path)
+        if content_hash == previous_hash:
+            return content_hash, False
+    import gzip
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as from_file, atomic_open(path + ".gz", mode="wb") as to_file:
+        # A fixed mtime in the header keeps the output reproducible.
+        with gzip.GzipFile(
+            filename="", mode="wb", compresslevel=level, fileobj=to_file, mtime=0
+        ) as gzip_file:
+            for chunk in iter(lambda: from_file.read(CHUNK_SIZE), b""):
+                if content_hash is None:
+                    digest.update(chunk)
+                gzip_file.write(chunk)
+    return content_hash or digest.hexdigest(), True
+
+
+def remove_compressed(dest_dir_path, rel_paths):
+    """
+    Deletes the .gz siblings of rel_paths, and any directories left empty by
+    their removal, and returns how many existed.
+    """
+    removed = 0
+    for rel_path in sorted(rel_paths):
+        gz_path = os.path.join(dest_dir_path, rel_path + ".gz")
+        if os.path.exists(gz_path):
+            os.remove(gz_path)
+            prune_empty_dirs(os.path.dirname(gz_path), dest_dir_path)
+            removed += 1
+    return removed
@@ -0,0 +1,213 @@
+import argparse
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+from dataclasses import replace
+
+from src.build import BuildConfig, build, build_pages, content_rel_path
+from src.manifest import flush_manifests
+from src.profiler import Profiler
+
+
+DEFAULT_SOCKET_PATH = "./.cache/build.sock"
+# Seconds without a request after which the manifest of the page and
+# subtree builds is written.
+FLUSH_DELAY = 1.0
+
+
+class BuildDaemon:
+    """
+    Runs builds in a long-lived process, so that every build after the first
+    one finds the interpreter started, the modules imported, the template
+    compiled, the recently parsed pages in the parse cache's memory and the
+    build manifest loaded.
+
+    Requests are dicts, answered with dicts, see handle. Builds run one at a
+    time.
+
+    Page and subtree builds answer without writing the build manifest, which
+    takes longer than rendering a page on a large site: the manifest stays
+    in memory for the next build, and is written once no request came for
+    FLUSH_DELAY seconds, by the next site build, or by close.
+    """
+
+    def __init__(self, config: BuildConfig):
+        self.config = config
+        self.lock = threading.Lock()
+        self.flush_timer = None
+
+    def handle(self, request):
+        """
+        Serves one request:
+
+            {"build": "site"}                         syncs static files and
+                                                      renders changed pages
+            {"build": "page", "path": "blog/a.md"}    renders one page
+            {"build": "subtree", "path": "blog"}      renders pages under a
+                                                      content subdirectory
+            {"ping": true}
+
+        Build requests may set "force" to render pages even if unchanged,
+        and "profile" to get the time spent in every stage. The response
+        holds "ok", and for builds the "elapsed_ms", the "rendered" and
+        "removed" outputs, the number of "skipped" pages, the "errors" as
+        [source, message] pairs, the "block_hits" and "block_misses" of the
+        block memo and, with "profile", the "stages" timings.
+        """
+        if request.get("ping"):
+            return {"ok": True, "pid": os.getpid()}
+        kind = request.get("build")
+        if kind not in ("site", "page", "subtree"):
+            return {"ok": False, "error": f"invalid request: {request!r}"}
+
+        config = replace(self.config, force=bool(request.get("force")))
+        if request.get("profile"):
+            config.profiler = Profiler()
+        if kind != "site":
+            path = request.get("path")
+            if not path:
+                return {"ok": False, "error": f"missing path for {kind} build"}
+            try:
+                config.only = (content_rel_path(config.content_dir, path),)
+            except ValueError as e:
+                return {"ok": False, "error": str(e)}
+            config.defer_save = True
+
+        with self.lock:
+            start = time.perf_counter()
+            try:
+                result = build(config) if kind == "site" else build_pages(config)
+            except Exception as e:
+                return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+            elapsed = time.perf_counter() - start
+            if config.defer_save:
+                self._schedule_flush()
+
+        response = {
+            "ok": not result.errors,
+            "elapsed_ms": round(elapsed * 1000, 3),
+            "rendered": result.rendered,
+            "removed": result.removed,
+            "skipped": result.skipped,
+            "errors": result.errors,
+            "block_hits": result.block_hits,
+            "block_misses": result.block_misses,
+        }
+        if config.profiler is not None:
+            response["stages"] = {
+                name: round(duration * 1000, 3)
+                for name, (duration, _, _) in config.profiler.stage_totals().items()
+            }
+        return response
+
+    def _schedule_flush(self):
+        if self.flush_timer is not None:
+            self.flush_timer.cancel()
+        self.flush_timer = threading.Timer(FLUSH_DELAY, self.flush)
+        self.flush_timer.daemon = True
+        self.flush_timer.start()
+
+    def flush(self):
+        """
+        Writes the build manifest if a page or subtree build deferred it.
+        """
+        with self.lock:
+            flush_manifests()
+
+    def close(self):
+        if self.flush_timer is not None:
+            self.flush_timer.cancel()
+        self.flush()
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                response = {"ok": False, "error": f"invalid JSON: {e}"}
+            else:
+                if request.get("shutdown"):
+                    self._reply({"ok": True})
+                    threading.Thread(target=self.server.shutdown).start()
+                    return
+                response = self.server.daemon.handle(request)
+            self._reply(response)
+
+    def _reply(self, response):
+        self.wfile.write(json.dumps(response).encode() + b"\n")
+        self.wfile.flush()
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(config: BuildConfig, socket_path=DEFAULT_SOCKET_PATH):
+    """
+    Serves build requests on a Unix domain socket until a {"shutdown": true}
+    request or an interrupt. Requests and responses are JSON objects, one
+    per line, and a connection can send any number of requests.
+    """
+    os.makedirs(os.path.dirname(socket_path) or ".", exist_ok=True)
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    daemon = BuildDaemon(config)
+    # Warm up: import everything, compile the template and load the manifest.
+    print(json.dumps(daemon.handle({"build": "site"})))
+    with _Server(socket_path, _RequestHandler) as server:
+        server.daemon = daemon
+        print(f"Listening on {socket_path}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            daemon.close()
+            os.remove(socket_path)
+
+
+def request(message, socket_path=DEFAULT_SOCKET_PATH):
+    """
+    Sends one request to the daemon listening on socket_path and returns
+    its response.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path)
+        client.sendall(json.dumps(message).encode() + b"\n")
+        with client.makefile("rb") as f:
+            return json.loads(f.readline())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Send a request to the build daemon started with "
+        "python3 -m src.main --daemon, and print its JSON response."
+    )
+    parser.add_argument("--socket", default=DEFAULT_SOCKET_PATH)
+    parser.add_argument("--force", action="store_true")
+    parser.add_argument("--profile", action="store_true")
+    parser.add_argument(
+        "command", choices=["site", "page", "subtree", "ping", "shutdown"]
+    )
+    parser.add_argument("path", nargs="?", help="content path for page and subtree")
+    args = parser.parse_args(argv)
+
+    if args.command in ("ping", "shutdown"):
+        message = {args.command: True}
+    else:
+        message = {"build": args.command, "force": args.force, "profile": args.profile}
+        if args.path is not None:
+            message["path"] = args.path
+    response = request(message, args.socket)
+    print(json.dumps(response, indent=1))
+    return 0 if response.get("ok") else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+import os
+from pathlib import Path
+
+from src.manifest import MANIFEST_NAME, BuildManifest
+
+
+def page_urls(dest_rel_path):
+    """
+    Returns the root-relative URLs under which an output page is served,
+    e.g. "/blog/index.html", "/blog/" and "/blog" for "blog/index.html".
+    """
+    url = "/" + Path(dest_rel_path).as_posix()
+    urls = [url]
+    if url.endswith("/index.html"):
+        directory = url[: -len("index.html")]
+        urls.append(directory)
+        if directory != "/":
+            urls.append(directory[:-1])
+    else:
+        urls.append(url[: -len(".html")])
+    return urls
+
+
+class DependencyGraph:
+    """
+    The dependencies of every page recorded by the last build: the
+    template, the static assets it references and the pages it links to.
+
+    Pages are identified by their source path relative to the content
+    directory, assets by their path relative to the static directory.
+    Every page also depends on the basepath and template variables, a
+    change of which re-renders every page on its own.
+
+    asset_map is the map of fingerprinted asset URLs of the last build, if
+    it fingerprinted the static files.
+    """
+
+    def __init__(self, content_dir, static_dir, template_path, pages, asset_map=None):
+        self.content_dir = content_dir
+        self.static_dir = static_dir
+        self.template_path = template_path
+        self.pages = pages
+        self.asset_map = asset_map or {}
+        self.urls = {}
+        for rel_path, entry in pages.items():
+            for url in page_urls(entry["dest"]):
+                self.urls[url] = rel_path
+        self.referrers = {}
+        for rel_path, entry in pages.items():
+            for url in entry.get("references", []):
+                self.referrers.setdefault(url, set()).add(rel_path)
+
+    @classmethod
+    def from_config(cls, config):
+        # Shared, so that the build that follows finds the manifest loaded.
+        manifest = BuildManifest.load(
+            os.path.join(config.dest_dir, MANIFEST_NAME), shared=True
+        )
+        return cls(
+            config.content_dir,
+            config.static_dir,
+            config.template_path,
+            manifest.pages,
+            manifest.asset_map,
+        )
+
+    def dependencies(self, rel_path):
+        """
+        Returns the template, assets and pages a page depends on, as a dict,
+        with the "missing" URLs it links to, which are neither a page nor a
+        static file.
+        """
+        assets = []
+        pages = []
+        missing = []
+        for url in self.pages[rel_path].get("references", []):
+            if url in self.urls:
+                pages.append(self.urls[url])
+            elif url in self.asset_map or os.path.isfile(
+                os.path.join(self.static_dir, url[1:])
+            ):
+                assets.append(url[1:])
+            else:
+                missing.append(url)
+        return {
+            "template": self.template_path,
+            "assets": assets,
+            "pages": pages,
+            "missing": missing,
+        }
+
+    def referencing(self, urls):
+        """
+        Returns the source paths of the pages referencing any of urls.
+        """
+        pages = set()
+        for url in urls:
+            pages.update(self.referrers.get(url, ()))
+        return pages
+
+    def affected(self, paths):
+        """
+        Returns the sorted source paths, relative to the content directory,
+        of the pages that must be rebuilt when the given files change,
+        whether they were edited, added or deleted.
+
+        A template change affects every page, an asset change the pages
+        referencing it, and a page change the page itself along with the
+        pages linking to it, including pages whose links were dangling
+        until a page was added or renamed to their target.
+        """
+        affected = set()
+        for path in paths:
+            if _is_same_path(path, self.template_path):
+                affected.update(self.pages)
+            elif _is_under(path, self.content_dir):
+                rel_path = os.path.relpath(path, self.content_dir)
+                affected.add(rel_path)
+                dest_rel_path = str(Path(rel_path).with_suffix(".html"))
+                for url in page_urls(dest_rel_path):
+                    affected.update(self.referrers.get(url, ()))
+            elif _is_under(path, self.static_dir):
+                rel_path = os.path.relpath(path, self.static_dir)
+                url = "/" + Path(rel_path).as_posix()
+                affected.update(self.referrers.get(url, ()))
+        return sorted(
+            rel_path
+            for rel_path in affected
+            if os.path.isfile(os.path.join(self.content_dir, rel_path))
+        )
+
+    def scope(self, paths):
+        """
+        Returns the pages and the static files to rebuild when the given
+        files change, relative to the content and static directories, for
+        BuildConfig.only and BuildConfig.only_static, or None if every page
+        must be rebuilt.
+
+        The pages are those affected by the change, and the changed pages
+        themselves, which are removed if they no longer exist.
+        """
+        if any(_is_same_path(path, self.template_path) for path in paths):
+            return None
+        pages = set(self.affected(paths))
+        static = set()
+        for path in paths:
+            if _is_under(path, self.content_dir):
+                pages.add(os.path.relpath(path, self.content_dir))
+            elif _is_under(path, self.static_dir):
+                static.add(os.path.relpath(path, self.static_dir))
+        return tuple(sorted(pages)), tuple(sorted(static))
+
+
+def _is_same_path(path, other):
+    return os.path.abspath(path) == os.path.abspath(other)
+
+
+def _is_under(path, dir_path):
+    return os.path.abspath(path).startswith(os.path.abspath(dir_path) + os.sep)
@@ -0,0 +1,127 @@
+import json
+import os
+from pathlib import Path
+
+from src.manifest import hash_file
+from src.static_sync import SyncResult, copy_file, list_files, remove_stale
+from src.writer import atomic_write
+
+
+ASSET_MANIFEST_NAME = "asset-manifest.json"
+FINGERPRINT_LENGTH = 8
+
+
+def fingerprinted_path(rel_path, content_hash):
+    """
+    Inserts the fingerprint before the extension: index.css becomes
+    index.3f2a1c9d.css.
+    """
+    root, ext = os.path.splitext(rel_path)
+    return f"{root}.{content_hash[:FINGERPRINT_LENGTH]}{ext}"
+
+
+def asset_url(rel_path):
+    return "/" + Path(rel_path).as_posix()
+
+
+def fingerprint_static(source_dir_path, dest_dir_path, previous=(), hashes=None):
+    """
+    Copies every file in source_dir_path into dest_dir_path under a name
+    fingerprinted with its content hash, so that it can be served with
+    far-future cache headers. Files with identical content are stored once,
+    under the fingerprinted name of the first of their paths. The files are
+    always copied, never hardlinked: a link would change along with its
+    source, under a name that promises it never does.
+
+    hashes maps the source files, relative to source_dir_path, to the size,
+    mtime and hash they had on the previous run, so unchanged files are not
+    read again. The asset map, from the root-relative URL of every source
+    file to the URL of its fingerprinted copy, is written to
+    asset-manifest.json in dest_dir_path. The files listed in previous that
+    are no longer produced are removed.
+
+    Returns the SyncResult, the sorted list of files written, to be passed
+    back as previous, the asset map and the hashes to pass back next time.
+    """
+    hashes = hashes or {}
+    result = SyncResult()
+    new_hashes = {}
+    assets = {}
+    emitted = {}
+    files = list_files(source_dir_path) if os.path.isdir(source_dir_path) else []
+    for rel_path in files:
+        from_path = os.path.join(source_dir_path, rel_path)
+        stat_result = os.stat(from_path)
+        entry = hashes.get(rel_path)
+        if (
+            entry is None
+            or entry["size"] != stat_result.st_size
+            or entry["mtime_ns"] != stat_result.st_mtime_ns
+        ):
+            entry = {
+                "hash": hash_file(from_path),
+                "size": stat_result.st_size,
+                "mtime_ns": stat_result.st_mtime_ns,
+            }
+        new_hashes[rel_path] = entry
+
+        dest_rel_path = emitted.get(entry["hash"])
+        if dest_rel_path is None:
+            dest_rel_path = fingerprinted_path(rel_path, entry["hash"])
+            emitted[entry["hash"]] = dest_rel_path
+            dest_path = os.path.join(dest_dir_path, dest_rel_path)
+            if _is_copied(dest_path, entry["size"]):
+                result.skipped += 1
+            else:
+                os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+                copy_file(from_path, dest_path)
+                result.copied += 1
+        else:
+            result.skipped += 1
+        assets[asset_url(rel_path)] = asset_url(dest_rel_path)
+
+    write_asset_manifest(dest_dir_path, assets)
+    current = sorted(set(emitted.values()) | {ASSET_MANIFEST_NAME})
+    result.removed = remove_stale(dest_dir_path, previous, current)
+    return result, current, assets, new_hashes
+
+
+def _is_copied(dest_path, size):
+    """
+    Returns whether dest_path already holds the copy of a file of size
+    bytes. The name is derived from the content, so such a copy is up to
+    date, unless it is a hardlink, as written by older builds with
+    link_static, whose content may have changed since.
+    """
+    try:
+        stat_result = os.stat(dest_path)
+    except FileNotFoundError:
+        return False
+    return stat_result.st_nlink == 1 and stat_result.st_size == size
+
+
+def write_asset_manifest(dest_dir_path, assets):
+    """
+    Writes the asset map to asset-manifest.json, unless it is unchanged.
+    """
+    path = os.path.join(dest_dir_path, ASSET_MANIFEST_NAME)
+    content = json.dumps(assets, indent=1, sort_keys=True)
+    try:
+        with open(path) as f:
+            if f.read() == content:
+                return
+    except FileNotFoundError:
+        pass
+    atomic_write(path, content)
+
+
+def changed_asset_urls(previous, assets):
+    """
+    Returns the source URLs whose fingerprinted URL was added, changed or
+    removed between two asset maps.
+    """
+    return {
+        url
+        for url in set(previous) | set(assets)
+        if previous.get(url) != assets.get(url)
+    }
@@ -1,4 +1,9 @@
+import io
+
+
 class HTMLNode:
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
@@ -8,6 +13,13 @@ class HTMLNode:
     def to_html(self):
         raise NotImplementedError("to_html method not implemented")
 
+    def write_html(self, out):
+        """
+        Writes the HTML of this node to out, any object with a write method
+        such as an open file or an io.StringIO.
+        """
+        out.write(self.to_html())
+
     def props_to_html(self):
         if self.props is None:
             return ""
@@ -21,6 +33,8 @@ class HTMLNode:
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
         super().__init__(tag, value, None, props)
 
@@ -36,18 +50,46 @@ class LeafNode(HTMLNode):
 
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag, None, children, props)
 
     def to_html(self):
+        out = io.StringIO()
+        self.write_html(out)
+        return out.getvalue()
+
+    def write_html(self, out):
         if self.tag is None:
             raise ValueError("invalid HTML: no tag")
         if self.children is None:
             raise ValueError("invalid HTML: no children")
-        children_html = ""
+        out.write(f"<{self.tag}{self.props_to_html()}>")
         for child in self.children:
-            children_html += child.to_html()
-        return f"<{self.tag}{self.props_to_html()}>{children_html}</{self.tag}>"
+            child.write_html(out)
+        out.write(f"</{self.tag}>")
 
     def __repr__(self):
         return f"ParentNode({self.tag}, children: {self.children}, {self.props})"
+
+
+class RenderedParentNode(ParentNode):
+    """
+    A ParentNode whose children were already rendered to inner_html, which
+    is written as is. The children are kept for walking the tree, e.g. to
+    count its terms.
+    """
+
+    __slots__ = ("inner_html",)
+
+    def __init__(self, tag, children, inner_html, props=None):
+        super().__init__(tag, children, props)
+        self.inner_html = inner_html
+
+    def write_html(self, out):
+        if self.tag is None:
+            raise ValueError("invalid HTML: no tag")
+        out.write(f"<{self.tag}{self.props_to_html()}>")
+        out.write(self.inner_html)
+        out.write(f"</{self.tag}>")
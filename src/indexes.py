@@ -0,0 +1,248 @@
+import heapq
+import os
+from datetime import datetime, timezone
+
+from src.htmlnode import LeafNode, ParentNode
+from src.static_sync import prune_empty_dirs
+from src.textnode import prefix_basepath
+from src.writer import atomic_write
+
+
+SITEMAP_NAME = "sitemap.xml"
+FEED_NAME = "feed.xml"
+FEED_SIZE = 20
+DAY_NS = 86400 * 10**9
+
+
+def page_url(dest_rel_path):
+    """
+    Returns the canonical root-relative URL of an output page, the
+    directory URL for index.html pages.
+    """
+    # Much faster than going through pathlib, for the sitemap of every page.
+    url = "/" + dest_rel_path.replace(os.sep, "/")
+    if url.endswith("/index.html"):
+        return url[: -len("index.html")]
+    return url
+
+
+def section_title(section):
+    return os.path.basename(section).replace("-", " ").replace("_", " ").title()
+
+
+def find_sections(pages):
+    """
+    Returns the sections of the site, as a mapping of every output
+    directory below the root that contains pages but no index.html of its
+    own, to the sorted source paths of the pages under it.
+    """
+    dests = set()
+    directories = {}
+    for rel_path, entry in pages.items():
+        dest = entry["dest"]
+        dests.add(dest)
+        directory, _, name = dest.rpartition(os.sep)
+        if name == "index.html":
+            directory = directory.rpartition(os.sep)[0]
+        directories.setdefault(directory, []).append(rel_path)
+    # Walk up from every directory once rather than from every page.
+    sections = {}
+    for directory, rel_paths in directories.items():
+        while directory:
+            if os.path.join(directory, "index.html") not in dests:
+                sections.setdefault(directory, []).extend(rel_paths)
+            directory = os.path.dirname(directory)
+    for rel_paths in sections.values():
+        rel_paths.sort()
+    return sections
+
+
+def newest_first(rel_paths, pages, size=None):
+    """
+    Returns rel_paths sorted by decreasing mtime of their page, or only the
+    first size of them.
+    """
+
+    def key(rel_path):
+        return (-pages[rel_path]["mtime_ns"], rel_path)
+
+    if size is not None:
+        return heapq.nsmallest(size, rel_paths, key=key)
+    return sorted(rel_paths, key=key)
+
+
+def section_html(section, rel_paths, pages, basepath="/"):
+    """
+    Renders the listing of a section: a link to every page, newest first,
+    followed by the page summary.
+    """
+    items = []
+    for rel_path in newest_first(rel_paths, pages):
+        entry = pages[rel_path]
+        href = prefix_basepath(page_url(entry["dest"]), basepath)
+        children = [LeafNode("a", entry.get("title") or rel_path, {"href": href})]
+        if entry.get("summary"):
+            children.append(LeafNode("p", entry["summary"]))
+        items.append(ParentNode("li", children))
+    return ParentNode(
+        "div", [LeafNode("h1", section_title(section)), ParentNode("ul", items)]
+    ).to_html()
+
+
+def sitemap_xml(pages, sections, site_url, basepath="/"):
+    # Imported here, as it pulls in most of urllib, which builds without a
+    # site URL never need.
+    from xml.sax.saxutils import escape
+
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">',
+    ]
+    urls = {}
+    for entry in pages.values():
+        urls[page_url(entry["dest"])] = entry["mtime_ns"]
+    for section, rel_paths in sections.items():
+        urls[page_url(os.path.join(section, "index.html"))] = max(
+            pages[rel_path]["mtime_ns"] for rel_path in rel_paths
+        )
+    dates = {}
+    for url in sorted(urls):
+        loc = site_url.rstrip("/") + prefix_basepath(url, basepath)
+        # Pages are mostly modified on a few days, format every day once.
+        day = urls[url] // DAY_NS
+        lastmod = dates.get(day)
+        if lastmod is None:
+            lastmod = dates[day] = _datetime(urls[url]).date().isoformat()
+        lines.append(
+            f"  <url><loc>{escape(loc)}</loc><lastmod>{lastmod}</lastmod></url>"
+        )
+    lines.append("</urlset>")
+    return "\n".join(lines) + "\n"
+
+
+def feed_xml(pages, site_url, basepath="/", title="", size=FEED_SIZE):
+    """
+    Renders an RSS 2.0 feed of the size most recently modified pages,
+    leaving out the home page.
+    """
+    from email.utils import format_datetime
+    from xml.sax.saxutils import escape
+
+    site_url = site_url.rstrip("/")
+    home = site_url + prefix_basepath("/", basepath)
+    rel_paths = [
+        rel_path for rel_path, entry in pages.items() if entry["dest"] != "index.html"
+    ]
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<rss version="2.0">',
+        "<channel>",
+        f"  <title>{escape(title)}</title>",
+        f"  <link>{escape(home)}</link>",
+        f"  <description>{escape(title)}</description>",
+    ]
+    for rel_path in newest_first(rel_paths, pages, size):
+        entry = pages[rel_path]
+        link = escape(site_url + prefix_basepath(page_url(entry["dest"]), basepath))
+        pub_date = format_datetime(_datetime(entry["mtime_ns"]))
+        lines.extend(
+            [
+                "  <item>",
+                f"    <title>{escape(entry.get('title') or rel_path)}</title>",
+                f"    <link>{link}</link>",
+                f"    <guid>{link}</guid>",
+                f"    <pubDate>{pub_date}</pubDate>",
+                f"    <description>{escape(entry.get('summary', ''))}</description>",
+                "  </item>",
+            ]
+        )
+    lines.extend(["</channel>", "</rss>"])
+    return "\n".join(lines) + "\n"
+
+
+def _datetime(mtime_ns):
+    return datetime.fromtimestamp(mtime_ns / 1e9, timezone.utc)
+
+
+def _lastmods_changed(changed, dests):
+    """
+    Returns whether the sitemap lists other pages, or other days for them,
+    after the changes. The day of a section only changes with that of one
+    of its pages.
+    """
+    for dest_rel_path, previous in changed.items():
+        entry = dests.get(dest_rel_path)
+        if previous is None or entry is None:
+            return True
+        if previous // DAY_NS != entry["mtime_ns"] // DAY_NS:
+            return True
+    return False
+
+
+def update_indexes(config, manifest, template, changed, full_rebuild):
+    """
+    Regenerates the section index pages, and the sitemap and feed when
+    config.site_url is set, from the page metadata recorded in manifest.
+
+    changed maps the output paths, relative to config.dest_dir, of the
+    pages rendered or removed by this build to the mtime their source had
+    at the previous build, None for new pages. Only the sections containing
+    one of them are rendered again, the feed only if there is any, and the
+    sitemap only if a page was added or removed or the day a page was last
+    modified changed, so no source is read and an incremental build does
+    work in proportion to its changes. Returns the paths of the files
+    written.
+    """
+    pages = manifest.pages
+    sections = find_sections(pages)
+    dests = {entry["dest"]: entry for entry in pages.values()}
+    written = []
+
+    dirty = set()
+    for dest_rel_path in changed:
+        directory = os.path.dirname(dest_rel_path)
+        while directory:
+            dirty.add(directory)
+            directory = os.path.dirname(directory)
+
+    generated = set()
+    for section, rel_paths in sections.items():
+        dest_rel_path = os.path.join(section, "index.html")
+        generated.add(dest_rel_path)
+        dest_path = os.path.join(config.dest_dir, dest_rel_path)
+        if not (full_rebuild or section in dirty or not os.path.exists(dest_path)):
+            continue
+        values = dict(config.variables)
+        values["Title"] = section_title(section)
+        values["Content"] = section_html(section, rel_paths, pages, config.basepath)
+        values["Toc"] = ""
+        atomic_write(dest_path, template.render(values))
+        written.append(dest_path)
+
+    if config.site_url:
+        rebuild = full_rebuild or manifest.site_url != config.site_url
+        outdated = {
+            SITEMAP_NAME: rebuild or _lastmods_changed(changed, dests),
+            FEED_NAME: rebuild or bool(changed),
+        }
+        for name in (SITEMAP_NAME, FEED_NAME):
+            generated.add(name)
+            dest_path = os.path.join(config.dest_dir, name)
+            if not (outdated[name] or not os.path.exists(dest_path)):
+                continue
+            if name == SITEMAP_NAME:
+                content = sitemap_xml(pages, sections, config.site_url, config.basepath)
+            else:
+                title = pages.get("index.md", {}).get("title", "")
+                content = feed_xml(pages, config.site_url, config.basepath, title)
+            atomic_write(dest_path, content)
+            written.append(dest_path)
+
+    for dest_rel_path in sorted(set(manifest.indexes).difference(generated, dests)):
+        dest_path = os.path.join(config.dest_dir, dest_rel_path)
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+            prune_empty_dirs(os.path.dirname(dest_path), config.dest_dir)
+    manifest.indexes = sorted(generated)
+    manifest.site_url = config.site_url
+    return written
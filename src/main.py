@@ -1,8 +1,13 @@
+import argparse
 import os
-import shutil
 import sys
 
-from src.script import copy_files_recursive, generate_pages_recursive
+from src.build import BuildConfig, build, merge_shards
+from src.cache import DEFAULT_CACHE_DIR, DEFAULT_CACHE_SIZE
+from src.compress import DEFAULT_GZIP_LEVEL, DEFAULT_GZIP_MIN_SIZE
+from src.memo import DEFAULT_BLOCK_MEMO_SIZE
+from src.profiler import Profiler
+from src.shard import SHARD_STRATEGIES, parse_shard
 
 
 dir_path_static = "./static"
@@ -10,22 +15,308 @@ dir_path_public = "./docs"
 dir_path_content = "./content"
 template_path = "./template.html"
 default_basepath = "/"
+dir_path_shards = "./shards"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the static site.")
+    parser.add_argument("basepath", nargs="?", default=default_basepath)
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="re-render every page instead of only the changed ones",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of worker processes used to render pages (0 = one per CPU)",
+    )
+    parser.add_argument(
+        "--write-threads",
+        type=int,
+        default=4,
+        help="number of threads writing rendered pages to disk, 0 to write "
+        "them between renders",
+    )
+    parser.add_argument(
+        "--stream-threshold",
+        type=int,
+        default=8,
+        metavar="MB",
+        help="stream sources of at least this size block by block to their output",
+    )
+    parser.add_argument(
+        "--link-static",
+        action="store_true",
+        help="hardlink static files into the output instead of copying them, "
+        "unless they are fingerprinted",
+    )
+    parser.add_argument(
+        "--hash-static",
+        action="store_true",
+        help="compare static files by content hash instead of size and mtime",
+    )
+    parser.add_argument(
+        "--site-url",
+        metavar="URL",
+        help="absolute URL of the site, e.g. https://example.com, "
+        "used to generate sitemap.xml and feed.xml",
+    )
+    parser.add_argument(
+        "--search",
+        action="store_true",
+        help="build a full-text search index under search/ in the output",
+    )
+    parser.add_argument(
+        "--gzip",
+        action="store_true",
+        help="write a precompressed .gz next to every compressible output",
+    )
+    parser.add_argument(
+        "--gzip-level",
+        type=int,
+        default=DEFAULT_GZIP_LEVEL,
+        choices=range(1, 10),
+        metavar="1-9",
+        help="compression level of the .gz files",
+    )
+    parser.add_argument(
+        "--gzip-min-size",
+        type=int,
+        default=DEFAULT_GZIP_MIN_SIZE,
+        metavar="BYTES",
+        help="do not compress outputs smaller than this",
+    )
+    parser.add_argument(
+        "--fingerprint",
+        action="store_true",
+        help="copy static files under content-hashed names, for long-lived caching",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="serve the site and rebuild it whenever a source file changes",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=8888,
+        help="port of the development server started by --watch",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=f"do not use the parse cache in {DEFAULT_CACHE_DIR}",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_CACHE_SIZE // (1024 * 1024),
+        metavar="MB",
+        help="maximum size of the parse cache before old entries are evicted",
+    )
+    parser.add_argument(
+        "--block-memo",
+        type=int,
+        default=DEFAULT_BLOCK_MEMO_SIZE // (1024 * 1024),
+        metavar="MB",
+        help="size of the memo of rendered blocks kept by every worker, "
+        "reusing blocks repeated across pages, 0 to disable",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="print the time and allocations spent per build stage and page",
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="FILE",
+        help="write a Chrome trace-event JSON file of the build (implies --profile)",
+    )
+    parser.add_argument(
+        "--daemon",
+        nargs="?",
+        const="",
+        metavar="SOCKET",
+        help="build, then keep serving build requests on a Unix socket, by "
+        "default ./.cache/build.sock, see python3 -m src.daemon --help",
+    )
+    parser.add_argument(
+        "--shard",
+        metavar="I/N",
+        help="only render the pages of the I-th of N shards, into "
+        "SHARD_DIR/I, to build a site over several processes or machines",
+    )
+    parser.add_argument(
+        "--shard-by",
+        choices=SHARD_STRATEGIES,
+        default="hash",
+        help="split pages by the hash of their path, or balance their sizes",
+    )
+    parser.add_argument(
+        "--shard-dir",
+        default=dir_path_shards,
+        help="directory holding the output of every shard",
+    )
+    parser.add_argument(
+        "--merge",
+        action="store_true",
+        help="combine the shards found in SHARD_DIR into the site",
+    )
+    parser.add_argument(
+        "--affected",
+        action="append",
+        default=[],
+        metavar="PATH",
+        help="list the pages to rebuild if PATH changes, then exit (repeatable)",
+    )
+    parser.add_argument(
+        "--changed",
+        action="append",
+        default=[],
+        metavar="PATH",
+        help="only rebuild the pages and static files affected by PATH "
+        "changing, e.g. the files listed by git diff --name-only (repeatable)",
+    )
+    parser.add_argument(
+        "--var",
+        action="append",
+        default=[],
+        metavar="NAME=VALUE",
+        help="value for a {{ NAME }} placeholder in the template (repeatable)",
+    )
+    args = parser.parse_args(argv)
+    if args.jobs < 0:
+        parser.error(f"invalid --jobs {args.jobs}, expected 0 or more")
+    variables = {}
+    for item in args.var:
+        name, sep, value = item.partition("=")
+        if not sep or not name:
+            parser.error(f"invalid --var {item!r}, expected NAME=VALUE")
+        variables[name] = value
+    args.variables = variables
+    if args.shard is not None:
+        try:
+            args.shard = parse_shard(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+    return args
 
 
 def main():
-    basepath = default_basepath
-    if len(sys.argv) > 1:
-        basepath = sys.argv[1]
+    args = parse_args()
+    config = BuildConfig(
+        content_dir=dir_path_content,
+        static_dir=dir_path_static,
+        dest_dir=dir_path_public,
+        template_path=template_path,
+        basepath=args.basepath,
+        force=args.force,
+        jobs=args.jobs,
+        write_threads=args.write_threads,
+        stream_threshold=args.stream_threshold * 1024 * 1024,
+        variables=args.variables,
+        link_static=args.link_static,
+        hash_static=args.hash_static,
+        fingerprint=args.fingerprint,
+        cache_dir=None if args.no_cache else DEFAULT_CACHE_DIR,
+        cache_size=args.cache_size * 1024 * 1024,
+        block_memo_size=args.block_memo * 1024 * 1024,
+        site_url=args.site_url,
+        search=args.search,
+        gzip=args.gzip,
+        gzip_level=args.gzip_level,
+        gzip_min_size=args.gzip_min_size,
+        shard=args.shard,
+        shard_by=args.shard_by,
+        log=print,
+    )
+    if args.shard is not None:
+        config.dest_dir = os.path.join(args.shard_dir, str(args.shard[0]))
+    if args.profile or args.trace:
+        config.profiler = Profiler()
+
+    if args.affected or args.changed:
+        from src.depgraph import DependencyGraph
+
+        graph = DependencyGraph.from_config(config)
+        if args.affected:
+            for rel_path in graph.affected(args.affected):
+                print(rel_path)
+            return
+        scope = graph.scope(args.changed)
+        if scope is not None:
+            config.only, config.only_static = scope
+
+    if args.daemon is not None:
+        from src.daemon import DEFAULT_SOCKET_PATH, serve
+
+        serve(config, args.daemon or DEFAULT_SOCKET_PATH)
+        return
 
-    print("Deleting public directory...")
-    if os.path.exists(dir_path_public):
-        shutil.rmtree(dir_path_public)
+    if args.watch:
+        from src.watch import watch
 
-    print("Copying static files to public directory...")
-    copy_files_recursive(dir_path_static, dir_path_public)
+        watch(config, args.port)
+        return
 
-    print("Generating content...")
-    generate_pages_recursive(dir_path_content, template_path, dir_path_public, basepath)
+    if args.merge:
+        names = (
+            sorted(os.listdir(args.shard_dir)) if os.path.isdir(args.shard_dir) else []
+        )
+        shard_dirs = [
+            os.path.join(args.shard_dir, name)
+            for name in names
+            if os.path.isdir(os.path.join(args.shard_dir, name))
+        ]
+        print(f"Merging {len(shard_dirs)} shards...")
+        try:
+            result = merge_shards(config, shard_dirs)
+        except ValueError as e:
+            sys.exit(f"error: {e}")
+    else:
+        if args.shard is not None:
+            print(f"Building shard {args.shard[0]}/{args.shard[1]}...")
+        else:
+            print("Building site...")
+        result = build(config)
+    print(
+        f"Static files: {result.static.copied} copied, {result.static.skipped} "
+        f"unchanged, {result.static.removed} removed"
+    )
+    verb = "Copied" if args.merge else "Rendered"
+    print(
+        f"{verb} {len(result.rendered)} pages ({result.cache_hits} from cache), "
+        f"skipped {result.skipped} unchanged, removed {len(result.removed)}"
+    )
+    if result.block_hits:
+        print(
+            f"Reused {result.block_hits} repeated blocks, "
+            f"rendered {result.block_misses}"
+        )
+    if result.indexes:
+        print(f"Generated {len(result.indexes)} index files")
+    if result.search_shards:
+        print(f"Updated {result.search_shards} search index shards")
+    if config.gzip:
+        print(
+            f"Compressed {result.compressed.compressed} files, "
+            f"{result.compressed.skipped} unchanged, "
+            f"{result.compressed.removed} removed"
+        )
+    if config.profiler is not None:
+        print()
+        print(config.profiler.summary())
+        if args.trace:
+            config.profiler.write_chrome_trace(args.trace)
+            print(f"Wrote trace to {args.trace}")
+    for from_path, error in result.errors:
+        print(f"error: {from_path}: {error}", file=sys.stderr)
+    if result.errors:
+        sys.exit(1)
 
 
-main()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+import hashlib
+import json
+import os
+
+
+# Bump whenever a change to the generator alters the rendered output, so
+# that every page is re-rendered on the next build.
+GENERATOR_VERSION = "5"
+MANIFEST_NAME = ".build-manifest.json"
+PAGE_METADATA = ("title", "summary", "references", "search")
+
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BuildManifest:
+    """
+    Persistent record of the inputs used to produce the output directory.
+
+    The manifest maps every source page (relative to the content directory)
+    to the hash of its markdown, the output it was rendered to, its title
+    and summary, the URLs it references, from which the DependencyGraph is
+    built, and its search index id and shards. This page metadata is also
+    the index from which the section pages, sitemap and feed are generated
+    without reading the sources.
+
+    It also records the template hash, basepath, template variables and
+    generator version of the last build. It lists the static files synced
+    into the output, with the map of their fingerprinted URLs and their
+    hashes when fingerprinting, the generated index files, and the outputs
+    that were precompressed, with their content hash. The manifest of a
+    shard build records the shard and the pages assigned to it.
+    """
+
+    def __init__(self, path, data=None):
+        self.path = path
+        data = data or {}
+        self.version = data.get("version")
+        self.template_hash = data.get("template_hash")
+        self.basepath = data.get("basepath")
+        self.variables = data.get("variables", {})
+        self.pages = data.get("pages", {})
+        self.assets = data.get("assets", [])
+        self.asset_map = data.get("asset_map", {})
+        self.asset_hashes = data.get("asset_hashes", {})
+        self.compressed = data.get("compressed", {})
+        self.indexes = data.get("indexes", [])
+        self.site_url = data.get("site_url")
+        self.search = data.get("search")
+        self.shard = data.get("shard")
+
+    @classmethod
+    def load(cls, path, shared=False):
+        """
+        Loads the manifest at path. The manifest last saved by this process
+        is returned without reading the file again if the file is unchanged
+        since, as is the case for every build after the first one in a
+        long-running process.
+
+        With shared, the manifest is also kept for the next load, which
+        spares reading it twice when it is inspected before a build, and
+        must not be modified.
+        """
+        if shared:
+            cached = _saved_manifests.get(path)
+        else:
+            cached = _saved_manifests.pop(path, None)
+        stamp = _stamp(path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = None
+        manifest = cls(path, data) if isinstance(data, dict) else cls(path)
+        if shared:
+            _saved_manifests[path] = (stamp, manifest)
+        return manifest
+
+    def save(self, defer=False):
+        """
+        Writes the manifest to its path. With defer, the manifest is only
+        kept for the next load in this process, and written by
+        flush_manifests, unless the file changes in the meantime.
+        """
+        if defer:
+            _saved_manifests[self.path] = (_stamp(self.path), self)
+            _deferred.add(self.path)
+            return
+        data = {
+            "version": self.version,
+            "template_hash": self.template_hash,
+            "basepath": self.basepath,
+            "variables": self.variables,
+            "pages": self.pages,
+            "assets": self.assets,
+            "asset_map": self.asset_map,
+            "asset_hashes": self.asset_hashes,
+            "compressed": self.compressed,
+            "indexes": self.indexes,
+            "site_url": self.site_url,
+            "search": self.search,
+            "shard": self.shard,
+        }
+        # json only uses its much faster C encoder without indent, and with
+        # dumps rather than dump.
+        content = json.dumps(data, separators=(",", ":"), sort_keys=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(content)
+        os.replace(tmp_path, self.path)
+        _saved_manifests[self.path] = (_stamp(self.path), self)
+        _deferred.discard(self.path)
+
+    def is_compatible(self, template_hash, basepath, variables):
+        return (
+            self.version == GENERATOR_VERSION
+            and self.template_hash == template_hash
+            and self.basepath == basepath
+            and self.variables == variables
+        )
+
+    def source_hash(self, rel_path, stat_result):
+        """
+        Returns the recorded hash of a source file if its size and mtime are
+        unchanged since it was recorded, so unchanged files need not be read.
+        """
+        entry = self.pages.get(rel_path)
+        if entry is None:
+            return None
+        if entry["size"] != stat_result.st_size:
+            return None
+        if entry["mtime_ns"] != stat_result.st_mtime_ns:
+            return None
+        return entry["hash"]
+
+    def record_page(
+        self, rel_path, stat_result, source_hash, dest_rel_path, metadata=None
+    ):
+        """
+        Records a rendered page. metadata holds its "title", "summary",
+        "references", the root-relative URLs the page links to, and "search",
+        its entry in the search index, and defaults to the metadata recorded
+        by the previous build.
+        """
+        previous = self.pages.get(rel_path, {})
+        if metadata is None:
+            metadata = {key: previous[key] for key in PAGE_METADATA if key in previous}
+        self.pages[rel_path] = {
+            "hash": source_hash,
+            "size": stat_result.st_size,
+            "mtime_ns": stat_result.st_mtime_ns,
+            "dest": dest_rel_path,
+            **{key: metadata[key] for key in PAGE_METADATA if key in metadata},
+        }
+
+
+def flush_manifests():
+    """
+    Writes the manifests whose save was deferred, and returns how many.
+    """
+    flushed = 0
+    for path in sorted(_deferred):
+        cached = _saved_manifests.get(path)
+        if cached is not None and cached[0] == _stamp(path):
+            cached[1].save()
+            flushed += 1
+    _deferred.clear()
+    return flushed
+
+
+# The manifests saved by this process, with the size and mtime of the file.
+_saved_manifests = {}
+# The paths of the manifests saved with defer and not written since.
+_deferred = set()
+
+
+def _stamp(path):
+    try:
+        stat_result = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat_result.st_size, stat_result.st_mtime_ns)
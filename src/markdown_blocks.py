@@ -1,8 +1,8 @@
 from enum import Enum
-from typing import List
+from typing import Iterable, Iterator, List, Tuple
 
-from src.htmlnode import ParentNode
-from src.textnode import TextNode, TextType, text_node_to_html_node
+from src.htmlnode import ParentNode, RenderedParentNode
+from src.textnode import TextNode, TextType, prefix_basepath, text_node_to_html_node
 from src.utils import text_to_textnodes
 
 
@@ -15,6 +15,79 @@ class BlockType(Enum):
     OLIST = "ordered_list"
 
 
+HEADING_TAGS = {level: f"h{level}" for level in range(1, 7)}
+
+
+class BlockScanner:
+    """
+    Accumulates the stripped lines of one block and classifies the block
+    incrementally, one line at a time, so that no block is rescanned.
+    """
+
+    def __init__(self):
+        self.lines = []
+        self.is_quote = True
+        self.is_ulist = True
+        self.is_olist = True
+
+    def add(self, line: str):
+        self.lines.append(line)
+        if self.is_quote:
+            self.is_quote = line.startswith(">")
+        if self.is_ulist:
+            self.is_ulist = line.startswith("- ")
+        if self.is_olist:
+            number, sep, _ = line.partition(". ")
+            self.is_olist = (
+                sep != "" and number.isdigit() and int(number) == len(self.lines)
+            )
+
+    def block_type(self) -> BlockType:
+        first = self.lines[0]
+        # Check for code block(```at start and end)
+        if first.startswith("```") and self.lines[-1].endswith("```"):
+            return BlockType.CODE
+        # Check for heading (1 to 6 # followed by space)
+        level = len(first) - len(first.lstrip("#"))
+        if 1 <= level <= 6 and first[level : level + 1] == " ":
+            return BlockType.HEADING
+        if self.is_quote:
+            return BlockType.QUOTE
+        if self.is_ulist:
+            return BlockType.ULIST
+        if self.is_olist:
+            return BlockType.OLIST
+        return BlockType.PARAGRAPH
+
+
+def iter_blocks(lines: Iterable[str]) -> Iterator[Tuple[BlockType, List[str]]]:
+    """
+    Groups raw Markdown lines into blocks in a single forward pass.
+
+    Parameters:
+    ----------
+    lines: Iterable[str]
+        The lines of a Markdown document, without line endings.
+    Returns:
+    --------
+    blocks: Iterator[Tuple[BlockType, List[str]]]
+        The type and the stripped, non-blank lines of every block. Blocks
+        are separated by empty lines.
+    """
+    scanner = BlockScanner()
+    for line in lines:
+        if line == "":
+            if scanner.lines:
+                yield scanner.block_type(), scanner.lines
+                scanner = BlockScanner()
+            continue
+        stripped = line.strip()
+        if stripped:
+            scanner.add(stripped)
+    if scanner.lines:
+        yield scanner.block_type(), scanner.lines
+
+
 def markdown_to_blocks(markdown: str) -> List[str]:
     """
     Splits a raw Markdownn into a list of block strings.
@@ -28,110 +101,245 @@ def markdown_to_blocks(markdown: str) -> List[str]:
     block_strings: List[str]
         A list of "block" strings containing inline texts.
     """
-    blocks = []
-    for block in markdown.split("\n\n"):
-        stripped_lines = [line.strip() for line in block.split("\n") if line.strip()]
-        if stripped_lines:
-            blocks.append("\n".join(stripped_lines))
-    return blocks
+    return ["\n".join(lines) for _, lines in iter_blocks(markdown.split("\n"))]
 
 
 def extract_title(markdown):
-    for line in markdown.split("\n"):  # Check each line
-        if line.strip().startswith("# "):  # Find first H1 header
-            return line.strip()[2:].strip()  # Remove '# ' and extra spaces
+    title = title_from_blocks(iter_blocks(markdown.split("\n")))
+    if title is None:
+        raise ValueError("The markdown doesn't contain an H1 title")
+    return title
+
 
-    raise ValueError("The markdown doesn't contain an H1 title")
+def title_from_blocks(blocks):
+    """
+    Returns the text of the first H1 heading among blocks, or None.
+    """
+    for block_type, lines in blocks:
+        if block_type == BlockType.HEADING and lines[0].startswith("# "):
+            return lines[0][2:].strip()
+    return None
 
 
 def block_to_block_type(block: str) -> BlockType:
-    lines = block.split("\n")
+    scanner = BlockScanner()
+    for line in block.split("\n"):
+        scanner.add(line)
+    return scanner.block_type()
 
-    # Check for code block(```at start and end)
-    if lines[0].startswith("```") and lines[-1].endswith("```"):
-        return BlockType.CODE
 
-    # Check for heading (# followed by space)
-    if lines[0].startswith("# "):
-        return BlockType.HEADING
+def markdown_to_html_node(markdown, basepath="/"):
+    children = []
+    for block_type, lines in iter_blocks(markdown.split("\n")):
+        children.append(BLOCK_TO_HTML_NODE[block_type](lines, basepath))
+    return ParentNode("div", children, None)
 
-    if any(lines[0].startswith(f"{'#' * i} ") for i in range(1, 7)):
-        return BlockType.HEADING
 
-    # Check for quote block (every line starts with ">")
-    if all(line.startswith(">") for line in lines):
-        return BlockType.QUOTE
+class Document:
+    """
+    A parsed Markdown document: its HTML node and the metadata collected
+    during the block pass.
 
-    # Check for unordered list (every line starts with "- ")
-    if all(line.startswith("- ") for line in lines):
-        return BlockType.ULIST
+    Attributes:
+    ----------
+    node: ParentNode
+        The <div> holding the rendered blocks.
+    title: str
+        The text of the first H1 heading, or None.
+    headings: List[Tuple[int, str]]
+        The level and inner HTML of every heading, in document order.
+    summary: str
+        The plain text of the first paragraph with text besides links and
+        images, or "".
+    references: List[str]
+        The root-relative URLs of the links and images, without basepath.
+    terms: Dict[str, int]
+        The search terms of the document and their counts, if they were
+        counted along with the blocks, or None.
+    """
 
-    # Check for ordered list (lines start with "1. ", "2. ", "3. ", etc.)
-    if all(line.split(". ")[0].isdigit() and line.split(". ")[1:] for line in lines):
-        numbers = [int(line.split(". ")[0]) for line in lines]
-        if numbers == list(range(1, len(numbers) + 1)):
-            return BlockType.OLIST
+    def __init__(
+        self, node, title=None, headings=None, summary="", references=None, terms=None
+    ):
+        self.node = node
+        self.title = title
+        self.headings = headings or []
+        self.summary = summary
+        self.references = references or []
+        self.terms = terms
+
+    def toc_html(self):
+        """
+        Renders the headings as nested <ul> lists, a table of contents.
+        """
+        parts = []
+        # The level of the headings of every open list, outermost first.
+        levels = []
+        for level, html in self.headings:
+            while levels and levels[-1] > level:
+                if len(levels) == 1 or levels[-2] < level:
+                    # The list was opened by a deeper heading, such as the
+                    # h3 of h1, h3, h2: the heading joins it.
+                    levels[-1] = level
+                    break
+                parts.append("</li></ul>")
+                levels.pop()
+            if not levels or levels[-1] < level:
+                parts.append("<ul>")
+                levels.append(level)
+            else:
+                parts.append("</li>")
+            parts.append(f"<li>{html}")
+        parts.extend("</li></ul>" for _ in levels)
+        return "".join(parts)
+
+
+def parse_blocks(blocks, basepath="/", assets=None):
+    """
+    Renders blocks into a Document, collecting its title, headings, summary
+    and references in the same pass. References found in the assets map are
+    rewritten to their fingerprinted URLs.
+    """
+    children = []
+    title = None
+    headings = []
+    summary = None
+    references = {}
+    for block_type, lines in blocks:
+        node = BLOCK_TO_HTML_NODE[block_type](lines, basepath)
+        collect_references(node, basepath, references, assets)
+        if block_type == BlockType.HEADING:
+            heading, node = render_heading(node)
+            if title is None and heading[0] == 1:
+                title = lines[0][2:].strip()
+            headings.append(heading)
+        children.append(node)
+        if block_type == BlockType.PARAGRAPH and summary is None:
+            summary = paragraph_summary(lines)
+    return Document(
+        ParentNode("div", children, None),
+        title,
+        headings,
+        summary or "",
+        list(references),
+    )
+
+
+def render_heading(node):
+    """
+    Returns the level and inner HTML of a heading node, for the table of
+    contents, and the node to use in its place, which writes that inner
+    HTML instead of rendering it again.
+    """
+    inner_html = "".join(child.to_html() for child in node.children)
+    level = int(node.tag[1])
+    return (level, inner_html), RenderedParentNode(node.tag, node.children, inner_html)
 
-    return BlockType.PARAGRAPH
 
+def paragraph_summary(lines):
+    """
+    Returns the plain text of a paragraph, or None for paragraphs of links
+    and images only, such as navigation, which make no summary.
+    """
+    text_nodes = text_to_textnodes(" ".join(lines))
+    if not any(
+        text_node.text_type == TextType.TEXT and text_node.text.strip()
+        for text_node in text_nodes
+    ):
+        return None
+    return "".join(text_node.text for text_node in text_nodes)
 
-def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
-    children = []
-    for block in blocks:
-        html_node = block_to_html_node(block)
-        children.append(html_node)
-    return ParentNode("div", children, None)
 
+def scan_metadata(blocks):
+    """
+    Returns the title and summary of a document, as parse_blocks would,
+    without rendering it, reading only as many blocks as needed.
+    """
+    title = summary = None
+    for block_type, lines in blocks:
+        if (
+            title is None
+            and block_type == BlockType.HEADING
+            and lines[0].startswith("# ")
+        ):
+            title = lines[0][2:].strip()
+        elif summary is None and block_type == BlockType.PARAGRAPH:
+            summary = paragraph_summary(lines)
+        if title is not None and summary is not None:
+            break
+    return title, summary or ""
+
+
+def collect_references(node, basepath="/", references=None, assets=None):
+    """
+    Adds the root-relative URLs of the links and images under node to the
+    references dict, used as an ordered set, with basepath removed again,
+    query strings and fragments dropped. Returns references.
 
-def block_to_html_node(block):
+    The URLs found in the assets map are replaced in node by the URL they
+    map to, so references hold the URLs as written in the source.
+    """
+    if references is None:
+        references = {}
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if node.children:
+            stack.extend(reversed(node.children))
+            continue
+        if node.tag == "a":
+            attribute = "href"
+        elif node.tag == "img":
+            attribute = "src"
+        else:
+            continue
+        url = node.props.get(attribute, "")
+        if basepath != "/" and url.startswith(basepath):
+            url = "/" + url[len(basepath) :]
+        if url.startswith("/") and not url.startswith("//"):
+            references[url.split("#")[0].split("?")[0]] = None
+            if assets and url in assets:
+                node.props[attribute] = prefix_basepath(assets[url], basepath)
+    return references
+
+
+def block_to_html_node(block, basepath="/"):
     block_type = block_to_block_type(block)
-    if block_type == BlockType.PARAGRAPH:
-        return paragraph_to_html_node(block)
-    if block_type == BlockType.HEADING:
-        return heading_to_html_node(block)
-    if block_type == BlockType.CODE:
-        return code_to_html_node(block)
-    if block_type == BlockType.OLIST:
-        return olist_to_html_node(block)
-    if block_type == BlockType.ULIST:
-        return ulist_to_html_node(block)
-    if block_type == BlockType.QUOTE:
-        return quote_to_html_node(block)
-    raise ValueError("invalid block type")
-
-
-def text_to_children(text):
+    return BLOCK_TO_HTML_NODE[block_type](block.split("\n"), basepath)
+
+
+def text_to_children(text, basepath="/"):
     text_nodes = text_to_textnodes(text)
     children = []
     for text_node in text_nodes:
-        html_node = text_node_to_html_node(text_node)
+        html_node = text_node_to_html_node(text_node, basepath)
         children.append(html_node)
     return children
 
 
-def paragraph_to_html_node(block):
-    lines = block.split("\n")
+def paragraph_to_html_node(lines, basepath="/"):
     paragraph = " ".join(lines)
-    children = text_to_children(paragraph)
+    children = text_to_children(paragraph, basepath)
     return ParentNode("p", children)
 
 
-def heading_to_html_node(block):
+def heading_to_html_node(lines, basepath="/"):
+    block = "\n".join(lines)
     level = 0
     for char in block:
         if char == "#":
             level += 1
         else:
             break
-    if level + 1 >= len(block):
+    if level not in HEADING_TAGS or level + 1 >= len(block):
         raise ValueError(f"invalid heading level: {level}")
     text = block[level + 1 :]
-    children = text_to_children(text)
-    return ParentNode(f"h{level}", children)
+    children = text_to_children(text, basepath)
+    return ParentNode(HEADING_TAGS[level], children)
 
 
-def code_to_html_node(block):
+def code_to_html_node(lines, basepath="/"):
+    block = "\n".join(lines)
     if not block.startswith("```") or not block.endswith("```"):
         raise ValueError("invalid code block")
     text = block[4:-3]
@@ -141,33 +349,40 @@ def code_to_html_node(block):
     return ParentNode("pre", [code])
 
 
-def olist_to_html_node(block):
-    items = block.split("\n")
+def olist_to_html_node(lines, basepath="/"):
     html_items = []
-    for item in items:
+    for item in lines:
         text = item[3:]
-        children = text_to_children(text)
+        children = text_to_children(text, basepath)
         html_items.append(ParentNode("li", children))
     return ParentNode("ol", html_items)
 
 
-def ulist_to_html_node(block):
-    items = block.split("\n")
+def ulist_to_html_node(lines, basepath="/"):
     html_items = []
-    for item in items:
+    for item in lines:
         text = item[2:]
-        children = text_to_children(text)
+        children = text_to_children(text, basepath)
         html_items.append(ParentNode("li", children))
     return ParentNode("ul", html_items)
 
 
-def quote_to_html_node(block):
-    lines = block.split("\n")
+def quote_to_html_node(lines, basepath="/"):
     new_lines = []
     for line in lines:
         if not line.startswith(">"):
             raise ValueError("invalid quote block")
         new_lines.append(line.lstrip(">").strip())
     content = " ".join(new_lines)
-    children = text_to_children(content)
+    children = text_to_children(content, basepath)
     return ParentNode("blockquote", children)
+
+
+BLOCK_TO_HTML_NODE = {
+    BlockType.PARAGRAPH: paragraph_to_html_node,
+    BlockType.HEADING: heading_to_html_node,
+    BlockType.CODE: code_to_html_node,
+    BlockType.OLIST: olist_to_html_node,
+    BlockType.ULIST: ulist_to_html_node,
+    BlockType.QUOTE: quote_to_html_node,
+}
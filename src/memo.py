@@ -0,0 +1,164 @@
+from collections import OrderedDict
+
+from src.htmlnode import LeafNode, ParentNode
+from src.markdown_blocks import (
+    BLOCK_TO_HTML_NODE,
+    HEADING_TAGS,
+    BlockType,
+    Document,
+    collect_references,
+    paragraph_summary,
+    render_heading,
+)
+from src.search import add_terms, count_terms
+
+
+DEFAULT_BLOCK_MEMO_SIZE = 16 * 1024 * 1024
+# Rough size of an entry besides its text and HTML.
+ENTRY_OVERHEAD = 200
+# Hashes of the blocks seen once, kept to recognise a block seen again.
+MAX_SEEN = 1 << 17
+HEADING_LEVELS = {tag: level for level, tag in HEADING_TAGS.items()}
+
+_UNSET = object()
+
+
+class MemoBlock:
+    """
+    A rendered block: its HTML, the references it holds, its level and
+    inner HTML if it is a heading, its search terms if they were counted
+    and, computed on first use, its summary if it is a paragraph.
+    """
+
+    __slots__ = ("html", "references", "heading", "summary", "terms", "size")
+
+    def __init__(self, html, references, heading, terms, size):
+        self.html = html
+        self.references = references
+        self.heading = heading
+        self.summary = _UNSET
+        self.terms = terms
+        self.size = size
+
+
+class BlockMemo:
+    """
+    Remembers the rendering of repeated blocks, keyed by their type and
+    exact text, so that blocks shared across pages, such as disclaimers,
+    author bios or snippets, are rendered only once.
+
+    A block is only remembered the second time it is seen, so that a block
+    unique to its page costs no more than a hash lookup. Entries are
+    evicted least recently used first once their text and HTML take more
+    than max_size characters. A memo renders with one basepath and assets
+    map, and must be replaced when they change.
+
+    hits counts the blocks reused, misses the blocks rendered.
+    """
+
+    def __init__(self, max_size=DEFAULT_BLOCK_MEMO_SIZE, basepath="/", assets=None):
+        self.max_size = max_size
+        self.basepath = basepath
+        self.assets = assets
+        self.blocks = OrderedDict()
+        self.seen = set()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, block_type, lines, search=False):
+        """
+        Returns a (block, node, references) triple for a block: its
+        MemoBlock if it was seen before, holding its terms with search, and
+        its rendered node the first time it is seen, when block is None.
+        node is None for a block reused from the memo.
+        """
+        # The enum value hashes much faster than the enum member.
+        key = (block_type.value, "\n".join(lines))
+        block = self.blocks.get(key)
+        if block is not None and (block.terms is not None or not search):
+            self.hits += 1
+            self.blocks.move_to_end(key)
+            return block, None, block.references
+
+        self.misses += 1
+        node = BLOCK_TO_HTML_NODE[block_type](lines, self.basepath)
+        references = list(collect_references(node, self.basepath, None, self.assets))
+        key_hash = hash(key)
+        if block is None and key_hash not in self.seen:
+            if len(self.seen) >= MAX_SEEN:
+                self.seen.clear()
+            self.seen.add(key_hash)
+            return None, node, references
+        return self._remember(key, node, references, search), node, references
+
+    def _remember(self, key, node, references, search):
+        heading = None
+        if node.tag in HEADING_LEVELS:
+            heading, node = render_heading(node)
+        terms = count_terms(node) if search else None
+        html = node.to_html()
+        size = len(key[1]) + len(html) + ENTRY_OVERHEAD
+        block = MemoBlock(html, references, heading, terms, size)
+        if size > self.max_size:
+            return block
+        previous = self.blocks.pop(key, None)
+        if previous is not None:
+            self.size -= previous.size
+        self.blocks[key] = block
+        self.size += size
+        while self.size > self.max_size:
+            _, evicted = self.blocks.popitem(last=False)
+            self.size -= evicted.size
+        return block
+
+    def parse(self, blocks, search=False):
+        """
+        Renders blocks into a Document like parse_blocks does, through the
+        memo. The Document also holds the search terms of the page with
+        search, and None otherwise.
+        """
+        children = []
+        title = None
+        headings = []
+        summary = None
+        references = {}
+        terms = {} if search else None
+        # The terms of the blocks seen for the first time are counted at once.
+        unseen = []
+        for block_type, lines in blocks:
+            block, node, block_references = self.render(block_type, lines, search)
+            for url in block_references:
+                references[url] = None
+            if block_type == BlockType.HEADING:
+                if block is None:
+                    heading, node = render_heading(node)
+                else:
+                    heading = block.heading
+                if title is None and heading[0] == 1:
+                    title = lines[0][2:].strip()
+                headings.append(heading)
+            if block is None:
+                children.append(node)
+                unseen.append(node)
+            else:
+                children.append(LeafNode(None, block.html))
+                if search:
+                    add_terms(terms, block.terms)
+            if block_type == BlockType.PARAGRAPH and summary is None:
+                if block is None:
+                    summary = paragraph_summary(lines)
+                else:
+                    if block.summary is _UNSET:
+                        block.summary = paragraph_summary(lines)
+                    summary = block.summary
+        if search and unseen:
+            count_terms(ParentNode("div", unseen), terms)
+        return Document(
+            ParentNode("div", children, None),
+            title,
+            headings,
+            summary or "",
+            list(references),
+            terms,
+        )
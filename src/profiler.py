@@ -0,0 +1,195 @@
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import namedtuple
+
+
+StageEvent = namedtuple(
+    "StageEvent", ["name", "page", "start", "duration", "allocations", "pid"]
+)
+
+
+class Profiler:
+    """
+    Records the wall time and the allocation count of every build stage,
+    optionally per page.
+
+    The allocation count is the net number of memory blocks allocated by
+    the stage, as reported by sys.getallocatedblocks(). That count is
+    process-wide, so it is None for a stage during which another thread
+    was in a stage too, such as a page written by an OutputWriter thread
+    while the next page renders, which is why profiled builds write their
+    pages synchronously. Totals including such a stage are None.
+
+    Hooks added with add_hook are called with every StageEvent as it is
+    recorded, including the events sent back by worker processes.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.events = []
+        self.hooks = []
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+
+    @contextlib.contextmanager
+    def stage(self, name, page=None):
+        running = _enter_stage()
+        blocks = sys.getallocatedblocks()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            allocations = sys.getallocatedblocks() - blocks
+            if _exit_stage(running):
+                allocations = None
+            self.record(
+                StageEvent(name, page, start, duration, allocations, os.getpid())
+            )
+
+    def record(self, event: StageEvent):
+        self.events.append(event)
+        for hook in self.hooks:
+            hook(event)
+
+    def extend(self, events):
+        for event in events:
+            self.record(StageEvent(*event))
+
+    def stage_totals(self):
+        totals = {}
+        for event in self.events:
+            duration, allocations, count = totals.get(event.name, (0.0, 0, 0))
+            totals[event.name] = (
+                duration + event.duration,
+                _add(allocations, event.allocations),
+                count + 1,
+            )
+        return totals
+
+    def page_totals(self):
+        totals = {}
+        for event in self.events:
+            if event.page is None:
+                continue
+            duration, allocations = totals.get(event.page, (0.0, 0))
+            totals[event.page] = (
+                duration + event.duration,
+                _add(allocations, event.allocations),
+            )
+        return totals
+
+    def summary(self, top=10):
+        """
+        Returns a table of the time spent in every stage and of the top
+        slowest pages. Allocations that could not be measured, see Profiler,
+        show as "-".
+        """
+        lines = [f"{'stage':<12} {'calls':>7} {'total':>10} {'allocs':>10}"]
+        totals = sorted(self.stage_totals().items(), key=lambda item: -item[1][0])
+        for name, (duration, allocations, count) in totals:
+            lines.append(
+                f"{name:<12} {count:>7} {duration * 1000:>8.1f}ms "
+                f"{_format(allocations):>10}"
+            )
+        pages = sorted(self.page_totals().items(), key=lambda item: -item[1][0])
+        if pages:
+            lines.append("")
+            lines.append("slowest pages:")
+            for page, (duration, allocations) in pages[:top]:
+                lines.append(
+                    f"{duration * 1000:>8.1f}ms {_format(allocations):>10}  {page}"
+                )
+        return "\n".join(lines)
+
+    def write_chrome_trace(self, path):
+        """
+        Writes the events in the Chrome trace-event format, which can be
+        loaded in chrome://tracing or Perfetto.
+        """
+        trace_events = []
+        for event in self.events:
+            args = {}
+            if event.allocations is not None:
+                args["allocations"] = event.allocations
+            if event.page is not None:
+                args["page"] = event.page
+            trace_events.append(
+                {
+                    "name": event.name,
+                    "cat": "build",
+                    "ph": "X",
+                    "ts": event.start * 1e6,
+                    "dur": event.duration * 1e6,
+                    "pid": event.pid,
+                    "tid": event.pid,
+                    "args": args,
+                }
+            )
+        with open(path, "w") as f:
+            json.dump({"traceEvents": trace_events}, f)
+
+
+# The stages running in this process, by thread, each with a flag set when
+# a stage of another thread ran at the same time.
+_running = {}
+_running_lock = threading.Lock()
+_running_pid = None
+
+
+def _enter_stage():
+    global _running_pid
+    running = [threading.get_ident(), False]
+    with _running_lock:
+        # A forked worker inherits the stages of its parent's threads.
+        if _running_pid != os.getpid():
+            _running.clear()
+            _running_pid = os.getpid()
+        for other in _running.values():
+            if other[0] != running[0]:
+                other[1] = running[1] = True
+        _running[id(running)] = running
+    return running
+
+
+def _exit_stage(running):
+    """
+    Returns whether a stage of another thread overlapped running.
+    """
+    with _running_lock:
+        _running.pop(id(running), None)
+    return running[1]
+
+
+def _add(total, allocations):
+    if total is None or allocations is None:
+        return None
+    return total + allocations
+
+
+def _format(allocations):
+    return "-" if allocations is None else allocations
+
+
+class NullProfiler:
+    """
+    A profiler that records nothing, used when profiling is disabled.
+    """
+
+    enabled = False
+    events = ()
+
+    def stage(self, name, page=None):
+        return contextlib.nullcontext()
+
+    def extend(self, events):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
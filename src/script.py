@@ -1,63 +1,200 @@
-import os
-import shutil
-from pathlib import Path
-from src.markdown_blocks import markdown_to_html_node
-
-
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath):
-    for filename in os.listdir(dir_path_content):
-        from_path = os.path.join(dir_path_content, filename)
-        dest_path = os.path.join(dest_dir_path, filename)
-        if os.path.isfile(from_path):
-            dest_path = Path(dest_path).with_suffix(".html")
-            generate_page(from_path, template_path, dest_path, basepath)
-        else:
-            generate_pages_recursive(from_path, template_path, dest_path, basepath)
-
-
-def generate_page(from_path, template_path, dest_path, basepath):
-    print(f" * {from_path} {template_path} -> {dest_path}")
-    from_file = open(from_path, "r")
-    markdown_content = from_file.read()
-    from_file.close()
-
-    template_file = open(template_path, "r")
-    template = template_file.read()
-    template_file.close()
-
-    node = markdown_to_html_node(markdown_content)
-    html = node.to_html()
-
-    title = extract_title(markdown_content)
-    template = template.replace("{{ Title }}", title)
-    template = template.replace("{{ Content }}", html)
-    template = template.replace('href="/', 'href="' + basepath)
-    template = template.replace('src="/', 'src="' + basepath)
-
-    dest_dir_path = os.path.dirname(dest_path)
-    if dest_dir_path != "":
-        os.makedirs(dest_dir_path, exist_ok=True)
-    to_file = open(dest_path, "w")
-    to_file.write(template)
-
-
-def extract_title(md):
-    lines = md.split("\n")
-    for line in lines:
-        if line.startswith("# "):
-            return line[2:]
-    raise ValueError("no title found")
-
-
-def copy_files_recursive(source_dir_path, dest_dir_path):
-    if not os.path.exists(dest_dir_path):
-        os.mkdir(dest_dir_path)
-
-    for filename in os.listdir(source_dir_path):
-        from_path = os.path.join(source_dir_path, filename)
-        dest_path = os.path.join(dest_dir_path, filename)
-        print(f" * {from_path} -> {dest_path}")
-        if os.path.isfile(from_path):
-            shutil.copy(from_path, dest_path)
-        else:
-            copy_files_recursive(from_path, dest_path)
+import io
+
+from src.markdown_blocks import (
+    BLOCK_TO_HTML_NODE,
+    collect_references,
+    iter_blocks,
+    parse_blocks,
+    scan_metadata,
+)
+from src.profiler import NULL_PROFILER
+from src.search import add_terms, count_terms
+from src.writer import atomic_open
+
+
+def render_page_html(
+    from_path,
+    template,
+    basepath,
+    variables=None,
+    profiler=NULL_PROFILER,
+    cache=None,
+    search=False,
+    assets=None,
+    memo=None,
+):
+    """
+    Renders one markdown page and returns its HTML together with a dict
+    describing the page: its "title", "summary" and "references", "cached"
+    set when its body came from the parse cache and, with search, the
+    "terms" to index the page under. The links and images found in the
+    assets map point to the fingerprinted URLs.
+
+    With a BlockMemo, blocks already rendered on another page are reused.
+
+    Besides Title and Content, the template can use a {{ Toc }} placeholder,
+    the table of contents built from the page headings.
+    """
+    with profiler.stage("read", from_path):
+        with open(from_path, "r") as from_file:
+            markdown_content = from_file.read()
+
+    entry = None
+    if cache is not None:
+        with profiler.stage("cache", from_path):
+            key = cache.key(markdown_content, basepath)
+            entry = cache.get(key)
+            if entry is not None and search and "terms" not in entry:
+                entry = None
+            # An entry rendered before an asset it references was changed.
+            if entry is not None and entry.get("assets", {}) != _asset_urls(
+                entry["references"], assets
+            ):
+                entry = None
+    cached = entry is not None
+
+    if entry is None:
+        with profiler.stage("blocks", from_path):
+            blocks = list(iter_blocks(markdown_content.split("\n")))
+        with profiler.stage("inline", from_path):
+            if memo is not None:
+                document = memo.parse(blocks, search)
+            else:
+                document = parse_blocks(blocks, basepath, assets)
+        if document.title is None:
+            raise ValueError("no title found")
+        body = document.node
+        entry = {
+            "title": document.title,
+            "toc": document.toc_html(),
+            "summary": document.summary,
+            "references": document.references,
+        }
+        if search and document.terms is not None:
+            entry["terms"] = document.terms
+        elif search:
+            with profiler.stage("search", from_path):
+                entry["terms"] = count_terms(document.node)
+        if cache is not None:
+            # The cache stores the body as HTML, which the page then reuses.
+            with profiler.stage("cache", from_path):
+                body = entry["html"] = document.node.to_html()
+                entry["assets"] = _asset_urls(document.references, assets)
+                cache.put(key, entry)
+    else:
+        body = entry["html"]
+
+    values = dict(variables or {})
+    values["Title"] = entry["title"]
+    values["Content"] = body
+    values["Toc"] = entry["toc"]
+    # The body is streamed into the page by template.write, without being
+    # rendered to a string of its own first.
+    with profiler.stage("render", from_path):
+        out = io.StringIO()
+        template.write(out, values)
+        page = out.getvalue()
+    info = {
+        "cached": cached,
+        "title": entry["title"],
+        "summary": entry["summary"],
+        "references": entry["references"],
+        "terms": entry["terms"] if search else None,
+    }
+    return page, info
+
+
+def _asset_urls(references, assets):
+    """
+    Returns the part of the assets map a page with the given references
+    was rendered with.
+    """
+    if not assets:
+        return {}
+    return {url: assets[url] for url in references if url in assets}
+
+
+class BlockStream:
+    """
+    The body of a markdown file, read and rendered one block at a time when
+    written with write_html, so that only one block is held in memory.
+    The references of the written blocks are collected in references and,
+    with search, their terms in terms.
+    """
+
+    def __init__(
+        self, markdown_file, basepath="/", search=False, assets=None, memo=None
+    ):
+        self.markdown_file = markdown_file
+        self.basepath = basepath
+        self.assets = assets
+        self.memo = memo
+        self.references = {}
+        self.terms = {} if search else None
+
+    def write_html(self, out):
+        lines = (line.rstrip("\n") for line in self.markdown_file)
+        out.write("<div>")
+        for block_type, block_lines in iter_blocks(lines):
+            if self.memo is not None:
+                search = self.terms is not None
+                block, node, references = self.memo.render(
+                    block_type, block_lines, search
+                )
+                for url in references:
+                    self.references[url] = None
+                if block is not None:
+                    out.write(block.html)
+                    if search:
+                        add_terms(self.terms, block.terms)
+                    continue
+            else:
+                node = BLOCK_TO_HTML_NODE[block_type](block_lines, self.basepath)
+                collect_references(node, self.basepath, self.references, self.assets)
+            node.write_html(out)
+            if self.terms is not None:
+                count_terms(node, self.terms)
+        out.write("</div>")
+
+
+def stream_page(
+    from_path,
+    template,
+    dest_path,
+    basepath,
+    variables=None,
+    profiler=NULL_PROFILER,
+    search=False,
+    assets=None,
+    memo=None,
+):
+    """
+    Renders a markdown page of any size into dest_path, streaming its blocks
+    between the template segments around {{ Content }}. Peak memory is
+    bounded by the largest block rather than by the document.
+    """
+    with profiler.stage("stream", from_path):
+        with open(from_path, "r") as from_file:
+            title, summary = scan_metadata(
+                iter_blocks(line.rstrip("\n") for line in from_file)
+            )
+            if title is None:
+                raise ValueError("no title found")
+            from_file.seek(0)
+            values = dict(variables or {})
+            values["Title"] = title
+            body = BlockStream(from_file, basepath, search, assets, memo)
+            values["Content"] = body
+            # Building a table of contents would need a second full pass.
+            values["Toc"] = ""
+            with atomic_open(dest_path) as to_file:
+                template.write(to_file, values)
+    return {
+        "cached": False,
+        "streamed": True,
+        "title": title,
+        "summary": summary,
+        "references": list(body.references),
+        "terms": body.terms,
+    }
+
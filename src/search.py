@@ -0,0 +1,254 @@
+import json
+import os
+import re
+import shutil
+from collections import Counter
+
+from src.indexes import page_url
+from src.textnode import prefix_basepath
+from src.writer import atomic_write
+
+
+SEARCH_DIR = "search"
+DOCS_PER_SHARD = 1000
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+SHARD_PATTERN = re.compile(r"[a-z0-9]{2}")
+MIN_TERM_LENGTH = 2
+MAX_TERM_LENGTH = 32
+STOP_WORDS = frozenset(
+    "an and are as at be but by for from has have in is it its of on or that "
+    "the this to was were which with".split()
+)
+
+
+def tokenize(text):
+    """
+    Returns the lowercase words of text, leaving out stop words and words
+    too short or too long to be worth indexing.
+    """
+    return [word for word in TOKEN_PATTERN.findall(text.lower()) if is_term(word)]
+
+
+def is_term(word):
+    return MIN_TERM_LENGTH <= len(word) <= MAX_TERM_LENGTH and word not in STOP_WORDS
+
+
+def count_terms(node, terms=None):
+    """
+    Adds the number of occurrences of every term in the text under node to
+    the terms dict and returns it. The leaves of a rendered page hold the
+    text of the TextNodes produced by text_to_textnodes, and of code blocks.
+    """
+    if terms is None:
+        terms = {}
+    texts = []
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if node.children:
+            stack.extend(node.children)
+        elif node.value:
+            texts.append(node.value)
+    # Counting every word first filters each distinct word only once.
+    words = Counter(TOKEN_PATTERN.findall(" ".join(texts).lower()))
+    for word, count in words.items():
+        if is_term(word):
+            terms[word] = terms.get(word, 0) + count
+    return terms
+
+
+def add_terms(terms, other):
+    """
+    Adds the term counts of other to terms and returns terms.
+    """
+    for term, count in other.items():
+        terms[term] = terms.get(term, 0) + count
+    return terms
+
+
+def shard_key(term):
+    prefix = term[:2]
+    if SHARD_PATTERN.fullmatch(prefix):
+        return prefix
+    return "_"
+
+
+class SearchIndex:
+    """
+    The full-text search index, written under search/ in the output
+    directory as compact JSON files that a client fetches on demand:
+
+        search/terms/<prefix>.json  {term: [doc_id, count, doc_id, count, ...]}
+        search/docs/<n>.json        {doc_id: [url, title]}, n = doc_id // 1000
+
+    A term is stored in the shard named after its first two characters, so
+    a query for "bombadil" only downloads search/terms/bo.json, then the
+    docs shards of the matching ids. Terms that do not start with two ASCII
+    letters or digits go to the "_" shard.
+
+    Changes are applied by loading and rewriting only the shards that the
+    changed pages appear in. All removals are applied before any addition.
+    """
+
+    def __init__(self, dest_dir_path):
+        self.root = os.path.join(dest_dir_path, SEARCH_DIR)
+        self.terms = {}
+        self.docs = {}
+        self.removed = {}
+
+    def _load(self, shards, kind, key):
+        if key not in shards:
+            path = os.path.join(self.root, kind, f"{key}.json")
+            try:
+                with open(path) as f:
+                    shards[key] = json.load(f)
+            except FileNotFoundError:
+                shards[key] = {}
+        return shards[key]
+
+    def remove(self, doc_id, shard_keys):
+        for key in shard_keys:
+            self.removed.setdefault(key, set()).add(doc_id)
+        self._load(self.docs, "docs", str(doc_id // DOCS_PER_SHARD)).pop(
+            str(doc_id), None
+        )
+
+    def apply_removals(self):
+        """
+        Drops the postings of the removed pages, in one pass over each of
+        their shards.
+        """
+        for key, doc_ids in self.removed.items():
+            shard = self._load(self.terms, "terms", key)
+            for term in list(shard):
+                postings = shard[term]
+                kept = []
+                for i in range(0, len(postings), 2):
+                    if postings[i] not in doc_ids:
+                        kept.extend(postings[i : i + 2])
+                if kept:
+                    shard[term] = kept
+                else:
+                    del shard[term]
+        self.removed = {}
+
+    def add(self, doc_id, url, title, terms):
+        """
+        Indexes a page and returns the keys of the shards its terms went to.
+        """
+        shard_keys = set()
+        for term, count in terms.items():
+            key = shard_key(term)
+            shard_keys.add(key)
+            self._load(self.terms, "terms", key).setdefault(term, []).extend(
+                [doc_id, count]
+            )
+        docs = self._load(self.docs, "docs", str(doc_id // DOCS_PER_SHARD))
+        docs[str(doc_id)] = [url, title]
+        return sorted(shard_keys)
+
+    def save(self):
+        for kind, shards in (("terms", self.terms), ("docs", self.docs)):
+            for key, shard in shards.items():
+                path = os.path.join(self.root, kind, f"{key}.json")
+                if not shard:
+                    if os.path.exists(path):
+                        os.remove(path)
+                    continue
+                content = json.dumps(shard, separators=(",", ":"), sort_keys=True)
+                atomic_write(path, content)
+        return len(self.terms) + len(self.docs)
+
+
+def update_search_index(config, manifest, changes):
+    """
+    Updates the search index with changes, a list of (rel_path, previous,
+    terms) tuples for the pages rendered, failed or removed by this build:
+    previous is the "search" entry the page had in the manifest, if any,
+    and terms the terms of the rendered page, or None if it has no output
+    anymore. Returns the number of shards rewritten.
+    """
+    index = SearchIndex(config.dest_dir)
+    state = manifest.search or {"next_id": 0}
+    for _, previous, _ in changes:
+        if previous is not None:
+            index.remove(previous["id"], previous["shards"])
+    index.apply_removals()
+    for rel_path, previous, terms in changes:
+        if terms is None:
+            continue
+        if previous is not None:
+            doc_id = previous["id"]
+        else:
+            doc_id = state["next_id"]
+            state["next_id"] += 1
+        entry = manifest.pages[rel_path]
+        url = prefix_basepath(page_url(entry["dest"]), config.basepath)
+        shard_keys = index.add(doc_id, url, entry.get("title", ""), terms)
+        entry["search"] = {"id": doc_id, "shards": shard_keys}
+    manifest.search = state
+    return index.save()
+
+
+def is_index_complete(config, manifest):
+    """
+    Returns whether every page recorded in manifest is in the search index.
+    It is not when the index was not built by the previous build, in which
+    case every page must be rendered again to index it.
+    """
+    return manifest.search is not None and os.path.isdir(
+        os.path.join(config.dest_dir, SEARCH_DIR)
+    )
+
+
+def remove_search_index(config, manifest):
+    shutil.rmtree(os.path.join(config.dest_dir, SEARCH_DIR), ignore_errors=True)
+    manifest.search = None
+    for entry in manifest.pages.values():
+        entry.pop("search", None)
+
+
+def merge_search_indexes(config, manifest, sources):
+    """
+    Replaces the search index of config.dest_dir by the union of the
+    indexes of sources, a list of (dest_dir, manifest) pairs of builds that
+    indexed disjoint sets of pages, such as shards. The doc ids of every
+    source are offset past those of the previous ones, and the "search"
+    entries of manifest.pages updated to match. Returns the number of
+    shards written.
+    """
+    shutil.rmtree(os.path.join(config.dest_dir, SEARCH_DIR), ignore_errors=True)
+    index = SearchIndex(config.dest_dir)
+    offset = 0
+    for dest_dir, source in sources:
+        root = os.path.join(dest_dir, SEARCH_DIR)
+        for key, shard in _read_shards(root, "terms"):
+            merged = index._load(index.terms, "terms", key)
+            for term, postings in shard.items():
+                postings = postings[:]
+                postings[::2] = [doc_id + offset for doc_id in postings[::2]]
+                merged.setdefault(term, []).extend(postings)
+        for _, shard in _read_shards(root, "docs"):
+            for doc_id, doc in shard.items():
+                doc_id = int(doc_id) + offset
+                key = str(doc_id // DOCS_PER_SHARD)
+                index._load(index.docs, "docs", key)[str(doc_id)] = doc
+        for rel_path, entry in source.pages.items():
+            if "search" in entry and rel_path in manifest.pages:
+                search = entry["search"]
+                manifest.pages[rel_path]["search"] = {
+                    "id": search["id"] + offset,
+                    "shards": search["shards"],
+                }
+        offset += source.search["next_id"]
+    manifest.search = {"next_id": offset}
+    return index.save()
+
+
+def _read_shards(root, kind):
+    dir_path = os.path.join(root, kind)
+    if not os.path.isdir(dir_path):
+        return
+    for filename in sorted(os.listdir(dir_path)):
+        with open(os.path.join(dir_path, filename)) as f:
+            yield filename[: -len(".json")], json.load(f)
@@ -0,0 +1,53 @@
+import hashlib
+import heapq
+from pathlib import Path
+
+
+SHARD_STRATEGIES = ("hash", "size")
+
+
+def parse_shard(text):
+    """
+    Parses a shard given as "I/N", the I-th of N shards counting from 1,
+    into an (I, N) tuple.
+    """
+    index, sep, count = text.partition("/")
+    try:
+        index, count = int(index), int(count)
+    except ValueError:
+        index = count = 0
+    if not sep or not 1 <= index <= count:
+        raise ValueError(f"invalid shard {text!r}, expected I/N with 1 <= I <= N")
+    return index, count
+
+
+def path_shard(rel_path, count):
+    """
+    Returns the shard, from 1 to count, of a page by the hash of its source
+    path, the same on every machine and Python process.
+    """
+    digest = hashlib.sha256(Path(rel_path).as_posix().encode()).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+def partition(pages, count, by="hash"):
+    """
+    Splits pages, a list of (rel_path, size) pairs, into count shards and
+    returns a dict mapping every rel_path to its shard, from 1 to count.
+
+    "hash" assigns every page by the hash of its path, so that adding or
+    removing a page never moves another one. "size" balances the bytes of
+    markdown each shard renders, assigning the largest pages first to the
+    least loaded shard, ties going to the lowest path and shard.
+    """
+    if by == "hash":
+        return {rel_path: path_shard(rel_path, count) for rel_path, _ in pages}
+    if by != "size":
+        raise ValueError(f"invalid shard strategy {by!r}")
+    loads = [(0, shard) for shard in range(1, count + 1)]
+    shards = {}
+    for rel_path, size in sorted(pages, key=lambda page: (-page[1], page[0])):
+        load, shard = heapq.heappop(loads)
+        shards[rel_path] = shard
+        heapq.heappush(loads, (load + size, shard))
+    return shards
@@ -0,0 +1,161 @@
+import os
+import shutil
+from dataclasses import dataclass
+
+from src.manifest import hash_file
+
+
+@dataclass
+class SyncResult:
+    copied: int = 0
+    skipped: int = 0
+    removed: int = 0
+
+
+def list_files(dir_path):
+    """
+    Returns the sorted paths of every file under dir_path, relative to it.
+    """
+    files = []
+    for root, _, filenames in os.walk(dir_path):
+        for filename in filenames:
+            files.append(os.path.relpath(os.path.join(root, filename), dir_path))
+    return sorted(files)
+
+
+def sync_static(
+    source_dir_path,
+    dest_dir_path,
+    previous=(),
+    link=False,
+    use_hash=False,
+    only=None,
+):
+    """
+    Makes dest_dir_path contain a copy of every file in source_dir_path,
+    copying only the files whose size or mtime differ (or whose content
+    differs, with use_hash) and removing the files listed in previous that
+    no longer exist in the source.
+
+    With only, a list of paths relative to source_dir_path, only those
+    files are copied or removed, without walking source_dir_path.
+
+    Returns the SyncResult and the sorted list of synced relative paths, to
+    be passed back as previous on the next sync.
+    """
+    result = SyncResult()
+    if only is not None:
+        only = {os.path.normpath(rel_path) for rel_path in only}
+        files = sorted(
+            rel_path
+            for rel_path in only
+            if os.path.isfile(os.path.join(source_dir_path, rel_path))
+        )
+        current = sorted(set(previous) - only | set(files))
+    elif os.path.isdir(source_dir_path):
+        files = current = list_files(source_dir_path)
+    else:
+        files = current = []
+    for rel_path in files:
+        from_path = os.path.join(source_dir_path, rel_path)
+        dest_path = os.path.join(dest_dir_path, rel_path)
+        if is_up_to_date(from_path, dest_path, use_hash):
+            result.skipped += 1
+            continue
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        if link:
+            link_file(from_path, dest_path)
+        else:
+            copy_file(from_path, dest_path)
+        result.copied += 1
+
+    result.removed = remove_stale(dest_dir_path, previous, current)
+    return result, current
+
+
+def remove_stale(dest_dir_path, previous, current):
+    """
+    Deletes the files listed in previous but not in current from
+    dest_dir_path, and returns how many there were.
+    """
+    stale = sorted(set(previous) - set(current))
+    for rel_path in stale:
+        dest_path = os.path.join(dest_dir_path, rel_path)
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+            prune_empty_dirs(os.path.dirname(dest_path), dest_dir_path)
+    return len(stale)
+
+
+def is_up_to_date(from_path, dest_path, use_hash=False):
+    try:
+        dest_stat = os.stat(dest_path)
+    except FileNotFoundError:
+        return False
+    from_stat = os.stat(from_path)
+    if from_stat.st_size != dest_stat.st_size:
+        return False
+    if use_hash:
+        return hash_file(from_path) == hash_file(dest_path)
+    return from_stat.st_mtime_ns == dest_stat.st_mtime_ns
+
+
+def copy_file(from_path, dest_path):
+    """
+    Copies a file through a temporary sibling and keeps its mtime, so that
+    unchanged files are recognised on the next sync. Uses copy_file_range
+    where the platform supports it.
+    """
+    tmp_path = f"{dest_path}.tmp"
+    with open(from_path, "rb") as from_file, open(tmp_path, "wb") as to_file:
+        if not _copy_file_range(from_file, to_file):
+            from_file.seek(0)
+            to_file.seek(0)
+            to_file.truncate()
+            shutil.copyfileobj(from_file, to_file)
+    shutil.copystat(from_path, tmp_path)
+    os.replace(tmp_path, dest_path)
+
+
+def _copy_file_range(from_file, to_file):
+    if not hasattr(os, "copy_file_range"):
+        return False
+    remaining = os.fstat(from_file.fileno()).st_size
+    try:
+        while remaining > 0:
+            copied = os.copy_file_range(from_file.fileno(), to_file.fileno(), remaining)
+            if copied == 0:
+                return False
+            remaining -= copied
+    except OSError:
+        return False
+    return True
+
+
+def link_file(from_path, dest_path):
+    """
+    Hardlinks dest_path to from_path, falling back to a copy when the two
+    paths are on different filesystems or links are not supported.
+    """
+    tmp_path = f"{dest_path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    try:
+        os.link(from_path, tmp_path)
+    except OSError:
+        copy_file(from_path, dest_path)
+        return
+    os.replace(tmp_path, dest_path)
+
+
+def prune_empty_dirs(dir_path, root_path):
+    """
+    Removes dir_path and its parents while they are empty, up to root_path.
+    """
+    root = os.path.abspath(root_path)
+    dir_path = os.path.abspath(dir_path)
+    while dir_path != root and dir_path.startswith(root + os.sep):
+        if os.listdir(dir_path):
+            break
+        os.rmdir(dir_path)
+        dir_path = os.path.dirname(dir_path)
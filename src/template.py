@@ -0,0 +1,105 @@
+import os
+import re
+from typing import Dict, Optional
+
+from src.textnode import prefix_basepath
+
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+URL_ATTRIBUTE_PATTERN = re.compile(r'\b(href|src)="(/[^"]*)"')
+
+
+def rewrite_urls(html: str, basepath: str, assets: Optional[dict] = None) -> str:
+    """
+    Prefixes the root-relative href and src attributes in html with basepath,
+    after replacing the URLs found in the assets map with their fingerprinted
+    URLs.
+    """
+    if assets:
+
+        def replace(match):
+            url = assets.get(match.group(2), match.group(2))
+            return f'{match.group(1)}="{prefix_basepath(url, basepath)}"'
+
+        return URL_ATTRIBUTE_PATTERN.sub(replace, html)
+    if basepath == "/":
+        return html
+    html = html.replace('href="/', 'href="' + basepath)
+    return html.replace('src="/', 'src="' + basepath)
+
+
+class Template:
+    """
+    A template compiled into literal segments separated by `{{ Name }}`
+    placeholders, so that a page is rendered with a single join.
+
+    The basepath and the assets map are applied to the literal segments
+    once, at compile time. Placeholders without a value are left in the
+    output untouched.
+    """
+
+    def __init__(self, source: str, basepath: str = "/", assets: Optional[dict] = None):
+        self.literals = []
+        self.placeholders = []
+        self._tokens = []
+        pos = 0
+        for match in PLACEHOLDER_PATTERN.finditer(source):
+            self.literals.append(
+                rewrite_urls(source[pos : match.start()], basepath, assets)
+            )
+            self.placeholders.append(match.group(1))
+            self._tokens.append(match.group(0))
+            pos = match.end()
+        self.literals.append(rewrite_urls(source[pos:], basepath, assets))
+
+    def render(self, values: Dict[str, str]) -> str:
+        parts = [None] * (2 * len(self.placeholders) + 1)
+        parts[0::2] = self.literals
+        parts[1::2] = [
+            values.get(name, token)
+            for name, token in zip(self.placeholders, self._tokens)
+        ]
+        return "".join(parts)
+
+    def write(self, out, values: Dict[str, object]):
+        """
+        Writes the rendered template to out. A value with a write_html method,
+        such as an HTMLNode, is streamed into out instead of being rendered
+        to a string first.
+        """
+        for literal, name, token in zip(self.literals, self.placeholders, self._tokens):
+            out.write(literal)
+            value = values.get(name, token)
+            if hasattr(value, "write_html"):
+                value.write_html(out)
+            else:
+                out.write(value)
+        out.write(self.literals[-1])
+
+
+# The compiled template of every template path, only the latest variant:
+# a build loads its template with a single basepath and asset map.
+_template_cache = {}
+
+
+def load_template(template_path, basepath="/", assets=None) -> Template:
+    """
+    Returns the compiled template for template_path, reading and compiling
+    the file again only when its size or mtime, the basepath or the assets
+    map changed.
+    """
+    stat_result = os.stat(template_path)
+    assets = assets or None
+    stamp = (stat_result.st_size, stat_result.st_mtime_ns)
+    cached = _template_cache.get(template_path)
+    if cached is not None and cached[:3] == (stamp, basepath, assets):
+        return cached[3]
+    with open(template_path, "r") as f:
+        template = Template(f.read(), basepath, assets)
+    _template_cache[template_path] = (
+        stamp,
+        basepath,
+        dict(assets) if assets else None,
+        template,
+    )
+    return template
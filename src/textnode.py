@@ -13,6 +13,8 @@ class TextType(Enum):
 
 
 class TextNode:
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text: str, text_type: TextType, url: str = None):
         self.text = text
         self.text_type = text_type
@@ -21,13 +23,26 @@ class TextNode:
     def __eq__(self, other) -> bool:
         if not isinstance(other, TextNode):
             return False
-        return self.__dict__ == other.__dict__
+        return (
+            self.text == other.text
+            and self.text_type is other.text_type
+            and self.url == other.url
+        )
 
     def __repr__(self):
         return f"TextNode({self.text}, {self.text_type.value}, {self.url})"
 
 
-def text_node_to_html_node(text_node):
+def prefix_basepath(url: str, basepath: str) -> str:
+    """
+    Prefixes a root-relative url, such as "/images/a.png", with basepath.
+    """
+    if basepath == "/" or not url.startswith("/") or url.startswith("//"):
+        return url
+    return basepath + url[1:]
+
+
+def text_node_to_html_node(text_node, basepath="/"):
     if text_node.text_type == TextType.TEXT:
         return LeafNode(None, text_node.text)
     if text_node.text_type == TextType.BOLD:
@@ -37,7 +52,13 @@ def text_node_to_html_node(text_node):
     if text_node.text_type == TextType.CODE:
         return LeafNode("code", text_node.text)
     if text_node.text_type == TextType.LINK:
-        return LeafNode("a", text_node.text, {"href": text_node.url})
+        return LeafNode(
+            "a", text_node.text, {"href": prefix_basepath(text_node.url, basepath)}
+        )
     if text_node.text_type == TextType.IMAGE:
-        return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
+        return LeafNode(
+            "img",
+            "",
+            {"src": prefix_basepath(text_node.url, basepath), "alt": text_node.text},
+        )
     raise ValueError(f"invalid text type: {text_node.text_type}")
@@ -4,13 +4,54 @@ from .textnode import TextNode, TextType
 import re
 
 
+INLINE_PATTERN = re.compile(
+    r"\*\*(?P<bold>.*?)\*\*"
+    r"|_(?P<italic>.*?)_"
+    r"|`(?P<code>.*?)`"
+    r"|!\[(?P<alt>[^\[\]]*)\]\((?P<src>[^\(\)]*)\)"
+    r"|\[(?P<text>[^\[\]]*)\]\((?P<href>[^\(\)]*)\)"
+    r"|(?P<unclosed>\*\*|_|`)",
+    re.DOTALL,
+)
+
+DELIMITED_TEXT_TYPES = {
+    "bold": TextType.BOLD,
+    "italic": TextType.ITALIC,
+    "code": TextType.CODE,
+}
+
+
 def text_to_textnodes(text):
-    nodes = [TextNode(text, TextType.TEXT)]
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
+    """
+    Splits inline markdown into TextNodes in a single left-to-right scan.
+
+    Produces the same nodes as running split_nodes_delimiter for "**", "_"
+    and "`" followed by split_nodes_image and split_nodes_link, except that
+    the leftmost construct wins, so an image URL containing "_" stays an
+    image instead of being split as italic.
+    """
+    nodes = []
+    pos = 0
+    for match in INLINE_PATTERN.finditer(text):
+        start = match.start()
+        if start > pos:
+            nodes.append(TextNode(text[pos:start], TextType.TEXT))
+        kind = match.lastgroup
+        if kind == "src":
+            nodes.append(
+                TextNode(match.group("alt"), TextType.IMAGE, match.group("src"))
+            )
+        elif kind == "href":
+            nodes.append(
+                TextNode(match.group("text"), TextType.LINK, match.group("href"))
+            )
+        elif kind == "unclosed":
+            raise ValueError("invalid markdown, formatted section not closed")
+        elif match.group(kind):
+            nodes.append(TextNode(match.group(kind), DELIMITED_TEXT_TYPES[kind]))
+        pos = match.end()
+    if pos < len(text):
+        nodes.append(TextNode(text[pos:], TextType.TEXT))
     return nodes
 
 
@@ -0,0 +1,180 @@
+import functools
+import os
+import threading
+import time
+from dataclasses import replace
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from src.build import BuildConfig, build
+from src.depgraph import DependencyGraph
+
+
+# Files changed recently, polled on every tick as they are likely the ones
+# being edited.
+HOT_FILES = 64
+# Largest share of the time spent walking the watched directories: after a
+# walk taking t seconds, the next one starts no sooner than t / MAX_WALK_LOAD
+# seconds later.
+MAX_WALK_LOAD = 0.1
+
+
+def snapshot(paths):
+    """
+    Returns a mapping of every file under paths to its (size, mtime_ns).
+    """
+    files = {}
+    pending = []
+    for path in paths:
+        if os.path.isdir(path):
+            pending.append(path)
+        elif os.path.isfile(path):
+            files[path] = _stat(path)
+    while pending:
+        try:
+            entries = os.scandir(pending.pop())
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir():
+                    # Like os.walk, symbolic links to directories are not
+                    # followed.
+                    if not entry.is_symlink():
+                        pending.append(entry.path)
+                    continue
+                try:
+                    stat_result = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files[entry.path] = (stat_result.st_size, stat_result.st_mtime_ns)
+    return files
+
+
+def poll(before, paths):
+    """
+    Returns before updated with the current (size, mtime_ns) of paths,
+    without the paths that no longer exist.
+    """
+    after = dict(before)
+    for path in paths:
+        stat = _stat(path)
+        if stat is None:
+            after.pop(path, None)
+        else:
+            after[path] = stat
+    return after
+
+
+def _stat(path):
+    try:
+        stat_result = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat_result.st_size, stat_result.st_mtime_ns)
+
+
+def changed_paths(before, after):
+    """
+    Returns the sorted paths that were added, modified or removed between
+    two snapshots.
+    """
+    changed = {path for path in after if before.get(path) != after[path]}
+    changed.update(path for path in before if path not in after)
+    return sorted(changed)
+
+
+def serve(dest_dir_path, port):
+    """
+    Serves dest_dir_path over HTTP from a background thread.
+    """
+    handler = functools.partial(SimpleHTTPRequestHandler, directory=dest_dir_path)
+    server = ThreadingHTTPServer(("", port), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def rebuild(config: BuildConfig, changed=()):
+    """
+    Rebuilds the site after the files in changed were edited, added or
+    removed: only the pages they affect and the static files among them,
+    unless the template changed. Rebuilds everything without changed.
+    Returns the BuildResult, None if the build failed.
+    """
+    start = time.perf_counter()
+    try:
+        if changed:
+            scope = DependencyGraph.from_config(config).scope(changed)
+            if scope is not None:
+                print(f"   {len(scope[0])} pages affected")
+                config = replace(config, only=scope[0], only_static=scope[1])
+        result = build(config)
+    except Exception as e:
+        print(f"error: build failed: {type(e).__name__}: {e}")
+        return None
+    elapsed = (time.perf_counter() - start) * 1000
+    print(
+        f"Rebuilt in {elapsed:.0f}ms: {len(result.rendered)} pages rendered, "
+        f"{len(result.removed)} removed, {result.static.copied} static files copied, "
+        f"{result.static.removed} removed"
+    )
+    for from_path, error in result.errors:
+        print(f"error: {from_path}: {error}")
+    return result
+
+
+def watch(config: BuildConfig, port=8888, interval=0.1):
+    """
+    Builds the site, serves it on port and rebuilds it in-process whenever
+    a file in the content or static directory, or the template, changes.
+
+    Only the template and the files changed recently are checked every
+    interval. The content and static directories are walked for other
+    changes as often as MAX_WALK_LOAD allows, which on a large site adds a
+    delay to noticing the first edit of a file.
+
+    A rebuild only looks at the pages affected by the changed files, see
+    DependencyGraph.scope, so an edit re-renders only the affected pages or
+    copies only the affected asset.
+    """
+    paths = [config.content_dir, config.static_dir, config.template_path]
+    start = time.perf_counter()
+    before = snapshot(paths)
+    walked = time.perf_counter()
+    next_walk = walked + (walked - start) / MAX_WALK_LOAD
+    hot = {}
+    rebuild(config)
+    server = serve(config.dest_dir, port)
+    print(
+        f"Serving {config.dest_dir} on http://localhost:{port}/, "
+        "watching for changes..."
+    )
+    try:
+        while True:
+            time.sleep(interval)
+            start = time.perf_counter()
+            if start >= next_walk:
+                after = snapshot(paths)
+                walked = time.perf_counter()
+                next_walk = walked + (walked - start) / MAX_WALK_LOAD
+                changed = changed_paths(before, after)
+            else:
+                polled = [config.template_path, *hot]
+                after = poll(before, polled)
+                changed = sorted(
+                    {path for path in polled if before.get(path) != after.get(path)}
+                )
+            if not changed:
+                continue
+            before = after
+            for path in changed:
+                print(f" ~ {path}")
+                hot.pop(path, None)
+                hot[path] = None
+            while len(hot) > HOT_FILES:
+                del hot[next(iter(hot))]
+            rebuild(config, changed)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
@@ -0,0 +1,101 @@
+import contextlib
+import os
+import queue
+import threading
+
+from src.profiler import NULL_PROFILER
+
+
+@contextlib.contextmanager
+def atomic_open(dest_path, created_dirs=None, mode="w"):
+    """
+    Opens a temporary sibling of dest_path for writing and renames it over
+    dest_path once the block exits without error, so readers never see a
+    partially written file.
+
+    created_dirs, when given, is a set of directories already known to
+    exist, used to create every output directory only once.
+    """
+    dest_dir_path = os.path.dirname(dest_path)
+    if dest_dir_path != "" and (
+        created_dirs is None or dest_dir_path not in created_dirs
+    ):
+        os.makedirs(dest_dir_path, exist_ok=True)
+        if created_dirs is not None:
+            created_dirs.add(dest_dir_path)
+    tmp_path = f"{dest_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, mode) as to_file:
+            yield to_file
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def atomic_write(dest_path, content, created_dirs=None):
+    """
+    Writes content to dest_path, see atomic_open.
+    """
+    with atomic_open(dest_path, created_dirs) as to_file:
+        to_file.write(content)
+
+
+class OutputWriter:
+    """
+    Writes rendered pages from a small pool of threads, so that disk I/O
+    overlaps with rendering.
+
+    Pages are handed over through a bounded queue: submit blocks when
+    max_pending pages are waiting, which bounds the memory held by pages
+    rendered faster than they can be written. With no threads, pages are
+    written by submit itself. Errors are collected in errors, a mapping of
+    dest_path to message, once close() returns.
+    """
+
+    def __init__(self, threads=4, max_pending=64, profiler=NULL_PROFILER):
+        self.profiler = profiler
+        self.errors = {}
+        self._queue = queue.Queue(max_pending)
+        self._created_dirs = set()
+        self._lock = threading.Lock()
+        self._threads = [
+            threading.Thread(target=self._run, daemon=True)
+            for _ in range(threads)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, dest_path, content, page=None):
+        if self._threads:
+            self._queue.put((dest_path, content, page))
+        else:
+            self._write(dest_path, content, page)
+
+    def close(self):
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            self._write(*item)
+
+    def _write(self, dest_path, content, page):
+        try:
+            with self.profiler.stage("write", page):
+                atomic_write(dest_path, content, self._created_dirs)
+        except Exception as e:
+            with self._lock:
+                self.errors[dest_path] = f"{type(e).__name__}: {e}"
@@ -0,0 +1,196 @@
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from src.build import BuildConfig, build_pages, build_site, collect_pages
+from tests.helpers import TempDirTestCase
+
+
+TEMPLATE = "<title>{{ Title }}</title><main>{{ Content }}</main>"
+
+
+class TestIncrementalBuild(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.dest = os.path.join(self.root, "docs")
+        self.template = os.path.join(self.root, "template.html")
+        os.makedirs(os.path.join(self.content, "blog"))
+        self.write(self.template, TEMPLATE)
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nWelcome")
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post\n\nText")
+        self.config = BuildConfig(
+            content_dir=self.content,
+            dest_dir=self.dest,
+            template_path=self.template,
+        )
+
+    def test_collect_pages(self):
+        pages = collect_pages(self.content, self.dest)
+        self.assertEqual(
+            [
+                (
+                    os.path.join(self.content, "blog", "post.md"),
+                    os.path.join(self.dest, "blog", "post.html"),
+                ),
+                (
+                    os.path.join(self.content, "index.md"),
+                    os.path.join(self.dest, "index.html"),
+                ),
+            ],
+            pages,
+        )
+
+    def test_second_build_skips_unchanged_pages(self):
+        first = build_pages(self.config)
+        self.assertEqual(2, len(first.rendered))
+        second = build_pages(self.config)
+        self.assertEqual([], second.rendered)
+        self.assertEqual(2, second.skipped)
+
+    def test_changed_page_is_rerendered(self):
+        build_pages(self.config)
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nEdited")
+        result = build_pages(self.config)
+        self.assertEqual([os.path.join(self.dest, "index.html")], result.rendered)
+        self.assertIn("Edited", self.read(os.path.join(self.dest, "index.html")))
+
+    def test_removed_source_deletes_output(self):
+        build_pages(self.config)
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+        result = build_pages(self.config)
+        self.assertEqual([os.path.join(self.dest, "blog", "post.html")], result.removed)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "blog")))
+
+    def test_template_change_forces_full_rebuild(self):
+        build_pages(self.config)
+        self.write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        result = build_pages(self.config)
+        self.assertEqual(2, len(result.rendered))
+
+    def test_basepath_change_forces_full_rebuild(self):
+        build_pages(self.config)
+        self.config.basepath = "/site/"
+        result = build_pages(self.config)
+        self.assertEqual(2, len(result.rendered))
+
+    def test_parallel_build_matches_serial_build(self):
+        build_pages(self.config)
+        serial = self.read(os.path.join(self.dest, "blog", "post.html"))
+        self.config.force = True
+        self.config.jobs = 2
+        result = build_pages(self.config)
+        self.assertEqual(
+            [
+                os.path.join(self.dest, "blog", "post.html"),
+                os.path.join(self.dest, "index.html"),
+            ],
+            result.rendered,
+        )
+        self.assertEqual(
+            serial, self.read(os.path.join(self.dest, "blog", "post.html"))
+        )
+
+    def test_errors_are_reported_per_page(self):
+        bad_path = os.path.join(self.content, "blog", "bad.md")
+        self.write(bad_path, "no title here")
+        self.config.jobs = 2
+        result = build_pages(self.config)
+        self.assertEqual(2, len(result.rendered))
+        self.assertEqual([(bad_path, "ValueError: no title found")], result.errors)
+        retry = build_pages(self.config)
+        self.assertEqual(1, len(retry.errors))
+
+    def test_failed_page_keeps_its_output_tracked(self):
+        build_pages(self.config)
+        post = os.path.join(self.content, "blog", "post.md")
+        self.write(post, "no title here")
+        result = build_pages(self.config)
+        self.assertEqual(1, len(result.errors))
+        self.assertEqual(1, len(build_pages(self.config).errors))
+
+        os.remove(post)
+        result = build_pages(self.config)
+        self.assertEqual([os.path.join(self.dest, "blog", "post.html")], result.removed)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "blog")))
+
+    def test_build_site(self):
+        self.config.static_dir = os.path.join(self.root, "static")
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            result = build_site(self.config)
+        self.assertEqual("", stdout.getvalue())
+        self.assertEqual(2, len(result.rendered))
+        self.assertTrue(
+            {"static", "scan", "pages", "save", "total"} <= set(result.timings)
+        )
+
+        lines = []
+        self.config.log = lines.append
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+        build_site(self.config)
+        self.assertEqual([f" - {os.path.join(self.dest, 'blog', 'post.html')}"], lines)
+
+
+class TestImports(unittest.TestCase):
+    def run_python(self, code, cwd):
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = dict(os.environ, PYTHONPATH=root)
+        return subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=cwd,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+
+    def test_imports_have_no_side_effects(self):
+        with tempfile.TemporaryDirectory() as cwd:
+            output = self.run_python("import src.main", cwd)
+            self.assertEqual([], os.listdir(cwd))
+        self.assertEqual("", output)
+
+    def test_package_loads_build_lazily(self):
+        with tempfile.TemporaryDirectory() as cwd:
+            output = self.run_python(
+                "import sys, src\n"
+                "print('src.build' in sys.modules)\n"
+                "src.build_site\n"
+                "print('src.build' in sys.modules)\n"
+                "print('concurrent.futures' in sys.modules)",
+                cwd,
+            )
+        self.assertEqual("False\nTrue\nFalse\n", output)
+
+    def test_config_loads_no_feature_module(self):
+        with tempfile.TemporaryDirectory() as cwd:
+            output = self.run_python(
+                "import sys\n"
+                "from src import BuildConfig\n"
+                "BuildConfig()\n"
+                "features = ('cache', 'compress', 'depgraph', 'fingerprint',\n"
+                "    'indexes', 'memo', 'search', 'shard')\n"
+                "print([name for name in features if 'src.' + name in sys.modules])",
+                cwd,
+            )
+        self.assertEqual("[]\n", output)
+
+    def test_config_defaults(self):
+        from src.cache import DEFAULT_CACHE_SIZE
+        from src.compress import DEFAULT_GZIP_LEVEL, DEFAULT_GZIP_MIN_SIZE
+        from src.memo import DEFAULT_BLOCK_MEMO_SIZE
+
+        config = BuildConfig()
+        self.assertEqual(DEFAULT_CACHE_SIZE, config.cache_size)
+        self.assertEqual(DEFAULT_BLOCK_MEMO_SIZE, config.block_memo_size)
+        self.assertEqual(DEFAULT_GZIP_LEVEL, config.gzip_level)
+        self.assertEqual(DEFAULT_GZIP_MIN_SIZE, config.gzip_min_size)
+
+
+if __name__ == "__main__":
+    unittest.main()
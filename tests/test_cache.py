@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+
+from src.build import BuildConfig, build_pages
+from src.cache import ParseCache
+from tests.helpers import TempDirTestCase
+
+
+class TestParseCache(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cache_dir = os.path.join(self.root, "cache")
+
+    def test_get_and_put(self):
+        cache = ParseCache(self.cache_dir)
+        key = cache.key("# Title", "/")
+        self.assertIsNone(cache.get(key))
+        cache.put(key, {"html": "<h1>Title</h1>", "title": "Title"})
+        self.assertEqual(
+            {"html": "<h1>Title</h1>", "title": "Title"},
+            ParseCache(self.cache_dir).get(key),
+        )
+
+    def test_memory_entries(self):
+        cache = ParseCache(self.cache_dir, memory_entries=1)
+        first, second = cache.key("1", "/"), cache.key("2", "/")
+        cache.put(first, {"html": "1"})
+        os.remove(os.path.join(self.cache_dir, first[:2], first[2:]))
+        self.assertEqual({"html": "1"}, cache.get(first))
+        cache.put(second, {"html": "2"})
+        self.assertIsNone(cache.get(first))
+
+    def test_key_depends_on_source_and_basepath(self):
+        cache = ParseCache(self.cache_dir)
+        self.assertEqual(cache.key("# a", "/"), cache.key("# a", "/"))
+        self.assertNotEqual(cache.key("# a", "/"), cache.key("# b", "/"))
+        self.assertNotEqual(cache.key("# a", "/"), cache.key("# a", "/site/"))
+
+    def test_evicts_least_recently_used_entries(self):
+        cache = ParseCache(self.cache_dir, max_bytes=250)
+        keys = [cache.key(str(i), "/") for i in range(3)]
+        for i, key in enumerate(keys):
+            cache.put(key, {"html": "x" * 80})
+            path = os.path.join(self.cache_dir, key[:2], key[2:])
+            os.utime(path, ns=(i * 10**9, i * 10**9))
+        cache.put(cache.key("3", "/"), {"html": "x" * 80})
+        self.assertIsNone(cache.get(keys[0]))
+        self.assertIsNotNone(cache.get(keys[2]))
+        self.assertLessEqual(cache.disk_usage(), 250)
+
+    def test_overwritten_entry_is_counted_once(self):
+        cache = ParseCache(self.cache_dir)
+        key = cache.key("1", "/")
+        cache.put(cache.key("0", "/"), {"html": "x" * 80})
+        for _ in range(5):
+            cache.put(key, {"html": "x" * 80})
+        self.assertEqual(cache.disk_usage(), cache._size)
+
+
+class TestBuildWithCache(unittest.TestCase):
+    def test_template_change_reuses_parsed_bodies(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp, "content")
+            os.makedirs(content)
+            with open(os.path.join(content, "index.md"), "w") as f:
+                f.write("# Home\n\nWelcome")
+            template = os.path.join(tmp, "template.html")
+            with open(template, "w") as f:
+                f.write("{{ Content }}")
+            config = BuildConfig(
+                content_dir=content,
+                dest_dir=os.path.join(tmp, "docs"),
+                template_path=template,
+                cache_dir=os.path.join(tmp, "cache"),
+            )
+            self.assertEqual(0, build_pages(config).cache_hits)
+
+            with open(template, "w") as f:
+                f.write("<main>{{ Content }}</main>")
+            result = build_pages(config)
+            self.assertEqual(1, result.cache_hits)
+            with open(os.path.join(tmp, "docs", "index.html")) as f:
+                self.assertEqual(
+                    "<main><div><h1>Home</h1><p>Welcome</p></div></main>", f.read()
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import gzip
+import os
+import unittest
+
+from src.compress import CHUNK_SIZE, compress_file, compress_outputs
+from src.manifest import hash_file
+from tests.helpers import TempDirTestCase
+
+
+class TestCompressOutputs(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.dest = self.root
+        os.makedirs(os.path.join(self.dest, "blog"))
+        self.write("index.html", "<p>home</p>" * 100)
+        self.write(os.path.join("blog", "post.html"), "<p>post</p>" * 100)
+        self.write("index.css", "body {}")
+        self.write("image.png", "png" * 100)
+
+    def path(self, rel_path):
+        return os.path.join(self.dest, rel_path)
+
+    def test_compresses_compressible_files_above_min_size(self):
+        result, entries = compress_outputs(self.dest, min_size=100)
+        self.assertEqual(2, result.compressed)
+        self.assertEqual(
+            [os.path.join("blog", "post.html"), "index.html"], sorted(entries)
+        )
+        with gzip.open(self.path("index.html.gz"), "rt") as f:
+            self.assertEqual("<p>home</p>" * 100, f.read())
+        self.assertFalse(os.path.exists(self.path("index.css.gz")))
+        self.assertFalse(os.path.exists(self.path("image.png.gz")))
+
+    def test_skips_unchanged_content(self):
+        _, entries = compress_outputs(self.dest)
+        result, entries = compress_outputs(self.dest, entries)
+        self.assertEqual((0, 2), (result.compressed, result.skipped))
+
+        # Rewriting a file with the same content changes its mtime only.
+        self.write("index.html", "<p>home</p>" * 100)
+        os.remove(self.path(os.path.join("blog", "post.html.gz")))
+        result, entries = compress_outputs(self.dest, entries)
+        self.assertEqual((1, 1), (result.compressed, result.skipped))
+
+        self.write("index.html", "<p>changed</p>" * 100)
+        result, entries = compress_outputs(self.dest, entries, level=9)
+        self.assertEqual((1, 1), (result.compressed, result.skipped))
+
+        result, _ = compress_outputs(self.dest, entries, level=1)
+        self.assertEqual((2, 0), (result.compressed, result.skipped))
+
+    def test_removes_stale_siblings(self):
+        _, entries = compress_outputs(self.dest)
+        os.remove(self.path(os.path.join("blog", "post.html")))
+        self.write("index.html", "short")
+        result, entries = compress_outputs(self.dest, entries)
+        self.assertEqual(2, result.removed)
+        self.assertEqual({}, entries)
+        self.assertFalse(os.path.exists(self.path("blog")))
+        self.assertFalse(os.path.exists(self.path("index.html.gz")))
+
+    def test_parallel_matches_serial(self):
+        compress_outputs(self.dest)
+        with open(self.path("index.html.gz"), "rb") as f:
+            serial = f.read()
+        os.remove(self.path("index.html.gz"))
+        compress_outputs(self.dest, jobs=4)
+        with open(self.path("index.html.gz"), "rb") as f:
+            self.assertEqual(serial, f.read())
+
+    def test_compress_file_in_chunks(self):
+        data = os.urandom(CHUNK_SIZE // 2).hex()[: CHUNK_SIZE * 3 // 2 + 7]
+        self.write("large.html", data)
+        path = self.path("large.html")
+        content_hash, compressed = compress_file(path, 6)
+        self.assertEqual((hash_file(path), True), (content_hash, compressed))
+        with open(path + ".gz", "rb") as f:
+            first = f.read()
+        self.assertEqual(data.encode(), gzip.decompress(first))
+        self.assertEqual((content_hash, False), compress_file(path, 6, content_hash))
+        self.assertEqual((content_hash, True), compress_file(path, 6, "stale"))
+        with open(path + ".gz", "rb") as f:
+            self.assertEqual(first, f.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,163 @@
+import contextlib
+import gzip
+import io
+import json
+import os
+import threading
+import time
+import unittest
+from dataclasses import replace
+
+from src.build import BuildConfig
+from src.daemon import BuildDaemon, request, serve
+from src.manifest import hash_file
+from tests.helpers import TempDirTestCase
+
+
+class TestBuildDaemon(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.dest = os.path.join(self.root, "docs")
+        self.template = os.path.join(self.root, "template.html")
+        os.makedirs(os.path.join(self.content, "blog"))
+        self.write(self.template, "{{ Title }}|{{ Content }}")
+        self.write(self.content_path("index.md"), "# Home\n\nHello")
+        self.write(self.content_path("blog", "a.md"), "# A\n\nFirst")
+        self.write(self.content_path("blog", "b.md"), "# B\n\nSecond")
+        self.config = BuildConfig(
+            content_dir=self.content,
+            static_dir=os.path.join(self.root, "static"),
+            dest_dir=self.dest,
+            template_path=self.template,
+            cache_dir=os.path.join(self.root, "cache"),
+        )
+        self.daemon = BuildDaemon(self.config)
+
+    def tearDown(self):
+        self.daemon.close()
+        super().tearDown()
+
+    def content_path(self, *parts):
+        return os.path.join(self.content, *parts)
+
+    def rendered(self, response):
+        return sorted(os.path.relpath(path, self.dest) for path in response["rendered"])
+
+    def test_site(self):
+        response = self.daemon.handle({"build": "site"})
+        self.assertTrue(response["ok"])
+        self.assertEqual(
+            ["blog/a.html", "blog/b.html", "index.html"], self.rendered(response)
+        )
+        response = self.daemon.handle({"build": "site"})
+        self.assertEqual([], response["rendered"])
+        self.assertEqual(3, response["skipped"])
+
+    def test_page_and_subtree(self):
+        self.daemon.handle({"build": "site"})
+        self.write(self.content_path("index.md"), "# Home\n\nEdited")
+        self.write(self.content_path("blog", "a.md"), "# A\n\nEdited")
+        self.write(self.content_path("blog", "b.md"), "# B\n\nEdited")
+
+        response = self.daemon.handle({"build": "page", "path": "blog/a.md"})
+        self.assertEqual(["blog/a.html"], self.rendered(response))
+        response = self.daemon.handle({"build": "subtree", "path": "blog"})
+        self.assertEqual(["blog/b.html"], self.rendered(response))
+        response = self.daemon.handle({"build": "site"})
+        self.assertEqual(["index.html"], self.rendered(response))
+
+        response = self.daemon.handle(
+            {"build": "page", "path": "blog/a.md", "force": True, "profile": True}
+        )
+        self.assertEqual(["blog/a.html"], self.rendered(response))
+        self.assertIn("scan", response["stages"])
+
+    def test_page_is_recompressed(self):
+        self.daemon.close()
+        self.daemon = BuildDaemon(replace(self.config, gzip=True, gzip_min_size=0))
+        self.daemon.handle({"build": "site"})
+        self.write(self.content_path("blog", "a.md"), "# A\n\nEdited")
+        self.daemon.handle({"build": "page", "path": "blog/a.md"})
+        for rel_path in ("blog/a.html", "blog/index.html"):
+            path = os.path.join(self.dest, rel_path)
+            with open(path, "rb") as f, gzip.open(path + ".gz") as gz_file:
+                self.assertEqual(f.read(), gz_file.read())
+
+        os.remove(self.content_path("blog", "a.md"))
+        self.daemon.handle({"build": "subtree", "path": "blog"})
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "blog", "a.html.gz")))
+
+    def test_manifest_is_written_later(self):
+        self.daemon.handle({"build": "site"})
+        manifest_path = os.path.join(self.dest, ".build-manifest.json")
+        with open(manifest_path) as f:
+            saved = f.read()
+        self.write(self.content_path("blog", "a.md"), "# A\n\nEdited")
+        response = self.daemon.handle({"build": "page", "path": "blog/a.md"})
+        self.assertEqual(["blog/a.html"], self.rendered(response))
+        with open(manifest_path) as f:
+            self.assertEqual(saved, f.read())
+        # The next builds find the manifest in memory.
+        response = self.daemon.handle({"build": "subtree", "path": "blog"})
+        self.assertEqual([], response["rendered"])
+
+        self.daemon.flush()
+        with open(manifest_path) as f:
+            pages = json.load(f)["pages"]
+        self.assertEqual(
+            hash_file(self.content_path("blog", "a.md")), pages["blog/a.md"]["hash"]
+        )
+
+    def test_invalid_requests(self):
+        self.assertFalse(self.daemon.handle({"build": "everything"})["ok"])
+        self.assertFalse(self.daemon.handle({"build": "page"})["ok"])
+
+    def test_paths_outside_content_are_rejected(self):
+        outside = os.path.join(self.root, "outside")
+        os.makedirs(outside)
+        self.write(os.path.join(outside, "secret.md"), "# Secret")
+        os.symlink(outside, self.content_path("link"))
+        for path in (
+            "../outside/secret.md",
+            "blog/../../outside",
+            os.path.join(outside, "secret.md"),
+            "link/secret.md",
+        ):
+            response = self.daemon.handle({"build": "page", "path": path})
+            self.assertFalse(response["ok"])
+            self.assertIn("outside of the content directory", response["error"])
+        self.assertEqual(["secret.md"], os.listdir(outside))
+        self.assertFalse(os.path.exists(self.dest))
+
+        os.remove(self.content_path("link"))
+        self.daemon.handle({"build": "site"})
+        self.write(self.content_path("blog", "a.md"), "# A\n\nEdited")
+        response = self.daemon.handle(
+            {"build": "page", "path": self.content_path("blog", "a.md")}
+        )
+        self.assertEqual(["blog/a.html"], self.rendered(response))
+
+    def test_socket(self):
+        socket_path = os.path.join(self.root, "build.sock")
+        with contextlib.redirect_stdout(io.StringIO()):
+            thread = threading.Thread(target=serve, args=(self.config, socket_path))
+            thread.start()
+            try:
+                for _ in range(500):
+                    if os.path.exists(socket_path):
+                        break
+                    time.sleep(0.01)
+                self.assertTrue(request({"ping": True}, socket_path)["ok"])
+                self.write(self.content_path("blog", "a.md"), "# A\n\nEdited")
+                response = request({"build": "page", "path": "blog/a.md"}, socket_path)
+                self.assertEqual(["blog/a.html"], self.rendered(response))
+            finally:
+                request({"shutdown": True}, socket_path)
+                thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertFalse(os.path.exists(socket_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+import os
+import unittest
+
+from src.build import BuildConfig, build, build_pages
+from src.depgraph import DependencyGraph, page_urls
+from tests.helpers import TempDirTestCase
+
+
+class TestDependencyGraph(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.static = os.path.join(self.root, "static")
+        self.template = os.path.join(self.root, "template.html")
+        os.makedirs(os.path.join(self.content, "blog"))
+        os.makedirs(os.path.join(self.static, "images"))
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(self.path("static", "images", "a.png"), "png")
+        self.write(
+            self.path("content", "index.md"),
+            "# Home\n\n![a](/images/a.png)\n\n[post](/blog/post) [about](/about/)",
+        )
+        self.write(self.path("content", "blog", "post.md"), "# Post\n\n[home](/)")
+        self.write(self.path("content", "blog", "other.md"), "# Other\n\nText")
+        self.config = BuildConfig(
+            content_dir=self.content,
+            static_dir=self.static,
+            dest_dir=os.path.join(self.root, "docs"),
+            template_path=self.template,
+            basepath="/site/",
+        )
+        build_pages(self.config)
+
+    def path(self, *parts):
+        return os.path.join(self.root, *parts)
+
+    def test_page_urls(self):
+        self.assertEqual(["/index.html", "/"], page_urls("index.html"))
+        self.assertEqual(
+            ["/blog/index.html", "/blog/", "/blog"], page_urls("blog/index.html")
+        )
+        self.assertEqual(["/blog/post.html", "/blog/post"], page_urls("blog/post.html"))
+
+    def test_dependencies(self):
+        graph = DependencyGraph.from_config(self.config)
+        self.assertEqual(
+            {
+                "template": self.template,
+                "assets": ["images/a.png"],
+                "pages": [os.path.join("blog", "post.md")],
+                "missing": ["/about/"],
+            },
+            graph.dependencies("index.md"),
+        )
+        self.assertEqual(["index.md"], graph.dependencies("blog/post.md")["pages"])
+
+    def test_fingerprinted_assets(self):
+        self.config.fingerprint = True
+        build(self.config)
+        os.remove(self.path("static", "images", "a.png"))
+        graph = DependencyGraph.from_config(self.config)
+        self.assertEqual(["images/a.png"], graph.dependencies("index.md")["assets"])
+
+    def test_template_edit_affects_every_page(self):
+        graph = DependencyGraph.from_config(self.config)
+        self.assertEqual(
+            [
+                os.path.join("blog", "other.md"),
+                os.path.join("blog", "post.md"),
+                "index.md",
+            ],
+            graph.affected([self.template]),
+        )
+
+    def test_asset_deletion_affects_referencing_pages(self):
+        os.remove(self.path("static", "images", "a.png"))
+        graph = DependencyGraph.from_config(self.config)
+        self.assertEqual(
+            ["index.md"], graph.affected([self.path("static", "images", "a.png")])
+        )
+        self.assertEqual([], graph.affected([self.path("static", "unused.css")]))
+
+    def test_content_edit_affects_page_and_linking_pages(self):
+        graph = DependencyGraph.from_config(self.config)
+        self.assertEqual(
+            [os.path.join("blog", "post.md"), "index.md"],
+            graph.affected([self.path("content", "blog", "post.md")]),
+        )
+        self.assertEqual(
+            [os.path.join("blog", "other.md")],
+            graph.affected([self.path("content", "blog", "other.md")]),
+        )
+
+    def test_scope(self):
+        graph = DependencyGraph.from_config(self.config)
+        self.assertIsNone(
+            graph.scope([self.template, self.path("content", "index.md")])
+        )
+        self.assertEqual(
+            ((os.path.join("blog", "post.md"), "index.md"), ()),
+            graph.scope([self.path("content", "blog", "post.md")]),
+        )
+        self.assertEqual(
+            (("index.md",), (os.path.join("images", "a.png"),)),
+            graph.scope([self.path("static", "images", "a.png")]),
+        )
+        removed = self.path("content", "blog", "other.md")
+        os.remove(removed)
+        self.assertEqual(
+            ((os.path.join("blog", "other.md"),), ()), graph.scope([removed])
+        )
+
+    def test_content_rename(self):
+        old = self.path("content", "blog", "post.md")
+        new = self.path("content", "about", "index.md")
+        os.makedirs(os.path.dirname(new))
+        os.rename(old, new)
+        graph = DependencyGraph.from_config(self.config)
+        # The old page is gone, the page linking to it must be rebuilt, as
+        # must the new page and the page whose dangling link it now fulfils.
+        self.assertEqual(
+            [os.path.join("about", "index.md"), "index.md"],
+            graph.affected([old, new]),
+        )
+
+        build_pages(self.config)
+        graph = DependencyGraph.from_config(self.config)
+        self.assertEqual(
+            [os.path.join("about", "index.md")],
+            graph.dependencies("index.md")["pages"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+import json
+import os
+import unittest
+
+from src.build import BuildConfig, build
+from src.fingerprint import fingerprint_static, fingerprinted_path
+from src.manifest import hash_bytes
+from src.static_sync import list_files
+from tests.helpers import TempDirTestCase
+
+
+class TestFingerprintStatic(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.root, "static")
+        self.dest = os.path.join(self.root, "docs")
+        os.makedirs(os.path.join(self.static, "images"))
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.static, "images", "a.png"), "png")
+        self.write(os.path.join(self.static, "images", "b.png"), "png")
+        self.png = fingerprinted_path("a.png", hash_bytes(b"png"))
+
+    def test_fingerprinted_path(self):
+        self.assertEqual(
+            "css/index.0123abcd.css", fingerprinted_path("css/index.css", "0123abcdef")
+        )
+        self.assertEqual(
+            "LICENSE.0123abcd", fingerprinted_path("LICENSE", "0123abcdef")
+        )
+
+    def test_fingerprints_and_deduplicates(self):
+        result, files, assets, _ = fingerprint_static(self.static, self.dest)
+        self.assertEqual((2, 1, 0), (result.copied, result.skipped, result.removed))
+        css = fingerprinted_path("index.css", hash_bytes(b"body {}"))
+        self.assertEqual(
+            {
+                "/images/a.png": f"/images/{self.png}",
+                "/images/b.png": f"/images/{self.png}",
+                "/index.css": f"/{css}",
+            },
+            assets,
+        )
+        self.assertEqual(
+            ["asset-manifest.json", os.path.join("images", self.png), css], files
+        )
+        with open(os.path.join(self.dest, "asset-manifest.json")) as f:
+            self.assertEqual(assets, json.load(f))
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "index.css")))
+
+    def test_changed_file_replaces_its_copy(self):
+        _, files, _, hashes = fingerprint_static(self.static, self.dest)
+        self.write(os.path.join(self.static, "index.css"), "body { margin: 0 }")
+        result, files, assets, _ = fingerprint_static(
+            self.static, self.dest, files, hashes
+        )
+        self.assertEqual((1, 2, 1), (result.copied, result.skipped, result.removed))
+        css = fingerprinted_path("index.css", hash_bytes(b"body { margin: 0 }"))
+        self.assertEqual(f"/{css}", assets["/index.css"])
+        self.assertEqual(
+            ["asset-manifest.json", os.path.join("images", self.png), css],
+            list_files(self.dest),
+        )
+
+    def test_copies_are_never_links(self):
+        _, files, _, hashes = fingerprint_static(self.static, self.dest)
+        css = fingerprinted_path("index.css", hash_bytes(b"body {}"))
+        css = os.path.join(self.dest, css)
+        # As left by an older build linking the static files.
+        os.remove(css)
+        os.link(os.path.join(self.static, "index.css"), css)
+        result, *_ = fingerprint_static(self.static, self.dest, files, hashes)
+        self.assertEqual((1, 2), (result.copied, result.skipped))
+        self.assertEqual(1, os.stat(css).st_nlink)
+        self.write(os.path.join(self.static, "index.css"), "body { margin: 0 }")
+        self.assertEqual("body {}", self.read(css))
+
+
+class TestFingerprintBuild(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.root, "static")
+        content = os.path.join(self.root, "content")
+        self.dest = os.path.join(self.root, "docs")
+        self.template = os.path.join(self.root, "template.html")
+        os.makedirs(self.static)
+        os.makedirs(content)
+        self.write(os.path.join(self.static, "a.png"), "a")
+        self.write(os.path.join(self.static, "b.png"), "b")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(self.template, '<link href="/index.css">{{ Content }}')
+        self.write(os.path.join(content, "a.md"), "# A\n\n![a](/a.png)")
+        self.write(os.path.join(content, "b.md"), "# B\n\n![b](/b.png) [a](/a.html)")
+        self.config = BuildConfig(
+            content_dir=content,
+            static_dir=self.static,
+            dest_dir=self.dest,
+            template_path=self.template,
+            basepath="/site/",
+            fingerprint=True,
+        )
+
+    def test_pages_and_template_use_fingerprinted_urls(self):
+        build(self.config)
+        css = fingerprinted_path("index.css", hash_bytes(b"body {}"))
+        png = fingerprinted_path("a.png", hash_bytes(b"a"))
+        self.assertEqual(
+            f'<link href="/site/{css}"><div><h1>A</h1>'
+            f'<p><img src="/site/{png}" alt="a"></img></p></div>',
+            self.read(os.path.join(self.dest, "a.html")),
+        )
+
+    def test_asset_change_rerenders_referencing_pages(self):
+        build(self.config)
+        self.write(os.path.join(self.static, "b.png"), "changed")
+        result = build(self.config)
+        self.assertEqual([os.path.join(self.dest, "b.html")], result.rendered)
+        png = fingerprinted_path("b.png", hash_bytes(b"changed"))
+        self.assertIn(png, self.read(os.path.join(self.dest, "b.html")))
+
+        self.write(os.path.join(self.static, "index.css"), "body { margin: 0 }")
+        self.assertEqual(2, len(build(self.config).rendered))
+
+    def test_asset_change_keeps_other_cached_pages(self):
+        self.config.cache_dir = os.path.join(self.root, "cache")
+        self.config.link_static = True
+        build(self.config)
+        self.write(os.path.join(self.static, "b.png"), "changed")
+        self.write(self.template, '<link href="/index.css"><main>{{ Content }}</main>')
+        result = build(self.config)
+        self.assertEqual(2, len(result.rendered))
+        self.assertEqual(1, result.cache_hits)
+        png = fingerprinted_path("b.png", hash_bytes(b"changed"))
+        self.assertIn(png, self.read(os.path.join(self.dest, "b.html")))
+        self.assertEqual(1, os.stat(os.path.join(self.dest, png)).st_nlink)
+
+    def test_disabling_restores_original_names(self):
+        build(self.config)
+        self.config.fingerprint = False
+        result = build(self.config)
+        self.assertEqual(2, len(result.rendered))
+        self.assertEqual(
+            ["a.html", "a.png", "b.html", "b.png", "index.css"],
+            sorted(name for name in os.listdir(self.dest) if not name.startswith(".")),
+        )
+        self.assertIn(
+            'href="/site/index.css"', self.read(os.path.join(self.dest, "a.html"))
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+import os
+import unittest
+
+from src.build import BuildConfig, build_pages
+from src.indexes import find_sections, page_url
+from tests.helpers import TempDirTestCase
+
+
+class TestFindSections(unittest.TestCase):
+    def test_page_url(self):
+        self.assertEqual("/", page_url("index.html"))
+        self.assertEqual("/blog/tom/", page_url("blog/tom/index.html"))
+        self.assertEqual("/blog/post.html", page_url("blog/post.html"))
+
+    def test_sections_are_directories_without_index(self):
+        pages = {
+            "index.md": {"dest": "index.html"},
+            "blog/a/index.md": {"dest": "blog/a/index.html"},
+            "blog/2024/b.md": {"dest": "blog/2024/b.html"},
+            "contact/index.md": {"dest": "contact/index.html"},
+        }
+        self.assertEqual(
+            {
+                "blog": ["blog/2024/b.md", "blog/a/index.md"],
+                "blog/2024": ["blog/2024/b.md"],
+            },
+            find_sections(pages),
+        )
+
+
+class TestIndexes(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.dest = os.path.join(self.root, "docs")
+        self.template = os.path.join(self.root, "template.html")
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(self.content_path("index.md"), "# Home\n\nWelcome")
+        self.write(
+            self.content_path("blog", "a", "index.md"), "# A\n\n[home](/)\n\nAbout a"
+        )
+        self.write(self.content_path("blog", "b", "index.md"), "# B\n\nAbout b")
+        self.write(self.content_path("news", "c.md"), "# C & D\n\nAbout c")
+        os.utime(self.content_path("blog", "a", "index.md"), ns=(10**18, 10**18))
+        self.config = BuildConfig(
+            content_dir=self.content,
+            dest_dir=self.dest,
+            template_path=self.template,
+            basepath="/site/",
+            site_url="https://example.com",
+        )
+
+    def content_path(self, *parts):
+        return os.path.join(self.content, *parts)
+
+    def dest_path(self, *parts):
+        return os.path.join(self.dest, *parts)
+
+    def test_generates_sections_sitemap_and_feed(self):
+        result = build_pages(self.config)
+        self.assertEqual(
+            [
+                self.dest_path("blog", "index.html"),
+                self.dest_path("news", "index.html"),
+                self.dest_path("sitemap.xml"),
+                self.dest_path("feed.xml"),
+            ],
+            result.indexes,
+        )
+        self.assertEqual(
+            "<title>Blog</title><div><h1>Blog</h1><ul>"
+            '<li><a href="/site/blog/b/">B</a><p>About b</p></li>'
+            '<li><a href="/site/blog/a/">A</a><p>About a</p></li>'
+            "</ul></div>",
+            self.read(self.dest_path("blog", "index.html")),
+        )
+        sitemap = self.read(self.dest_path("sitemap.xml"))
+        self.assertIn("<loc>https://example.com/site/</loc>", sitemap)
+        self.assertIn("<loc>https://example.com/site/blog/</loc>", sitemap)
+        self.assertIn(
+            "<loc>https://example.com/site/blog/a/</loc><lastmod>2001-09-09</lastmod>",
+            sitemap,
+        )
+        feed = self.read(self.dest_path("feed.xml"))
+        self.assertIn("<title>Home</title>", feed)
+        self.assertIn("<title>C &amp; D</title>", feed)
+        self.assertIn("<link>https://example.com/site/news/c.html</link>", feed)
+        self.assertNotIn("<link>https://example.com/site/</link>\n    <guid>", feed)
+
+    def test_incremental_updates(self):
+        build_pages(self.config)
+        self.assertEqual([], build_pages(self.config).indexes)
+
+        # Modified on the same day, the page keeps its lastmod in the sitemap.
+        self.write(self.content_path("news", "c.md"), "# C\n\nChanged")
+        self.assertEqual(
+            [self.dest_path("news", "index.html"), self.dest_path("feed.xml")],
+            build_pages(self.config).indexes,
+        )
+        self.assertIn("Changed", self.read(self.dest_path("news", "index.html")))
+
+        self.write(self.content_path("news", "c.md"), "# C\n\nChanged again")
+        os.utime(self.content_path("news", "c.md"), ns=(10**18, 10**18))
+        self.assertEqual(
+            [
+                self.dest_path("news", "index.html"),
+                self.dest_path("sitemap.xml"),
+                self.dest_path("feed.xml"),
+            ],
+            build_pages(self.config).indexes,
+        )
+        self.assertIn(
+            "<loc>https://example.com/site/news/c.html</loc>"
+            "<lastmod>2001-09-09</lastmod>",
+            self.read(self.dest_path("sitemap.xml")),
+        )
+
+        self.write(self.content_path("e.md"), "# E")
+        self.assertIn(self.dest_path("sitemap.xml"), build_pages(self.config).indexes)
+
+        os.remove(self.content_path("news", "c.md"))
+        build_pages(self.config)
+        self.assertFalse(os.path.exists(self.dest_path("news")))
+
+    def test_without_site_url(self):
+        self.config.site_url = None
+        build_pages(self.config)
+        self.assertTrue(os.path.exists(self.dest_path("blog", "index.html")))
+        self.assertFalse(os.path.exists(self.dest_path("sitemap.xml")))
+
+    def test_page_replaces_section_index(self):
+        build_pages(self.config)
+        self.write(self.content_path("blog", "index.md"), "# My blog")
+        build_pages(self.config)
+        self.assertEqual(
+            "<title>My blog</title><div><h1>My blog</h1></div>",
+            self.read(self.dest_path("blog", "index.html")),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,8 +2,11 @@ import unittest
 from src.markdown_blocks import (
     markdown_to_blocks,
     block_to_block_type,
+    block_to_html_node,
     BlockType,
     markdown_to_html_node,
+    iter_blocks,
+    parse_blocks,
 )
 
 
@@ -62,6 +65,36 @@ This is the same paragraph on a new line
         block = "paragraph"
         self.assertEqual(block_to_block_type(block), BlockType.PARAGRAPH)
 
+    def test_block_to_html_node(self):
+        self.assertEqual(
+            block_to_html_node("- [a](/a)\n- b", "/site/").to_html(),
+            '<ul><li><a href="/site/a">a</a></li><li>b</li></ul>',
+        )
+
+    def test_iter_blocks(self):
+        lines = [
+            "# heading",
+            "",
+            "1. one",
+            "  2. two  ",
+            "",
+            "",
+            "1. one",
+            "3. three",
+            "",
+            "```",
+            "code",
+            "```",
+        ]
+        got = list(iter_blocks(lines))
+        want = [
+            (BlockType.HEADING, ["# heading"]),
+            (BlockType.OLIST, ["1. one", "2. two"]),
+            (BlockType.PARAGRAPH, ["1. one", "3. three"]),
+            (BlockType.CODE, ["```", "code", "```"]),
+        ]
+        self.assertEqual(got, want)
+
     def test_paragraph(self):
         md = """
 This is **bolded** paragraph
@@ -160,6 +193,88 @@ the **same** even with inline stuff
             "<div><pre><code>This is text that _should_ remain\nthe **same** even with inline stuff\n</code></pre></div>",
         )
 
+    def test_basepath_leaves_code_samples_alone(self):
+        md = """
+[home](/index.html)
+
+```
+<a href="/index.html">home</a>
+```
+"""
+
+        node = markdown_to_html_node(md, "/site/")
+        html = node.to_html()
+        self.assertEqual(
+            html,
+            '<div><p><a href="/site/index.html">home</a></p>'
+            '<pre><code><a href="/index.html">home</a>\n</code></pre></div>',
+        )
+
+
+class TestParseBlocks(unittest.TestCase):
+    def parse(self, markdown):
+        return parse_blocks(iter_blocks(markdown.split("\n")))
+
+    def test_metadata(self):
+        md = """
+## Before
+
+# The **Title**
+
+[< Back](/) ![image](/a.png)
+
+A _first_ paragraph
+on two lines.
+
+## Section
+
+A second paragraph.
+"""
+
+        document = self.parse(md)
+        self.assertEqual(document.title, "The **Title**")
+        self.assertEqual(document.summary, "A first paragraph on two lines.")
+        self.assertEqual(
+            document.headings,
+            [(2, "Before"), (1, "The <b>Title</b>"), (2, "Section")],
+        )
+        self.assertEqual(document.node.to_html(), markdown_to_html_node(md).to_html())
+
+    def test_no_title(self):
+        document = self.parse("## Only a section")
+        self.assertIsNone(document.title)
+        self.assertEqual(document.summary, "")
+
+    def test_toc_html(self):
+        document = self.parse("# A\n\n## B\n\n### C\n\n## D\n\n# E")
+        self.assertEqual(
+            document.toc_html(),
+            "<ul><li>A<ul><li>B<ul><li>C</li></ul></li><li>D</li></ul></li>"
+            "<li>E</li></ul>",
+        )
+        self.assertEqual(self.parse("Some text").toc_html(), "")
+
+    def test_toc_html_skipped_levels(self):
+        document = self.parse("# A\n\n### B\n\n## C\n\n### D\n\n# E")
+        self.assertEqual(
+            document.toc_html(),
+            "<ul><li>A<ul><li>B</li><li>C<ul><li>D</li></ul></li></ul></li>"
+            "<li>E</li></ul>",
+        )
+        document = self.parse("### A\n\n## B\n\n# C\n\n## D")
+        self.assertEqual(
+            document.toc_html(),
+            "<ul><li>A</li><li>B</li><li>C<ul><li>D</li></ul></li></ul>",
+        )
+
+    def test_headings_are_rendered_once(self):
+        document = self.parse("# The **Title**\n\ntext")
+        heading = document.node.children[0]
+        heading.children = None
+        self.assertEqual(
+            document.node.to_html(), "<div><h1>The <b>Title</b></h1><p>text</p></div>"
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
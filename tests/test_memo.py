@@ -0,0 +1,133 @@
+import os
+import unittest
+
+from src.build import BuildConfig, build_pages
+from src.markdown_blocks import BlockType, iter_blocks, parse_blocks
+from src.memo import ENTRY_OVERHEAD, BlockMemo
+from src.search import count_terms
+from tests.helpers import TempDirTestCase
+
+
+MARKDOWN = """# Tom
+
+[Home](/) and ![Tom](/images/tom.png)
+
+## Bombadil **Tom**
+
+Old Tom Bombadil is a merry fellow.
+
+- one
+- two
+
+```
+tom()
+```
+"""
+
+DISCLAIMER = "All characters are **fictional**, see [credits](/credits)."
+
+
+class TestBlockMemo(unittest.TestCase):
+    def blocks(self, markdown):
+        return list(iter_blocks(markdown.split("\n")))
+
+    def test_parse_matches_parse_blocks(self):
+        assets = {"/images/tom.png": "/images/tom.1234abcd.png"}
+        expected = parse_blocks(self.blocks(MARKDOWN), "/site/", assets)
+        memo = BlockMemo(basepath="/site/", assets=assets)
+        # Blocks are rendered when first seen, remembered when seen again,
+        # and reused from then on.
+        for _ in range(3):
+            document = memo.parse(self.blocks(MARKDOWN), search=True)
+            self.assertEqual(expected.node.to_html(), document.node.to_html())
+            self.assertEqual(expected.title, document.title)
+            self.assertEqual(expected.headings, document.headings)
+            self.assertEqual(expected.summary, document.summary)
+            self.assertEqual(["/", "/images/tom.png"], document.references)
+            self.assertEqual(count_terms(expected.node), document.terms)
+        self.assertEqual(12, memo.misses)
+        self.assertEqual(6, memo.hits)
+        self.assertEqual(6, len(memo.blocks))
+        self.assertIsNone(memo.parse(self.blocks(MARKDOWN)).terms)
+
+    def test_terms_are_counted_on_first_search(self):
+        memo = BlockMemo()
+        for _ in range(2):
+            block, _, _ = memo.render(BlockType.PARAGRAPH, [DISCLAIMER])
+        self.assertIsNone(block.terms)
+        block, node, _ = memo.render(BlockType.PARAGRAPH, [DISCLAIMER], search=True)
+        self.assertEqual(3, memo.misses)
+        self.assertEqual(
+            {"all": 1, "characters": 1, "fictional": 1, "see": 1, "credits": 1},
+            block.terms,
+        )
+        block, node, references = memo.render(BlockType.PARAGRAPH, [DISCLAIMER])
+        self.assertIsNone(node)
+        self.assertEqual(["/credits"], references)
+        self.assertEqual(1, memo.hits)
+
+    def test_key_includes_block_type(self):
+        memo = BlockMemo()
+        for _ in range(2):
+            memo.render(BlockType.PARAGRAPH, ["text"])
+            memo.render(BlockType.QUOTE, ["> text"])
+            memo.render(BlockType.PARAGRAPH, ["> text"])
+        self.assertEqual(3, len(memo.blocks))
+
+    def test_least_recently_used_blocks_are_evicted(self):
+        size = len("<p>a</p>") + len("a") + ENTRY_OVERHEAD
+        memo = BlockMemo(max_size=2 * size)
+        for text in ("a", "b", "c", "a", "b", "a", "c"):
+            memo.render(BlockType.PARAGRAPH, [text])
+        self.assertEqual([("paragraph", "a"), ("paragraph", "c")], list(memo.blocks))
+        self.assertEqual(2 * size, memo.size)
+        memo.render(BlockType.PARAGRAPH, ["b"])
+        self.assertEqual((1, 7), (memo.hits, memo.misses))
+
+
+class TestBuildWithBlockMemo(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.template = os.path.join(self.root, "template.html")
+        self.write(self.template, "{{ Title }}|{{ Content }}")
+        for n in range(4):
+            self.write(
+                os.path.join(self.content, f"page{n}.md"),
+                f"# Page {n}\n\nText of page {n}.\n\n{DISCLAIMER}\n",
+            )
+
+    def build(self, name, **kwargs):
+        config = BuildConfig(
+            content_dir=self.content,
+            dest_dir=os.path.join(self.root, name),
+            template_path=self.template,
+            **kwargs,
+        )
+        result = build_pages(config)
+        outputs = {}
+        for n in range(4):
+            with open(os.path.join(config.dest_dir, f"page{n}.html")) as f:
+                outputs[n] = f.read()
+        return result, outputs
+
+    def test_stats_and_outputs(self):
+        _, expected = self.build("plain", block_memo_size=0)
+        result, outputs = self.build("memo")
+        self.assertEqual(expected, outputs)
+        self.assertEqual((2, 10), (result.block_hits, result.block_misses))
+
+        result, outputs = self.build("streamed", stream_threshold=0, search=True)
+        self.assertEqual(expected, outputs)
+        self.assertEqual(12, result.block_hits + result.block_misses)
+
+    def test_parallel_build(self):
+        _, expected = self.build("plain", block_memo_size=0)
+        result, outputs = self.build("parallel", jobs=2)
+        self.assertEqual(expected, outputs)
+        # Every worker has its own memo.
+        self.assertEqual(12, result.block_hits + result.block_misses)
+
+
+if __name__ == "__main__":
+    unittest.main()
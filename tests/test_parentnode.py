@@ -1,3 +1,4 @@
+import io
 import unittest
 from src.htmlnode import LeafNode, ParentNode
 
@@ -17,3 +18,18 @@ class TestNodeParent(unittest.TestCase):
             parent_node.to_html(),
             "<div><span><b>grandchild</b></span></div>",
         )
+
+    def test_write_html_streams_to_writer(self):
+        parent_node = ParentNode(
+            "div", [ParentNode("p", [LeafNode("b", "bold"), LeafNode(None, " text")])]
+        )
+        out = io.StringIO()
+        parent_node.write_html(out)
+        self.assertEqual(out.getvalue(), "<div><p><b>bold</b> text</p></div>")
+        self.assertEqual(out.getvalue(), parent_node.to_html())
+
+    def test_deeply_nested_tree(self):
+        node = LeafNode(None, "x")
+        for _ in range(200):
+            node = ParentNode("span", [node])
+        self.assertEqual(node.to_html(), "<span>" * 200 + "x" + "</span>" * 200)
@@ -0,0 +1,112 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+from src.build import BuildConfig, build_pages
+from src.profiler import Profiler
+
+
+class TestProfiler(unittest.TestCase):
+    def test_stage_records_event_and_calls_hooks(self):
+        profiler = Profiler()
+        seen = []
+        profiler.add_hook(seen.append)
+        with profiler.stage("parse", "a.md"):
+            [object() for _ in range(10)]
+        self.assertEqual(1, len(profiler.events))
+        event = profiler.events[0]
+        self.assertEqual(("parse", "a.md"), (event.name, event.page))
+        self.assertGreaterEqual(event.duration, 0)
+        self.assertEqual([event], seen)
+
+    def test_overlapping_stages_have_no_allocations(self):
+        profiler = Profiler()
+        entered = threading.Event()
+        done = threading.Event()
+
+        def write():
+            with profiler.stage("write", "a.md"):
+                entered.set()
+                done.wait(5)
+
+        thread = threading.Thread(target=write)
+        thread.start()
+        entered.wait(5)
+        with profiler.stage("render", "b.md"):
+            pass
+        done.set()
+        thread.join()
+        with profiler.stage("render", "c.md"):
+            pass
+        allocations = {event.page: event.allocations for event in profiler.events}
+        self.assertIsNone(allocations["a.md"])
+        self.assertIsNone(allocations["b.md"])
+        self.assertIsNotNone(allocations["c.md"])
+        self.assertIsNone(profiler.stage_totals()["render"][1])
+        self.assertIn("-", profiler.summary().splitlines()[1])
+
+    def test_summary_and_chrome_trace(self):
+        profiler = Profiler()
+        with profiler.stage("read", "a.md"):
+            pass
+        with profiler.stage("scan"):
+            pass
+        summary = profiler.summary()
+        self.assertIn("read", summary)
+        self.assertIn("a.md", summary)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "trace.json")
+            profiler.write_chrome_trace(path)
+            with open(path) as f:
+                trace = json.load(f)
+        self.assertEqual(
+            ["read", "scan"], [event["name"] for event in trace["traceEvents"]]
+        )
+        self.assertEqual("X", trace["traceEvents"][0]["ph"])
+        self.assertEqual("a.md", trace["traceEvents"][0]["args"]["page"])
+
+
+class TestBuildProfiling(unittest.TestCase):
+    def build(self, jobs, pages=2):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp, "content")
+            os.makedirs(content)
+            for name in range(pages):
+                with open(os.path.join(content, f"{name}.md"), "w") as f:
+                    f.write(f"# {name}\n\ntext")
+            template = os.path.join(tmp, "template.html")
+            with open(template, "w") as f:
+                f.write("{{ Title }}{{ Content }}")
+            profiler = Profiler()
+            build_pages(
+                BuildConfig(
+                    content_dir=content,
+                    dest_dir=os.path.join(tmp, "docs"),
+                    template_path=template,
+                    jobs=jobs,
+                    profiler=profiler,
+                )
+            )
+        return profiler
+
+    def test_records_every_stage_per_page(self):
+        for jobs in (1, 2):
+            profiler = self.build(jobs)
+            totals = profiler.stage_totals()
+            for stage in ("read", "blocks", "inline", "render", "write"):
+                self.assertEqual(2, totals[stage][2])
+            self.assertEqual(2, len(profiler.page_totals()))
+
+    def test_serial_build_counts_allocations(self):
+        profiler = self.build(1, pages=50)
+        for name, (_, allocations, _) in profiler.stage_totals().items():
+            self.assertIsNotNone(allocations, name)
+        for page, (_, allocations) in profiler.page_totals().items():
+            self.assertIsNotNone(allocations, page)
+
+
+if __name__ == "__main__":
+    unittest.main()
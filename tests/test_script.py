@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+
+from src.script import render_page_html, stream_page
+from src.template import Template
+
+
+MARKDOWN = """# Title
+
+Some **bold** text with a [link](/about/).
+
+- one
+- two
+
+```
+code
+```
+"""
+
+
+class TestStreamPage(unittest.TestCase):
+    def test_matches_in_memory_rendering(self):
+        template = Template(
+            '<title>{{ Title }}</title><link href="/a.css">{{ Content }}'
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "page.md")
+            with open(source, "w") as f:
+                f.write(MARKDOWN)
+            streamed = os.path.join(tmp, "out", "streamed.html")
+            page, _ = render_page_html(source, template, "/site/")
+            info = stream_page(source, template, streamed, "/site/")
+            self.assertTrue(info["streamed"])
+            with open(streamed) as f:
+                self.assertEqual(page, f.read())
+
+    def test_missing_title_leaves_no_output(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "page.md")
+            with open(source, "w") as f:
+                f.write("no title")
+            dest = os.path.join(tmp, "page.html")
+            with self.assertRaises(ValueError):
+                stream_page(source, Template("{{ Content }}"), dest, "/")
+            self.assertEqual(["page.md"], os.listdir(tmp))
+
+
+if __name__ == "__main__":
+    unittest.main()
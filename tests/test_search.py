@@ -0,0 +1,107 @@
+import json
+import os
+import unittest
+
+from src.build import BuildConfig, build_pages
+from src.markdown_blocks import iter_blocks, parse_blocks
+from src.search import count_terms, shard_key, tokenize
+from tests.helpers import TempDirTestCase
+
+
+class TestTokenize(unittest.TestCase):
+    def test_tokenize(self):
+        self.assertEqual(
+            ["tom", "bombadil", "mistake", "1954"],
+            tokenize("Tom Bombadil, was a mistake (1954)!"),
+        )
+
+    def test_count_terms(self):
+        markdown = "# Tom\n\n**Tom** and _Goldberry_\n\n```\ntom()\n```"
+        document = parse_blocks(iter_blocks(markdown.split("\n")))
+        self.assertEqual({"tom": 3, "goldberry": 1}, count_terms(document.node))
+
+    def test_shard_key(self):
+        self.assertEqual("bo", shard_key("bombadil"))
+        self.assertEqual("19", shard_key("1954"))
+        self.assertEqual("_", shard_key("éowyn"))
+
+
+class TestSearchIndex(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.dest = os.path.join(self.root, "docs")
+        self.template = os.path.join(self.root, "template.html")
+        os.makedirs(self.content)
+        self.write(self.template, "{{ Content }}")
+        self.write(self.content_path("index.md"), "# Home\n\nTom and Frodo")
+        self.write(self.content_path("tom.md"), "# Tom\n\nTom Bombadil")
+        self.config = BuildConfig(
+            content_dir=self.content,
+            dest_dir=self.dest,
+            template_path=self.template,
+            search=True,
+        )
+
+    def content_path(self, *parts):
+        return os.path.join(self.content, *parts)
+
+    def lookup(self, term):
+        """
+        Searches the index for term the way a client would, returning the
+        URLs of the matching pages and the term counts.
+        """
+        path = os.path.join(self.dest, "search", "terms", f"{shard_key(term)}.json")
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            postings = json.load(f).get(term, [])
+        matches = {}
+        for i in range(0, len(postings), 2):
+            doc_id = postings[i]
+            with open(os.path.join(self.dest, "search", "docs", "0.json")) as f:
+                url, _ = json.load(f)[str(doc_id)]
+            matches[url] = postings[i + 1]
+        return matches
+
+    def test_index(self):
+        build_pages(self.config)
+        self.assertEqual({"/": 1, "/tom.html": 2}, self.lookup("tom"))
+        self.assertEqual({"/tom.html": 1}, self.lookup("bombadil"))
+        with open(os.path.join(self.dest, "search", "docs", "0.json")) as f:
+            self.assertEqual(
+                {"0": ["/", "Home"], "1": ["/tom.html", "Tom"]}, json.load(f)
+            )
+
+    def test_incremental_updates(self):
+        build_pages(self.config)
+        self.write(self.content_path("tom.md"), "# Tom\n\nGoldberry")
+        result = build_pages(self.config)
+        self.assertEqual({}, self.lookup("bombadil"))
+        self.assertFalse(
+            os.path.exists(os.path.join(self.dest, "search", "terms", "bo.json"))
+        )
+        self.assertEqual({"/tom.html": 1}, self.lookup("goldberry"))
+        self.assertEqual({"/": 1, "/tom.html": 1}, self.lookup("tom"))
+        # Only the shards of the old and new terms of the page are rewritten.
+        self.assertEqual(4, result.search_shards)
+
+        os.remove(self.content_path("tom.md"))
+        build_pages(self.config)
+        self.assertEqual({"/": 1}, self.lookup("tom"))
+        self.assertEqual({}, self.lookup("goldberry"))
+
+    def test_enabling_and_disabling(self):
+        self.config.search = False
+        build_pages(self.config)
+        self.config.search = True
+        self.assertEqual(2, len(build_pages(self.config).rendered))
+        self.assertEqual({"/tom.html": 1}, self.lookup("bombadil"))
+
+        self.config.search = False
+        build_pages(self.config)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "search")))
+
+
+if __name__ == "__main__":
+    unittest.main()
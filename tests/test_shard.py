@@ -0,0 +1,177 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+from src.build import BuildConfig, build_site, merge_shards
+from src.shard import parse_shard, partition
+from tests.helpers import TempDirTestCase
+
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestPartition(unittest.TestCase):
+    def test_parse_shard(self):
+        self.assertEqual((2, 3), parse_shard("2/3"))
+        for text in ("0/3", "4/3", "3", "a/b", "1/0"):
+            with self.assertRaises(ValueError):
+                parse_shard(text)
+
+    def test_hash_is_stable(self):
+        pages = [(f"blog/{n}.md", 0) for n in range(100)]
+        shards = partition(pages, 4)
+        self.assertEqual(shards, partition(list(reversed(pages)), 4))
+        self.assertEqual({1, 2, 3, 4}, set(shards.values()))
+        # Adding a page moves no other page.
+        more = partition(pages + [("new.md", 0)], 4)
+        self.assertEqual(shards, {path: more[path] for path in shards})
+
+    def test_size_balances_bytes(self):
+        pages = [("a.md", 100), ("b.md", 60), ("c.md", 50), ("d.md", 40), ("e.md", 10)]
+        shards = partition(pages, 2, "size")
+        self.assertEqual(
+            {"a.md": 1, "b.md": 2, "c.md": 2, "d.md": 1, "e.md": 2}, shards
+        )
+        with self.assertRaises(ValueError):
+            partition(pages, 2, "name")
+
+
+class TestShardedBuild(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        os.makedirs(os.path.join(self.content, "blog"))
+        os.makedirs(os.path.join(self.root, "static"))
+        self.write("template.html", "{{ Title }}|{{ Content }}")
+        self.write("static/style.css", "body {}")
+        self.write("content/index.md", "# Home\n\nWelcome to the tavern.")
+        for n in range(12):
+            self.write(f"content/blog/post{n}.md", f"# Post {n}\n\nTavern story {n}.")
+
+    def config(self, dest, **kwargs):
+        return BuildConfig(
+            content_dir=self.content,
+            static_dir=os.path.join(self.root, "static"),
+            dest_dir=os.path.join(self.root, dest),
+            template_path=os.path.join(self.root, "template.html"),
+            site_url="https://example.com",
+            search=True,
+            **kwargs,
+        )
+
+    def shard_dirs(self, count):
+        return [os.path.join(self.root, "shards", str(i)) for i in range(1, count + 1)]
+
+    def build_shards(self, count, **kwargs):
+        for i, dest in enumerate(self.shard_dirs(count), 1):
+            build_site(self.config(dest, shard=(i, count), **kwargs))
+
+    def outputs(self, dest):
+        outputs = {}
+        for dir_path, _, filenames in os.walk(os.path.join(self.root, dest)):
+            for filename in filenames:
+                path = os.path.join(dir_path, filename)
+                rel_path = os.path.relpath(path, os.path.join(self.root, dest))
+                if rel_path == ".build-manifest.json" or rel_path.startswith("search"):
+                    continue
+                with open(path) as f:
+                    outputs[rel_path] = f.read()
+        return outputs
+
+    def search(self, dest, term):
+        """
+        Returns the {url: count} of the pages a term is found in.
+        """
+        root = os.path.join(self.root, dest, "search")
+        with open(os.path.join(root, "terms", f"{term[:2]}.json")) as f:
+            postings = json.load(f)[term]
+        urls = {}
+        for doc_id, count in zip(postings[::2], postings[1::2]):
+            with open(os.path.join(root, "docs", f"{doc_id // 1000}.json")) as f:
+                urls[json.load(f)[str(doc_id)][0]] = count
+        return urls
+
+    def manifest_path(self, dest):
+        return os.path.join(self.root, dest, ".build-manifest.json")
+
+    def start_main(self, *args):
+        return subprocess.Popen(
+            [sys.executable, "-m", "src.main", "--no-cache", "--search"]
+            + ["--site-url", "https://example.com", *args],
+            cwd=self.root,
+            env=dict(os.environ, PYTHONPATH=REPO_DIR),
+            stdout=subprocess.DEVNULL,
+        )
+
+    def test_shards_in_separate_processes(self):
+        build_site(self.config("expected"))
+        processes = [self.start_main("--shard", f"{i}/3") for i in range(1, 4)]
+        self.assertEqual([0, 0, 0], [process.wait() for process in processes])
+        shards = []
+        for dest in self.shard_dirs(3):
+            with open(self.manifest_path(dest)) as f:
+                shards.append(json.load(f)["shard"]["pages"])
+        self.assertEqual(13, sum(map(len, shards)))
+        self.assertTrue(all(shards))
+
+        self.assertEqual(0, self.start_main("--merge").wait())
+        self.assertEqual(self.outputs("expected"), self.outputs("docs"))
+        for term in ("tavern", "story", "welcome"):
+            self.assertEqual(self.search("expected", term), self.search("docs", term))
+
+    def test_merge_is_incremental(self):
+        self.build_shards(2, shard_by="size")
+        result = merge_shards(self.config("docs"), self.shard_dirs(2))
+        self.assertEqual(13, len(result.rendered))
+        self.assertIn(os.path.join(self.root, "docs", "sitemap.xml"), result.indexes)
+
+        self.write("content/blog/post3.md", "# Post 3\n\nEdited.")
+        os.remove(os.path.join(self.content, "blog", "post4.md"))
+        self.build_shards(2, shard_by="size")
+        result = merge_shards(self.config("docs"), self.shard_dirs(2))
+        self.assertEqual(
+            [os.path.join(self.root, "docs", "blog", "post3.html")], result.rendered
+        )
+        self.assertEqual(
+            [os.path.join(self.root, "docs", "blog", "post4.html")], result.removed
+        )
+        build_site(self.config("expected"))
+        self.assertEqual(self.outputs("expected"), self.outputs("docs"))
+        self.assertEqual({"/blog/post3.html": 1}, self.search("docs", "edited"))
+
+    def test_missing_shard(self):
+        self.build_shards(3)
+        with self.assertRaisesRegex(ValueError, "missing shards: 2"):
+            merge_shards(self.config("docs"), self.shard_dirs(3)[::2])
+        with self.assertRaisesRegex(ValueError, "duplicated shards: 1"):
+            merge_shards(self.config("docs"), self.shard_dirs(3) + self.shard_dirs(1))
+        self.assertFalse(os.path.exists(os.path.join(self.root, "docs")))
+
+    def test_missing_and_duplicated_pages(self):
+        self.build_shards(2)
+        self.write("content/new.md", "# New")
+        with self.assertRaisesRegex(ValueError, "missing pages: new.md"):
+            merge_shards(self.config("docs"), self.shard_dirs(2))
+
+        os.remove(os.path.join(self.content, "new.md"))
+        data = []
+        for dest in self.shard_dirs(2):
+            with open(self.manifest_path(dest)) as f:
+                data.append(json.load(f))
+        data[1]["shard"]["pages"].append(data[0]["shard"]["pages"][0])
+        data[1]["pages"].update(data[0]["pages"])
+        with open(self.manifest_path(self.shard_dirs(2)[1]), "w") as f:
+            json.dump(data[1], f)
+        with self.assertRaisesRegex(ValueError, "pages in several shards"):
+            merge_shards(self.config("docs"), self.shard_dirs(2))
+
+    def test_settings_must_match(self):
+        self.build_shards(2)
+        with self.assertRaisesRegex(ValueError, "another template, basepath"):
+            merge_shards(self.config("docs", basepath="/blog/"), self.shard_dirs(2))
+
+
+if __name__ == "__main__":
+    unittest.main()
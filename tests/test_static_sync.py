@@ -0,0 +1,82 @@
+import os
+import unittest
+
+from src.static_sync import list_files, sync_static
+from tests.helpers import TempDirTestCase
+
+
+class TestSyncStatic(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.root, "static")
+        self.dest = os.path.join(self.root, "docs")
+        os.makedirs(os.path.join(self.static, "images"))
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.static, "images", "a.png"), "png")
+
+    def test_list_files(self):
+        self.assertEqual(
+            [os.path.join("images", "a.png"), "index.css"], list_files(self.static)
+        )
+
+    def test_copies_then_skips_unchanged_files(self):
+        result, files = sync_static(self.static, self.dest)
+        self.assertEqual((2, 0, 0), (result.copied, result.skipped, result.removed))
+        with open(os.path.join(self.dest, "index.css")) as f:
+            self.assertEqual("body {}", f.read())
+
+        result, _ = sync_static(self.static, self.dest, files)
+        self.assertEqual((0, 2, 0), (result.copied, result.skipped, result.removed))
+
+    def test_copies_changed_files(self):
+        _, files = sync_static(self.static, self.dest)
+        self.write(os.path.join(self.static, "index.css"), "body { margin: 0 }")
+        result, _ = sync_static(self.static, self.dest, files)
+        self.assertEqual((1, 1, 0), (result.copied, result.skipped, result.removed))
+
+    def test_syncs_only_the_given_files(self):
+        _, files = sync_static(self.static, self.dest)
+        self.write(os.path.join(self.static, "index.css"), "body { margin: 0 }")
+        self.write(os.path.join(self.static, "new.css"), "p {}")
+        os.remove(os.path.join(self.static, "images", "a.png"))
+        result, files = sync_static(
+            self.static, self.dest, files, only=["new.css", "images/a.png"]
+        )
+        self.assertEqual((1, 0, 1), (result.copied, result.skipped, result.removed))
+        self.assertEqual(["index.css", "new.css"], files)
+        with open(os.path.join(self.dest, "index.css")) as f:
+            self.assertEqual("body {}", f.read())
+
+    def test_removes_stale_files_only(self):
+        _, files = sync_static(self.static, self.dest)
+        self.write(os.path.join(self.dest, "index.html"), "generated page")
+        os.remove(os.path.join(self.static, "images", "a.png"))
+        result, files = sync_static(self.static, self.dest, files)
+        self.assertEqual(1, result.removed)
+        self.assertEqual(["index.css"], files)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "images")))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "index.html")))
+
+    def test_hardlinks(self):
+        sync_static(self.static, self.dest, link=True)
+        self.assertTrue(
+            os.path.samefile(
+                os.path.join(self.static, "index.css"),
+                os.path.join(self.dest, "index.css"),
+            )
+        )
+
+    def test_hash_comparison_detects_same_size_edits(self):
+        _, files = sync_static(self.static, self.dest)
+        path = os.path.join(self.static, "index.css")
+        stat_result = os.stat(path)
+        self.write(path, "body []")
+        os.utime(path, ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns))
+        result, _ = sync_static(self.static, self.dest, files)
+        self.assertEqual(0, result.copied)
+        result, _ = sync_static(self.static, self.dest, files, use_hash=True)
+        self.assertEqual(1, result.copied)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import io
+import os
+import tempfile
+import unittest
+
+from src.htmlnode import LeafNode, ParentNode
+from src.template import Template, _template_cache, load_template
+
+
+class TestTemplate(unittest.TestCase):
+    def test_render(self):
+        template = Template("<title>{{ Title }}</title><main>{{ Content }}</main>")
+        self.assertEqual(
+            template.render({"Title": "Hi", "Content": "<p>body</p>"}),
+            "<title>Hi</title><main><p>body</p></main>",
+        )
+
+    def test_arbitrary_placeholders(self):
+        template = Template("{{ Site }} | {{Title}} | {{ Site }}")
+        self.assertEqual(["Site", "Title", "Site"], template.placeholders)
+        self.assertEqual(
+            template.render({"Site": "Blog", "Title": "Post"}), "Blog | Post | Blog"
+        )
+
+    def test_missing_placeholder_is_left_untouched(self):
+        template = Template("<p>{{ Title }}</p>{{ Footer }}")
+        self.assertEqual(template.render({"Title": "x"}), "<p>x</p>{{ Footer }}")
+
+    def test_values_are_not_rescanned(self):
+        template = Template("<h1>{{ Title }}</h1>{{ Content }}")
+        self.assertEqual(
+            template.render({"Title": "{{ Content }}", "Content": "body"}),
+            "<h1>{{ Content }}</h1>body",
+        )
+
+    def test_basepath_applies_to_literals_only(self):
+        template = Template('<link href="/index.css">{{ Content }}', "/site/")
+        self.assertEqual(
+            template.render({"Content": '<code>href="/x"</code>'}),
+            '<link href="/site/index.css"><code>href="/x"</code>',
+        )
+
+    def test_assets_rewrite_literal_urls(self):
+        template = Template(
+            '<link href="/index.css"><a href="/about">{{ Content }}',
+            "/site/",
+            {"/index.css": "/index.0123abcd.css"},
+        )
+        self.assertEqual(
+            template.render({"Content": ""}),
+            '<link href="/site/index.0123abcd.css"><a href="/site/about">',
+        )
+
+    def test_write_streams_nodes(self):
+        template = Template("<title>{{ Title }}</title>{{ Content }}{{ Footer }}")
+        out = io.StringIO()
+        node = ParentNode("p", [LeafNode("b", "body")])
+        template.write(out, {"Title": "Hi", "Content": node})
+        self.assertEqual(
+            out.getvalue(), "<title>Hi</title><p><b>body</b></p>{{ Footer }}"
+        )
+
+
+class TestLoadTemplate(unittest.TestCase):
+    def test_cache_follows_file_changes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            with open(path, "w") as f:
+                f.write("<p>{{ Title }}</p>")
+            first = load_template(path)
+            self.assertIs(first, load_template(path))
+
+            with open(path, "w") as f:
+                f.write("<h1>{{ Title }}</h1>")
+            os.utime(path, ns=(0, 0))
+            second = load_template(path)
+            self.assertIsNot(first, second)
+            self.assertEqual(second.render({"Title": "x"}), "<h1>x</h1>")
+
+    def test_cache_keeps_the_latest_variant(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            with open(path, "w") as f:
+                f.write('<link href="/a.css">{{ Content }}')
+            first = load_template(path, "/", {"/a.css": "/a.1.css"})
+            self.assertIs(first, load_template(path, "/", {"/a.css": "/a.1.css"}))
+            for n in range(2, 10):
+                load_template(path, "/", {"/a.css": f"/a.{n}.css"})
+            self.assertEqual(1, sum(key == path for key in _template_cache))
+            second = load_template(path, "/", {"/a.css": "/a.1.css"})
+            self.assertIsNot(first, second)
+            self.assertEqual('<link href="/a.1.css">', second.render({"Content": ""}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -27,6 +27,22 @@ class TestTextNodeToHTMLNode(unittest.TestCase):
             {"src": "https://www.boot.dev", "alt": "This is an image"},
         )
 
+    def test_basepath_prefixes_root_relative_urls(self):
+        link = TextNode("home", TextType.LINK, "/blog/")
+        image = TextNode("tom", TextType.IMAGE, "/images/tom.png")
+        external = TextNode("boot", TextType.LINK, "https://www.boot.dev")
+        self.assertEqual(
+            text_node_to_html_node(link, "/site/").props, {"href": "/site/blog/"}
+        )
+        self.assertEqual(
+            text_node_to_html_node(image, "/site/").props,
+            {"src": "/site/images/tom.png", "alt": "tom"},
+        )
+        self.assertEqual(
+            text_node_to_html_node(external, "/site/").props,
+            {"href": "https://www.boot.dev"},
+        )
+
     def test_bold(self):
         node = TextNode("This is bold", TextType.BOLD)
         html_node = text_node_to_html_node(node)
@@ -24,6 +24,28 @@ class TestTexToTextNode(unittest.TestCase):
             nodes,
         )
 
+    def test_plain_text(self):
+        nodes = text_to_textnodes("Just plain text")
+        self.assertListEqual([TextNode("Just plain text", TextType.TEXT)], nodes)
+
+    def test_url_with_underscores(self):
+        nodes = text_to_textnodes(
+            "A [snake_case link](https://example.com/a_b_c) and ![img](/x_y.png)"
+        )
+        self.assertListEqual(
+            [
+                TextNode("A ", TextType.TEXT),
+                TextNode("snake_case link", TextType.LINK, "https://example.com/a_b_c"),
+                TextNode(" and ", TextType.TEXT),
+                TextNode("img", TextType.IMAGE, "/x_y.png"),
+            ],
+            nodes,
+        )
+
+    def test_unclosed_delimiter(self):
+        with self.assertRaises(ValueError):
+            text_to_textnodes("This is **not closed")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,117 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from src.build import BuildConfig, build
+from src.manifest import MANIFEST_NAME, BuildManifest
+from src.watch import changed_paths, poll, rebuild, snapshot
+from tests.helpers import TempDirTestCase
+
+
+class TestSnapshot(unittest.TestCase):
+    def test_changed_paths(self):
+        before = {"a.md": (1, 1), "b.md": (1, 1), "c.md": (1, 1)}
+        after = {"a.md": (1, 1), "b.md": (2, 5), "d.md": (1, 1)}
+        self.assertEqual(["b.md", "c.md", "d.md"], changed_paths(before, after))
+
+    def test_snapshot_detects_edits(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp, "content")
+            os.makedirs(os.path.join(content, "blog"))
+            page = os.path.join(content, "blog", "post.md")
+            template = os.path.join(tmp, "template.html")
+            for path in (page, template):
+                with open(path, "w") as f:
+                    f.write("x")
+            before = snapshot([content, template])
+            self.assertEqual({page, template}, set(before))
+
+            with open(page, "w") as f:
+                f.write("edited")
+            self.assertEqual(
+                [page], changed_paths(before, snapshot([content, template]))
+            )
+
+    def test_poll(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            page = os.path.join(tmp, "page.md")
+            other = os.path.join(tmp, "other.md")
+            for path in (page, other):
+                with open(path, "w") as f:
+                    f.write("x")
+            before = snapshot([tmp])
+            with open(page, "w") as f:
+                f.write("edited")
+            os.remove(other)
+            after = poll(before, [page, other])
+            self.assertEqual([other, page], changed_paths(before, after))
+            self.assertEqual({page}, set(after))
+
+
+class TestRebuild(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.config = BuildConfig(
+            content_dir=os.path.join(self.root, "content"),
+            static_dir=os.path.join(self.root, "static"),
+            dest_dir=os.path.join(self.root, "docs"),
+            template_path=os.path.join(self.root, "template.html"),
+        )
+        self.write(self.config.template_path, "{{ Title }}|{{ Content }}")
+        self.write(self.path("content", "index.md"), "# Home\n\n[a](/blog/a)")
+        self.write(self.path("content", "blog", "a.md"), "# A\n\n![logo](/logo.png)")
+        self.write(self.path("content", "blog", "b.md"), "# B")
+        self.write(self.path("static", "logo.png"), "png")
+        self.write(self.path("static", "style.css"), "body {}")
+        build(self.config)
+
+    def path(self, *parts):
+        return os.path.join(self.root, *parts)
+
+    def rebuild(self, changed):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return rebuild(self.config, changed)
+
+    def test_rebuilds_affected_pages_only(self):
+        page = self.path("content", "blog", "a.md")
+        self.write(page, "# A\n\nEdited")
+        # b.md changed too, but is not reported and thus left alone.
+        self.write(self.path("content", "blog", "b.md"), "# B\n\nEdited")
+        result = self.rebuild([page])
+        self.assertEqual([self.path("docs", "blog", "a.html")], result.rendered)
+        # The page linking to it is looked at, and unchanged.
+        self.assertEqual(1, result.skipped)
+        self.assertEqual(0, result.static.copied + result.static.skipped)
+
+        os.remove(page)
+        result = self.rebuild([page])
+        self.assertEqual([self.path("docs", "blog", "a.html")], result.removed)
+
+    def test_copies_changed_static_files_only(self):
+        self.write(self.path("static", "style.css"), "body { margin: 0 }")
+        self.write(self.path("static", "logo.png"), "new png")
+        result = self.rebuild([self.path("static", "style.css")])
+        self.assertEqual((1, 0), (result.static.copied, result.static.skipped))
+        self.assertEqual([], result.rendered)
+        with open(self.path("docs", "logo.png")) as f:
+            self.assertEqual("png", f.read())
+
+    def test_template_change_rebuilds_everything(self):
+        self.write(self.config.template_path, "{{ Content }}")
+        result = self.rebuild([self.config.template_path])
+        self.assertEqual(3, len(result.rendered))
+        self.assertEqual(2, result.static.skipped)
+
+    def test_manifest_is_loaded_once(self):
+        path = self.path("docs", MANIFEST_NAME)
+        manifest = BuildManifest.load(path, shared=True)
+        self.assertIs(manifest, BuildManifest.load(path, shared=True))
+        # Taken by the next build.
+        self.assertIs(manifest, BuildManifest.load(path))
+        self.assertIsNot(manifest, BuildManifest.load(path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+
+from src.writer import OutputWriter, atomic_write
+
+
+class TestAtomicWrite(unittest.TestCase):
+    def test_creates_directories_and_leaves_no_temp_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "a", "b", "index.html")
+            created_dirs = set()
+            atomic_write(path, "<p>one</p>", created_dirs)
+            atomic_write(path, "<p>two</p>", created_dirs)
+            with open(path) as f:
+                self.assertEqual("<p>two</p>", f.read())
+            self.assertEqual(["index.html"], os.listdir(os.path.dirname(path)))
+            self.assertEqual({os.path.dirname(path)}, created_dirs)
+
+
+class TestOutputWriter(unittest.TestCase):
+    def test_writes_every_page(self):
+        for threads in (0, 3):
+            with tempfile.TemporaryDirectory() as tmp:
+                paths = [
+                    os.path.join(tmp, f"dir{i % 3}", f"{i}.html") for i in range(50)
+                ]
+                with OutputWriter(threads=threads, max_pending=4) as writer:
+                    for i, path in enumerate(paths):
+                        writer.submit(path, f"page {i}")
+                self.assertEqual({}, writer.errors)
+                for i, path in enumerate(paths):
+                    with open(path) as f:
+                        self.assertEqual(f"page {i}", f.read())
+
+    def test_collects_errors(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            blocker = os.path.join(tmp, "blocker")
+            with open(blocker, "w") as f:
+                f.write("a file, not a directory")
+            bad_path = os.path.join(blocker, "index.html")
+            with OutputWriter(threads=2) as writer:
+                writer.submit(bad_path, "page")
+                writer.submit(os.path.join(tmp, "ok.html"), "page")
+            self.assertEqual([bad_path], list(writer.errors))
+            self.assertTrue(os.path.exists(os.path.join(tmp, "ok.html")))
+
+
+if __name__ == "__main__":
+    unittest.main()